@@ -1,6 +1,6 @@
 import django_filters
 
-from parser.models import Item
+from parser.models import Item, Category
 
 
 class ItemFilter(django_filters.FilterSet):
@@ -25,4 +25,20 @@ class ItemFilter(django_filters.FilterSet):
             'price', 'min_price', 'max_price',
             'rating', 'min_rating', 'max_rating',
             'reviews_count', 'min_reviews_count', 'max_reviews_count'
-        ]
\ No newline at end of file
+        ]
+
+
+class CategoryFilter(django_filters.FilterSet):
+    # Фильтрация по положению в дереве
+    parent = django_filters.NumberFilter(field_name='parent', lookup_expr='exact')
+    root = django_filters.BooleanFilter(field_name='parent', lookup_expr='isnull')
+    depth = django_filters.NumberFilter(field_name='depth', lookup_expr='exact')
+    max_depth = django_filters.NumberFilter(field_name='depth', lookup_expr='lte')
+
+    # Фильтрация по названию и URL
+    name = django_filters.CharFilter(field_name='name', lookup_expr='icontains')
+    url = django_filters.CharFilter(field_name='url', lookup_expr='exact')
+
+    class Meta:
+        model = Category
+        fields = ['parent', 'root', 'depth', 'max_depth', 'name', 'url']
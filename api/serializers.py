@@ -1,8 +1,14 @@
 from rest_framework import serializers
 
-from parser.models import Item
+from parser.models import Item, Category
 
 class ItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = Item
         fields = '__all__'
+
+
+class CategorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'url', 'parent', 'path', 'depth', 'category', 'link', 'crawled_at']
@@ -1,9 +1,15 @@
 from django.urls import path
 
-from .views import ItemAPIView, ItemSearchAPIView, DeleteAllItemsListAPIView
+from .views import (
+    ItemAPIView, ItemSearchAPIView, DeleteAllItemsListAPIView,
+    CategoryAPIView, CategoryDetailAPIView, CategorySubtreeAPIView
+)
 
 urlpatterns = [
     path('products/', ItemAPIView.as_view(), name='products'),
     path('products/search/', ItemSearchAPIView.as_view(), name='products_search'),
     path('products/delete_all/', DeleteAllItemsListAPIView.as_view(), name='delete_all_product'),
+    path('categories/', CategoryAPIView.as_view(), name='categories'),
+    path('categories/<int:pk>/', CategoryDetailAPIView.as_view(), name='category'),
+    path('categories/<int:pk>/subtree/', CategorySubtreeAPIView.as_view(), name='category_subtree'),
 ]
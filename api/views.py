@@ -1,11 +1,12 @@
-from rest_framework.generics import ListAPIView, DestroyAPIView
+from rest_framework.generics import ListAPIView, DestroyAPIView, RetrieveAPIView, get_object_or_404
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.response import Response
 from rest_framework import status
 
-from api.filters import ItemFilter
-from api.serializers import ItemSerializer
-from parser.models import Item
+from api.filters import ItemFilter, CategoryFilter
+from api.serializers import ItemSerializer, CategorySerializer
+from parser.models import Item, Category
 
 
 class ItemAPIView(ListAPIView):
@@ -129,3 +130,80 @@ class DeleteAllItemsListAPIView(DestroyAPIView):
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class CategoryAPIView(ListAPIView):
+    """
+    API endpoint для списка категорий, собранных обходом дерева категорий.
+
+    Категории упорядочены по материализованному пути (path), то есть в порядке обхода дерева.
+
+    Поддерживаемые параметры запроса:
+        - `parent` — id родительской категории (дочерние категории)
+        - `root` — `true` для основных категорий
+        - `depth` — точный уровень, `max_depth` — уровни не глубже указанного
+        - `name` — часть названия (без учёта регистра)
+        - `url` — канонический URL категории
+
+    Примеры запросов:
+        GET /api/v1/categories/?root=true
+        GET /api/v1/categories/?parent=12
+        GET /api/v1/categories/?name=обувь&max_depth=3
+
+    Пример ответа (200 OK):
+    ```json
+    [
+        {
+            "id": 12,
+            "name": "Женщинам",
+            "url": "https://www.wildberries.by/catalog/zhenshchinam",
+            "parent": null,
+            "path": "0000/",
+            "depth": 1,
+            "category": null,
+            "link": "",
+            "crawled_at": "2025-07-05T14:31:00Z"
+        }
+    ]
+    ```
+    """
+    queryset = Category.objects.all()
+    serializer_class = CategorySerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = CategoryFilter
+
+
+class CategoryDetailAPIView(RetrieveAPIView):
+    """
+    API endpoint для одной категории по id.
+
+    Пример запроса:
+        GET /api/v1/categories/12/
+    """
+    queryset = Category.objects.all()
+    serializer_class = CategorySerializer
+
+
+class CategorySubtreeAPIView(ListAPIView):
+    """
+    API endpoint для поддерева категории: сама категория и все её потомки в порядке обхода.
+
+    Поддерево выбирается одним запросом по диапазону материализованного пути (Category.descendants).
+
+    Поддерживаемые параметры запроса:
+        - `max_depth` — сколько уровней под категорией вернуть (по умолчанию все)
+
+    Примеры запросов:
+        GET /api/v1/categories/12/subtree/
+        GET /api/v1/categories/12/subtree/?max_depth=1
+    """
+    serializer_class = CategorySerializer
+
+    def get_queryset(self):
+        category = get_object_or_404(Category, pk=self.kwargs['pk'])
+        max_depth = self.request.query_params.get('max_depth')
+        if max_depth is not None:
+            if not max_depth.isdigit():
+                raise ValidationError({"max_depth": "Ожидается целое неотрицательное число."})
+            max_depth = int(max_depth)
+        return Category.objects.filter(pk=category.pk) | category.descendants(max_depth)
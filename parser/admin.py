@@ -1,8 +1,16 @@
 from django.contrib import admin
 
-from parser.models import Item
+from parser.models import Item, Category
 
 
 @admin.register(Item)
 class ItemAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'path', 'depth', 'url', 'link')
+    list_filter = ('depth',)
+    search_fields = ('name', 'url')
+    raw_id_fields = ('parent',)
@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+from urllib.parse import parse_qsl, urlsplit
+
+from playwright.async_api import BrowserContext, Route, Request
+
+CACHE_DIR = ".asset_cache"
+CACHEABLE_RESOURCE_TYPES = ("script", "stylesheet", "font")
+# URL скриптов, стилей и шрифтов (расширение в конце пути). Только такие запросы перехватываются кэшем,
+# остальные (документы, XHR, API поиска) идут в сеть без обращения к Python
+CACHEABLE_URL_PATTERN = re.compile(r"^[^?#]*\.(?:m?js|css|woff2?|ttf|otf|eot)(?:[?#]|$)", re.IGNORECASE)
+# Заголовки ответа, которые не сохраняются: тело отдаётся уже распакованным и целиком
+SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie", "date", "age"}
+
+CACHE_MODES = ("none", "assets", "record", "replay")
+
+MIN_LIFETIME = 24 * 3600  # Ответы, которые можно хранить меньше суток (max-age), не кэшируются
+IMMUTABLE_LIFETIME = 365 * 24 * 3600  # Срок хранения для Cache-Control: immutable без max-age
+FINGERPRINTED_LIFETIME = 30 * 24 * 3600  # Срок хранения для URL с хэшем или версией без max-age
+# Хэш содержимого в имени файла (main.4f1a2b3c.js, vendor-8d9e0f1a2b.css) или версия в параметрах
+FINGERPRINT_PATTERN = re.compile(r"[.\-_][0-9a-f]{8,}\.[a-z0-9]+$", re.IGNORECASE)
+VERSION_PARAMS = {"v", "ver", "version", "hash", "rev"}
+
+
+def _filter_headers(headers: dict[str, str]) -> dict[str, str]:
+    return {name: value for name, value in headers.items() if name.lower() not in SKIPPED_HEADERS}
+
+
+def _is_fingerprinted(url: str) -> bool:
+    parts = urlsplit(url)
+    if FINGERPRINT_PATTERN.search(parts.path):
+        return True
+    return any(name.lower() in VERSION_PARAMS and value for name, value in parse_qsl(parts.query))
+
+
+def cache_lifetime(url: str, headers: dict[str, str]) -> float | None:
+    """
+    Сколько секунд можно хранить ответ, или None, если ресурс не неизменяемый.
+
+    Неизменяемыми считаются ответы с Cache-Control: immutable, с max-age не меньше MIN_LIFETIME
+    и ответы по URL с хэшем или версией (при смене ресурса меняется URL). no-store, no-cache
+    и private исключают кэширование, явный max-age ограничивает срок.
+    """
+    directives = {}
+    for directive in headers.get("cache-control", "").lower().split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name] = value.strip('"')
+    if {"no-store", "no-cache", "private"} & directives.keys():
+        return None
+
+    max_age = int(directives["max-age"]) if directives.get("max-age", "").isdigit() else None
+    if "immutable" in directives:
+        return max_age if max_age is not None else IMMUTABLE_LIFETIME
+    if max_age is not None and max_age >= MIN_LIFETIME:
+        return max_age
+    if max_age is None and _is_fingerprinted(url):
+        return FINGERPRINTED_LIFETIME
+    return None
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """Записывает файл через временный файл и os.replace, чтобы параллельные процессы не видели половину файла."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class AssetCache:
+    """
+    Дисковый кэш статических ресурсов (JS, CSS, шрифты) на уровне route.
+
+    Тела ответов хранятся по sha256 содержимого (blobs/ab/abcdef...), поэтому одинаковый бандл,
+    загруженный по разным URL, хранится один раз. Для каждого URL хранится небольшой файл
+    meta/<sha256 url>.json со статусом, заголовками и ссылкой на тело. Файлы пишутся атомарно,
+    так что кэш можно делить между вкладками, контекстами, процессами и запусками.
+
+    Кэшируются только успешные GET-ответы неизменяемых ресурсов (cache_lifetime): вместе
+    с ответом хранится срок годности, просроченные записи не используются и перезаписываются.
+    Перехватываются только URL статических ресурсов (CACHEABLE_URL_PATTERN); из них запросы
+    не подходящего типа передаются дальше через route.fallback() — к обработчикам блокировки
+    и в сеть. Чтение и запись файлов выполняются в потоке (asyncio.to_thread), не блокируя цикл событий.
+
+    Args:
+        directory (str): Папка кэша.
+        resource_types (tuple[str, ...]): Типы ресурсов, которые кэшируются.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, resource_types: tuple[str, ...] = CACHEABLE_RESOURCE_TYPES):
+        self.directory = directory
+        self.resource_types = resource_types
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.expired = 0
+        self.uncacheable = 0
+        self.bytes_saved = 0
+
+    def _meta_path(self, url: str) -> str:
+        return os.path.join(self.directory, "meta", hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    def load(self, url: str) -> tuple[dict, bytes] | None:
+        """Возвращает (метаданные, тело) из кэша или None (нет записи или срок истёк)."""
+        try:
+            with open(self._meta_path(url), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["expires"] < time.time():
+                self.expired += 1
+                return None
+            with open(self._blob_path(meta["sha256"]), "rb") as f:
+                return meta, f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def store(self, url: str, status: int, headers: dict[str, str], body: bytes, lifetime: float) -> None:
+        """Сохраняет ответ на lifetime секунд: тело по хэшу содержимого и метаданные по URL."""
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            _atomic_write(blob_path, body)
+        meta = {
+            "url": url,
+            "status": status,
+            "headers": _filter_headers(headers),
+            "sha256": digest,
+            "expires": time.time() + lifetime,
+        }
+        _atomic_write(self._meta_path(url), json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        self.stored += 1
+
+    async def handle(self, route: Route, request: Request) -> None:
+        """Обработчик route: отдаёт ресурс из кэша или загружает и сохраняет его."""
+        if request.method != "GET" or request.resource_type not in self.resource_types:
+            await route.fallback()
+            return
+
+        cached = await asyncio.to_thread(self.load, request.url)
+        if cached:
+            meta, body = cached
+            self.hits += 1
+            self.bytes_saved += len(body)
+            await route.fulfill(status=meta["status"], headers=meta["headers"], body=body)
+            return
+
+        self.misses += 1
+        try:
+            response = await route.fetch()
+        except Exception as e:
+            print(f"Ошибка загрузки {request.url}: {e}")
+            await route.abort()
+            return
+
+        body = await response.body()
+        lifetime = cache_lifetime(request.url, response.headers) if response.status == 200 else None
+        if lifetime:
+            await asyncio.to_thread(self.store, request.url, response.status, response.headers, body, lifetime)
+        else:
+            self.uncacheable += 1
+        await route.fulfill(status=response.status, headers=_filter_headers(response.headers), body=body)
+
+    async def attach(self, context: BrowserContext) -> None:
+        """Подключает кэш ко всем вкладкам контекста (только для URL статических ресурсов)."""
+        await context.route(CACHEABLE_URL_PATTERN, self.handle)
+
+    def print_summary(self) -> None:
+        total = self.hits + self.misses
+        print(
+            f"Кэш ресурсов: попаданий {self.hits} из {total} "
+            f"({self.hits / total if total else 0:.0%}), сохранено {self.stored}, просрочено {self.expired}, "
+            f"не кэшируются {self.uncacheable}, "
+            f"не загружено из сети {self.bytes_saved / (1024 * 1024):.2f} МБ"
+        )
+
+
+async def setup_cache(context: BrowserContext, mode: str, har_path: str = "crawl.har.zip") -> AssetCache | None:
+    """
+    Подключает к контексту кэш в режиме mode.
+
+    Args:
+        context (BrowserContext): Контекст браузера (до открытия вкладок).
+        mode (str): "assets" — дисковый кэш статических ресурсов, "record" — запись всех ответов
+            в HAR (файл дописывается при закрытии контекста), "replay" — воспроизведение записанного
+            HAR без сети (запросы, которых нет в записи, отклоняются), "none" — без кэша.
+        har_path (str): Файл HAR для режимов record/replay (.zip — тела ответов хранятся отдельно).
+
+    Returns:
+        AssetCache | None: Кэш в режиме "assets", иначе None.
+    """
+    if mode == "assets":
+        cache = AssetCache()
+        await cache.attach(context)
+        return cache
+    if mode == "record":
+        await context.route_from_har(har_path, update=True, update_content="attach", update_mode="full")
+    elif mode == "replay":
+        if not os.path.exists(har_path):
+            raise FileNotFoundError(f"Нет записи для воспроизведения: {har_path}")
+        await context.route_from_har(har_path, not_found="abort")
+    elif mode != "none":
+        raise ValueError(f"Неизвестный режим кэша: {mode}")
+    return None
@@ -0,0 +1,327 @@
+import sys
+import time
+import asyncio
+import statistics
+from urllib.parse import urlsplit
+
+from playwright.async_api import async_playwright, Browser, Page, Route, Request, Response
+
+# Домены сторонней аналитики и рекламных трекеров (блокируются вместе с поддоменами)
+TRACKER_DOMAINS = [
+    "mc.yandex.ru", "mc.yandex.by", "an.yandex.ru", "yandex.ru/ads",
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googleadservices.com",
+    "top-fwz1.mail.ru", "ad.mail.ru", "vk.com/rtrg", "mytarget.ru",
+    "connect.facebook.net", "criteo.com", "criteo.net", "adriver.ru", "tiktok.com",
+]
+
+# Профили блокировки: какие типы ресурсов и какие домены отклоняются.
+# "default" — прежний набор route_handler, "lean" — плюс шрифты, "minimal" — плюс стили
+# (меню может отрисовываться иначе — проверяйте через benchmark_profiles).
+BLOCKING_PROFILES = {
+    "none": {"resource_types": [], "domains": []},
+    "default": {"resource_types": ["image", "media", "other"], "domains": []},
+    "trackers": {"resource_types": ["image", "media", "other"], "domains": TRACKER_DOMAINS},
+    "lean": {"resource_types": ["image", "media", "font", "other"], "domains": TRACKER_DOMAINS},
+    "minimal": {"resource_types": ["image", "media", "font", "stylesheet", "other"], "domains": TRACKER_DOMAINS},
+}
+
+# Расширения файлов по типам ресурсов для Network.setBlockedURLs.
+# Браузер отклоняет такие запросы сам, не передавая их в Python.
+# Тип "other" (beacon, ping и т.п.) по URL не определяется, поэтому в режиме cdp такие запросы не блокируются.
+RESOURCE_EXTENSIONS = {
+    "image": ["jpg", "jpeg", "png", "gif", "webp", "avif", "svg", "ico"],
+    "media": ["mp4", "webm", "m3u8", "mp3", "ogg"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "stylesheet": ["css"],
+}
+# Шаблоны ("*" — любая последовательность символов) привязаны к концу пути: расширение в конце URL
+# или перед строкой запроса, а не в любом месте URL (например, в параметрах)
+RESOURCE_URL_PATTERNS = {
+    resource_type: [pattern for ext in extensions for pattern in (f"*.{ext}", f"*.{ext}?*")]
+    for resource_type, extensions in RESOURCE_EXTENSIONS.items()
+}
+
+BLOCKING_MODES = ("none", "route", "cdp")
+
+# Селектор, по которому проверяется, что страница категории отрисовала нужное меню
+MENU_READY_SELECTOR = (
+    "ul.menu-burger__main-list, ul.menu-category__subcategory, ul.menu-category__list, "
+    "div.dropdown-filter, ul.filter-category__list"
+)
+
+
+def is_tracker(url: str, domains: list[str]) -> bool:
+    """Проверяет, относится ли url к одному из доменов (с поддоменами) или путей вида "домен/путь"."""
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    for domain in domains:
+        domain_host, _, path = domain.partition("/")
+        if host == domain_host or host.endswith("." + domain_host):
+            if not path or parts.path.lstrip("/").startswith(path):
+                return True
+    return False
+
+
+def domain_url_patterns(domain: str) -> list[str]:
+    """
+    Шаблоны URL домена (с поддоменами) или пути вида "домен/путь" для Network.setBlockedURLs.
+    Домен привязан к хосту, а не к любому месту URL (например, к параметру ?ref=домен);
+    полный URL трекера внутри параметра ("?back=https://домен/") шаблоном со "*" не отличить.
+    """
+    host, _, path = domain.partition("/")
+    return [f"*://{host}/{path}*", f"*://*.{host}/{path}*"]
+
+
+def profile_url_patterns(profile: str) -> list[str]:
+    """Шаблоны URL для Network.setBlockedURLs, соответствующие профилю."""
+    settings = BLOCKING_PROFILES[profile]
+    patterns = []
+    for resource_type in settings["resource_types"]:
+        patterns.extend(RESOURCE_URL_PATTERNS.get(resource_type, []))
+    for domain in settings["domains"]:
+        patterns.extend(domain_url_patterns(domain))
+    return patterns
+
+
+def make_route_handler(profile: str = "default"):
+    """
+    Создаёт обработчик page.route, блокирующий ресурсы профиля по типу и домену.
+    Каждый запрос проходит через Python.
+    """
+    settings = BLOCKING_PROFILES[profile]
+    resource_types = set(settings["resource_types"])
+    domains = settings["domains"]
+
+    async def _route_handler(route: Route, request: Request) -> None:
+        try:
+            if request.resource_type in resource_types or (domains and is_tracker(request.url, domains)):
+                await route.abort("blockedbyclient")
+            else:
+                # fallback, а не continue_: запрос ещё может обработать кэш ресурсов контекста
+                await route.fallback()
+        except Exception as e:
+            print(f"Error in route handler for {request.url}: {str(e)}")
+
+    return _route_handler
+
+
+# Блокировка "лишних" ресурсов по типу через page.route (прежний набор типов)
+route_handler = make_route_handler("default")
+
+
+async def block_urls_cdp(page: Page, patterns: list[str]) -> None:
+    """
+    Передаёт шаблоны блокируемых URL в браузер через CDP (Network.setBlockedURLs).
+
+    Шаблоны действуют на уровне сети браузера, поэтому запросы страницы больше не
+    останавливаются и не пересылаются в Python. Работает только в Chromium.
+    """
+    session = await page.context.new_cdp_session(page)
+    await session.send("Network.enable")
+    await session.send("Network.setBlockedURLs", {"urls": patterns})
+
+
+async def apply_blocking(page: Page, mode: str = "cdp", profile: str = "default") -> None:
+    """
+    Включает на вкладке блокировку ресурсов.
+
+    Args:
+        page (Page): Вкладка (до первой навигации).
+        mode (str): "cdp" — шаблоны URL внутри браузера, "route" — проверка типа ресурса
+            и домена в Python через page.route, "none" — без блокировки.
+        profile (str): Имя профиля из BLOCKING_PROFILES.
+    """
+    if profile not in BLOCKING_PROFILES:
+        raise ValueError(f"Неизвестный профиль блокировки: {profile}")
+
+    if mode == "cdp":
+        patterns = profile_url_patterns(profile)
+        if patterns:
+            await block_urls_cdp(page, patterns)
+    elif mode == "route":
+        if profile != "none":
+            await page.route("**/*", make_route_handler(profile))
+    elif mode != "none":
+        raise ValueError(f"Неизвестный режим блокировки: {mode}")
+
+
+class BandwidthMeter:
+    """
+    Учёт трафика и скорости загрузки страниц для одного профиля блокировки.
+
+    attach(page) подписывается на ответы и отклонённые запросы вкладки: считаются запросы,
+    заблокированные запросы и переданные байты. По умолчанию байты берутся из заголовка
+    content-length ответа (без обращений к браузеру; ответы без него не учитываются).
+    С exact_sizes=True для каждого завершённого запроса запрашивается request.sizes() —
+    точные размеры с заголовками, но ценой лишнего обмена с браузером на каждый запрос
+    (для сравнения профилей блокировки, а не для обхода).
+    Время готовности страниц передаётся через page_ready().
+    """
+
+    def __init__(self, profile: str, exact_sizes: bool = False):
+        self.profile = profile
+        self.exact_sizes = exact_sizes
+        self.requests = 0
+        self.blocked = 0
+        self.failed = 0
+        self.bytes = 0
+        self.unknown_sizes = 0
+        self.ready_times: list[float] = []
+        self.pages_ok = 0
+
+    def attach(self, page: Page) -> None:
+        if self.exact_sizes:
+            page.on("requestfinished", self._on_finished)
+        else:
+            page.on("response", self._on_response)
+        page.on("requestfailed", self._on_failed)
+
+    def _on_response(self, response: Response) -> None:
+        self.requests += 1
+        length = response.headers.get("content-length", "")
+        if length.isdigit():
+            self.bytes += int(length)
+        else:
+            self.unknown_sizes += 1
+
+    async def _on_finished(self, request: Request) -> None:
+        self.requests += 1
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        self.bytes += (sizes["requestHeadersSize"] + sizes["requestBodySize"]
+                       + sizes["responseHeadersSize"] + sizes["responseBodySize"])
+
+    def _on_failed(self, request: Request) -> None:
+        if "ERR_BLOCKED_BY_CLIENT" in (request.failure or ""):
+            self.blocked += 1
+        else:
+            self.failed += 1
+
+    def page_ready(self, seconds: float, ok: bool = True) -> None:
+        """Записывает время готовности страницы и удалось ли найти на ней нужные элементы."""
+        self.ready_times.append(seconds)
+        self.pages_ok += ok
+
+    def stats(self) -> dict:
+        pages = len(self.ready_times)
+        return {
+            "profile": self.profile,
+            "pages": pages,
+            "pages_ok": self.pages_ok,
+            "requests": self.requests,
+            "blocked": self.blocked,
+            "failed": self.failed,
+            "megabytes": self.bytes / (1024 * 1024),
+            "megabytes_per_page": self.bytes / (1024 * 1024) / pages if pages else 0.0,
+            "ready_median": statistics.median(self.ready_times) if self.ready_times else 0.0,
+        }
+
+    def print_summary(self) -> None:
+        stats = self.stats()
+        print(
+            f"Профиль {stats['profile']}: страниц {stats['pages']} (с меню {stats['pages_ok']}), "
+            f"запросов {stats['requests']}, заблокировано {stats['blocked']}, ошибок {stats['failed']}, "
+            f"трафик {stats['megabytes']:.2f} МБ ({stats['megabytes_per_page']:.2f} МБ/стр.), "
+            f"готовность страницы (медиана) {stats['ready_median']:.3f} сек."
+            + (f", ответов без content-length {self.unknown_sizes}" if self.unknown_sizes else "")
+        )
+
+
+async def measure_page_load(
+        browser: Browser,
+        url: str,
+        mode: str,
+        profile: str = "default",
+        meter: BandwidthMeter | None = None,
+        wait_until: str = "load",
+        ready_selector: str = MENU_READY_SELECTOR
+) -> tuple[float, bool]:
+    """
+    Загружает url в новом контексте (без кэша) с режимом блокировки mode и профилем profile.
+
+    Returns:
+        tuple[float, bool]: Время загрузки в секундах и найден ли на странице ready_selector.
+    """
+    context = await browser.new_context()
+    page = await context.new_page()
+    if meter:
+        meter.attach(page)
+    try:
+        await apply_blocking(page, mode, profile)
+        start_time = time.perf_counter()
+        await page.goto(url, wait_until=wait_until, timeout=120000)
+        elapsed = time.perf_counter() - start_time
+        ok = await page.locator(ready_selector).count() > 0
+        if meter:
+            meter.page_ready(elapsed, ok)
+        return elapsed, ok
+    finally:
+        await context.close()
+
+
+async def benchmark_profiles(
+        urls: list[str],
+        profiles: tuple[str, ...] = tuple(BLOCKING_PROFILES),
+        modes: tuple[str, ...] = ("cdp",),
+        repeat: int = 3
+) -> dict[str, dict]:
+    """
+    Сравнивает профили (и режимы) блокировки: трафик, количество запросов, время готовности
+    страницы и то, отрисовалось ли на ней нужное меню.
+
+    Режимы и профили чередуются внутри каждого повтора, чтобы изменения скорости сети
+    влияли на все варианты одинаково.
+
+    Args:
+        urls: Страницы для загрузки.
+        profiles: Сравниваемые профили из BLOCKING_PROFILES.
+        modes: Сравниваемые режимы блокировки.
+        repeat: Количество повторов для каждой страницы.
+
+    Returns:
+        dict[str, dict]: Статистика BandwidthMeter для каждого варианта "режим/профиль".
+    """
+    meters = {(mode, profile): BandwidthMeter(f"{mode}/{profile}", exact_sizes=True) for mode in modes for profile in profiles}
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            for url in urls:
+                for _ in range(repeat):
+                    for (mode, profile), meter in meters.items():
+                        await measure_page_load(browser, url, mode, profile, meter)
+        finally:
+            await browser.close()
+
+    for meter in meters.values():
+        meter.print_summary()
+
+    # Самый лёгкий по трафику вариант, при котором меню нашлось на всех страницах
+    complete = [meter.stats() for meter in meters.values() if meter.pages_ok == len(meter.ready_times)]
+    if complete:
+        best = min(complete, key=lambda stats: stats["megabytes_per_page"])
+        print(f"Самый экономный профиль без потери меню: {best['profile']}")
+    return {meter.profile: meter.stats() for meter in meters.values()}
+
+
+async def benchmark_blocking(
+        urls: list[str],
+        modes: tuple[str, ...] = BLOCKING_MODES,
+        repeat: int = 3
+) -> dict[str, dict]:
+    """
+    Сравнивает время загрузки страниц в разных режимах блокировки с профилем "default".
+    """
+    return await benchmark_profiles(urls, ("default",), modes, repeat)
+
+
+if __name__ == "__main__":
+    # python -m parser.blocking [url ...] — сравнить загрузку страниц без блокировки, через route и через CDP
+    # python -m parser.blocking --profiles [url ...] — сравнить профили блокировки по трафику и скорости
+    args = sys.argv[1:]
+    if args and args[0] == "--profiles":
+        asyncio.run(benchmark_profiles(args[1:] or ["https://www.wildberries.by"]))
+    else:
+        asyncio.run(benchmark_blocking(args or ["https://www.wildberries.by"]))
@@ -0,0 +1,344 @@
+import time
+import asyncio
+import statistics
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
+from playwright.async_api import Playwright, Browser, BrowserContext, Page
+
+from parser.memory import MemoryWatchdog, child_pids, browser_root_pids, measure_processes
+
+ContextFactory = Callable[[Browser], Awaitable[BrowserContext]]
+
+MEMORY_CHECK_INTERVAL = 5.0  # Память браузера при возврате контекста замеряется не чаще раза в столько секунд
+
+
+class PooledBrowser:
+    """
+    Браузер пула: сам Browser, pid его процессов (см. browser_root_pids) и контексты, созданные в нём.
+    """
+
+    def __init__(self, index: int, browser: Browser, pids: set[int]):
+        self.index = index
+        self.browser = browser
+        self.pids = pids
+        self.contexts: list["PooledContext"] = []
+        self.draining = False
+        self.memory_checked_at = 0.0
+        self.last_memory_mb: float | None = None  # Последний замер memory_mb (None — ещё не замерялась)
+
+    @property
+    def name(self) -> str:
+        return f"browser {self.index}"
+
+    def memory_mb(self) -> float:
+        """Суммарная память (RSS, МБ) процессов браузера, включая рендереры."""
+        browser_mb, renderers = measure_processes(self.pids)
+        return browser_mb + sum(renderers)
+
+
+class PooledContext:
+    """
+    Контекст пула. Считает навигации главного фрейма всех своих вкладок.
+    recycle — контекст помечен на пересоздание при следующем возврате в пул.
+    """
+
+    def __init__(self, owner: PooledBrowser, context: BrowserContext):
+        self.owner = owner
+        self.context = context
+        self.navigations = 0
+        self.recycle = False
+        context.on("page", self._watch_page)
+        for page in context.pages:
+            self._watch_page(page)
+
+    def _watch_page(self, page: Page) -> None:
+        page.on("framenavigated", lambda frame: self._on_navigation(page, frame))
+
+    def _on_navigation(self, page: Page, frame) -> None:
+        if frame is page.main_frame:
+            self.navigations += 1
+
+
+class BrowserPool:
+    """
+    Пул прогретых браузеров Playwright: browsers браузеров × contexts_per_browser контекстов.
+
+    Контекст берётся через checkout() и возвращается через checkin() (или через
+    async with pool.context() as context). Свободные контексты выдаются в порядке очереди.
+    При возврате контекст пересоздаётся, если через него прошло max_navigations навигаций,
+    а браузер перезапускается, когда память его процессов превышает max_memory_mb
+    (браузер перестаёт выдавать контексты и закрывается, когда все они возвращены).
+    Память замеряется в потоке (psutil не блокирует цикл событий) и не чаще раза
+    в MEMORY_CHECK_INTERVAL секунд для каждого браузера.
+
+    С watchdog пул регистрирует в нём каждый запущенный браузер: при превышении порога памяти
+    браузера он перезапускается так же, как по max_memory_mb, а при превышении порога памяти
+    рендерера пересоздаются контексты этого браузера — свободные сразу, занятые при возврате.
+
+    Использование:
+        async with BrowserPool(p, browsers=2, contexts_per_browser=3) as pool:
+            async with pool.context() as context:
+                page = await context.new_page()
+
+    Args:
+        playwright (Playwright): Запущенный экземпляр Playwright.
+        browsers (int): Количество браузеров.
+        contexts_per_browser (int): Количество контекстов в каждом браузере.
+        max_navigations (int): Навигаций, после которых контекст пересоздаётся (0 — без ограничения).
+        max_memory_mb (float): Порог памяти браузера в МБ для перезапуска (0 — без ограничения).
+        launch_options (dict | None): Параметры chromium.launch.
+        context_factory (ContextFactory | None): Создаёт контекст в браузере (по умолчанию browser.new_context()).
+        watchdog (MemoryWatchdog | None): Фоновый контроль памяти браузеров и рендереров.
+    """
+
+    def __init__(
+            self,
+            playwright: Playwright,
+            browsers: int = 2,
+            contexts_per_browser: int = 2,
+            max_navigations: int = 200,
+            max_memory_mb: float = 1500,
+            launch_options: dict | None = None,
+            context_factory: ContextFactory | None = None,
+            watchdog: MemoryWatchdog | None = None
+    ):
+        self.playwright = playwright
+        self.browsers_count = browsers
+        self.contexts_per_browser = contexts_per_browser
+        self.max_navigations = max_navigations
+        self.max_memory_mb = max_memory_mb
+        self.launch_options = launch_options or {"headless": True}
+        self.context_factory = context_factory
+        self.watchdog = watchdog
+        self.browsers: list[PooledBrowser] = []
+        self.free: asyncio.Queue[PooledContext] = asyncio.Queue()
+        self._launch_lock = asyncio.Lock()
+        self._busy_since: dict[PooledContext, float] = {}
+        self._started_at = 0.0
+        self._closed = False
+
+        # Статистика
+        self.wait_times: list[float] = []
+        self.busy_time = 0.0
+        self.checkouts = 0
+        self.contexts_recycled = 0
+        self.browsers_recycled = 0
+        self.memory_samples: list[tuple[float, int, float]] = []  # (время, индекс браузера, МБ)
+
+    async def __aenter__(self) -> "BrowserPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    @property
+    def size(self) -> int:
+        """Общее количество контекстов пула."""
+        return self.browsers_count * self.contexts_per_browser
+
+    async def start(self) -> None:
+        """Запускает все браузеры и создаёт в них контексты."""
+        self._started_at = time.perf_counter()
+        for index in range(self.browsers_count):
+            await self._add_browser(index)
+
+    async def _launch(self, index: int) -> PooledBrowser:
+        # Запуски идут по одному, иначе разница дочерних процессов смешает pid разных браузеров
+        async with self._launch_lock:
+            before = child_pids()
+            browser = await self.playwright.chromium.launch(**self.launch_options)
+            roots = browser_root_pids(before)
+        return PooledBrowser(index, browser, roots)
+
+    async def _new_context(self, owner: PooledBrowser) -> PooledContext:
+        if self.context_factory:
+            context = await self.context_factory(owner.browser)
+        else:
+            context = await owner.browser.new_context()
+        pooled = PooledContext(owner, context)
+        owner.contexts.append(pooled)
+        return pooled
+
+    async def _add_browser(self, index: int) -> None:
+        owner = await self._launch(index)
+        self.browsers.append(owner)
+        for _ in range(self.contexts_per_browser):
+            self.free.put_nowait(await self._new_context(owner))
+        if self.watchdog:
+            self.watchdog.watch(owner.name, owner.pids, self._on_browser_limit, self._on_renderer_limit)
+
+    async def checkout(self) -> PooledContext:
+        """Берёт свободный контекст. Ждёт, если все контексты заняты."""
+        start_time = time.perf_counter()
+        pooled = await self.free.get()
+        while pooled.owner.draining:
+            # Браузер помечен на перезапуск — его свободные контексты больше не выдаются
+            await self._retire_context(pooled)
+            if not pooled.owner.contexts:
+                await self._replace_browser(pooled.owner)
+            pooled = await self.free.get()
+        now = time.perf_counter()
+        self.wait_times.append(now - start_time)
+        self._busy_since[pooled] = now
+        self.checkouts += 1
+        return pooled
+
+    async def checkin(self, pooled: PooledContext) -> None:
+        """Возвращает контекст в пул, при необходимости пересоздаёт его или перезапускает браузер."""
+        busy_since = self._busy_since.pop(pooled, None)
+        if busy_since is not None:
+            self.busy_time += time.perf_counter() - busy_since
+
+        owner = pooled.owner
+        if self._closed:
+            return
+
+        now = time.perf_counter()
+        if not owner.draining and self.max_memory_mb and now - owner.memory_checked_at >= MEMORY_CHECK_INTERVAL:
+            owner.memory_checked_at = now
+            memory = await asyncio.to_thread(owner.memory_mb)
+            owner.last_memory_mb = memory
+            self.memory_samples.append((time.perf_counter() - self._started_at, owner.index, memory))
+            if memory > self.max_memory_mb:
+                print(f"Браузер {owner.index}: {memory:.0f} МБ > {self.max_memory_mb:.0f} МБ, перезапуск")
+                owner.draining = True
+
+        if owner.draining:
+            await self._retire_context(pooled)
+            await self._retire_free_contexts(owner)
+            if not owner.contexts:
+                await self._replace_browser(owner)
+            return
+
+        if pooled.recycle or (self.max_navigations and pooled.navigations >= self.max_navigations):
+            pooled = await self._recycle_context(pooled)
+
+        self.free.put_nowait(pooled)
+
+    async def _recycle_context(self, pooled: PooledContext) -> PooledContext:
+        await self._retire_context(pooled)
+        self.contexts_recycled += 1
+        return await self._new_context(pooled.owner)
+
+    async def _retire_context(self, pooled: PooledContext) -> None:
+        pooled.owner.contexts.remove(pooled)
+        try:
+            await pooled.context.close()
+        except Exception as e:
+            print(f"Ошибка закрытия контекста: {e}")
+
+    async def _retire_free_contexts(self, owner: PooledBrowser) -> None:
+        # Свободные контексты браузера ещё могут лежать в очереди — забираем их
+        kept = []
+        while not self.free.empty():
+            pooled = self.free.get_nowait()
+            if pooled.owner is owner:
+                await self._retire_context(pooled)
+            else:
+                kept.append(pooled)
+        for pooled in kept:
+            self.free.put_nowait(pooled)
+
+    async def _replace_browser(self, owner: PooledBrowser) -> None:
+        self.browsers.remove(owner)
+        if self.watchdog:
+            self.watchdog.unwatch(owner.name)
+        try:
+            await owner.browser.close()
+        except Exception as e:
+            print(f"Ошибка закрытия браузера: {e}")
+        self.browsers_recycled += 1
+        await self._add_browser(owner.index)
+
+    @asynccontextmanager
+    async def context(self):
+        """Берёт контекст на время блока async with и возвращает его в пул."""
+        pooled = await self.checkout()
+        try:
+            yield pooled.context
+        finally:
+            await self.checkin(pooled)
+
+    def recycle_browser(self, browser: Browser) -> None:
+        """
+        Помечает браузер на перезапуск: он перестанет выдавать контексты
+        и будет перезапущен, когда вернут его последний контекст.
+        """
+        for owner in self.browsers:
+            if owner.browser is browser:
+                owner.draining = True
+
+    def _find(self, name: str) -> PooledBrowser | None:
+        return next((owner for owner in self.browsers if owner.name == name), None)
+
+    async def _on_browser_limit(self, name: str) -> None:
+        owner = self._find(name)
+        if owner is None or owner.draining:
+            return
+        owner.draining = True
+        await self._retire_free_contexts(owner)
+        if not owner.contexts:
+            await self._replace_browser(owner)
+
+    async def _on_renderer_limit(self, name: str) -> None:
+        owner = self._find(name)
+        if owner is None or owner.draining:
+            return
+        for pooled in owner.contexts:
+            pooled.recycle = True
+        # Свободные контексты пересоздаются сразу, занятые — в checkin
+        kept = []
+        while not self.free.empty():
+            pooled = self.free.get_nowait()
+            if pooled.owner is owner:
+                pooled = await self._recycle_context(pooled)
+            kept.append(pooled)
+        for pooled in kept:
+            self.free.put_nowait(pooled)
+
+    async def close(self) -> None:
+        """Закрывает все контексты и браузеры пула."""
+        self._closed = True
+        for owner in self.browsers:
+            for pooled in owner.contexts:
+                try:
+                    await pooled.context.close()
+                except Exception:
+                    pass
+            try:
+                await owner.browser.close()
+            except Exception:
+                pass
+        self.browsers = []
+
+    def stats(self) -> dict:
+        """
+        Статистика пула: ожидание контекста, загрузка, пересоздания и память браузеров.
+        Память не замеряется заново, а берётся из последнего замера в checkin.
+        """
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0
+        busy_time = self.busy_time + sum(time.perf_counter() - since for since in self._busy_since.values())
+        return {
+            "checkouts": self.checkouts,
+            "wait_mean": statistics.mean(self.wait_times) if self.wait_times else 0.0,
+            "wait_max": max(self.wait_times) if self.wait_times else 0.0,
+            "utilisation": busy_time / (elapsed * self.size) if elapsed and self.size else 0.0,
+            "contexts_recycled": self.contexts_recycled,
+            "browsers_recycled": self.browsers_recycled,
+            "memory_mb": {owner.index: owner.last_memory_mb for owner in self.browsers},
+        }
+
+    def print_summary(self) -> None:
+        """Выводит статистику пула."""
+        stats = self.stats()
+        print(
+            f"Пул браузеров {self.browsers_count}×{self.contexts_per_browser}: выдач {stats['checkouts']}, "
+            f"ожидание контекста среднее {stats['wait_mean']:.3f} сек., максимум {stats['wait_max']:.3f} сек., "
+            f"загрузка {stats['utilisation']:.0%}"
+        )
+        print(f"Пересоздано контекстов: {stats['contexts_recycled']}, "
+              f"перезапущено браузеров: {stats['browsers_recycled']}")
+        for index, memory in stats["memory_mb"].items():
+            print(f"Браузер {index}: {memory:.0f} МБ" if memory is not None else f"Браузер {index}: память не замерялась")
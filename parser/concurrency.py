@@ -0,0 +1,167 @@
+import csv
+import time
+import asyncio
+import statistics
+from collections import deque
+from contextlib import asynccontextmanager
+
+from playwright.async_api import Response, TimeoutError as PlaywrightTimeoutError
+
+# HTTP-статусы, которыми сайт сообщает о слишком частых запросах
+THROTTLE_STATUSES = (403, 429)
+
+
+class ThrottledError(Exception):
+    """Сайт ответил статусом из THROTTLE_STATUSES."""
+
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status}: {url}")
+        self.status = status
+        self.url = url
+
+
+def raise_for_throttling(response: Response | None) -> None:
+    """Выбрасывает ThrottledError, если ответ навигации — 403 или 429."""
+    if response is not None and response.status in THROTTLE_STATUSES:
+        raise ThrottledError(response.status, response.url)
+
+
+def is_backoff_error(error: BaseException | None) -> bool:
+    """Ошибки, при которых нужно снижать параллельность: таймауты и ответы 403/429."""
+    return isinstance(error, (ThrottledError, PlaywrightTimeoutError, asyncio.TimeoutError))
+
+
+class AdaptiveLimiter:
+    """
+    Ограничитель одновременных навигаций с подбором лимита по схеме AIMD.
+
+    Лимит растёт на 1 (additive increase) после каждых limit успешных навигаций подряд,
+    если медиана последних задержек не выше latency_target, а доля ошибок — не выше max_error_rate.
+    При таймауте или ответе 403/429 лимит умножается на decrease_factor (multiplicative decrease),
+    но не чаще раза в cooldown секунд — одновременный сбой нескольких навигаций считается одним.
+    Каждое изменение лимита записывается в history для выгрузки временного ряда.
+
+    Использование:
+        limiter = AdaptiveLimiter(initial=2, maximum=10)
+        async with limiter.slot():
+            raise_for_throttling(await page.goto(url))
+
+    Args:
+        initial (int): Начальный лимит.
+        minimum (int): Минимальный лимит.
+        maximum (int): Максимальный лимит.
+        latency_target (float): Допустимая медиана задержки навигации (сек.).
+        max_error_rate (float): Допустимая доля ошибок среди последних window навигаций.
+        decrease_factor (float): Во сколько раз уменьшается лимит при перегрузке.
+        cooldown (float): Минимальный интервал (сек.) между уменьшениями лимита.
+        window (int): Количество последних навигаций для оценки задержки и ошибок.
+    """
+
+    def __init__(
+            self,
+            initial: int = 2,
+            minimum: int = 1,
+            maximum: int = 10,
+            latency_target: float = 10.0,
+            max_error_rate: float = 0.2,
+            decrease_factor: float = 0.5,
+            cooldown: float = 5.0,
+            window: int = 20
+    ):
+        self.limit = max(minimum, min(initial, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.max_error_rate = max_error_rate
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)  # True — ошибка
+        self.history: list[tuple[float, int, int, str]] = []  # (время, лимит, в работе, событие)
+        self._condition = asyncio.Condition()
+        self._successes = 0
+        self._started_at = time.perf_counter()
+        self._last_decrease = float("-inf")
+        self._record("start")
+
+    def _record(self, event: str) -> None:
+        self.history.append((time.perf_counter() - self._started_at, self.limit, self.in_flight, event))
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self, latency: float, error: BaseException | None = None) -> None:
+        """Освобождает место и корректирует лимит по результату навигации."""
+        async with self._condition:
+            self.in_flight -= 1
+            if isinstance(error, asyncio.CancelledError):
+                pass
+            elif error is None:
+                self.outcomes.append(False)
+                self.latencies.append(latency)
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self._successes = 0
+                    self._maybe_increase()
+            else:
+                self.outcomes.append(True)
+                self._successes = 0
+                if is_backoff_error(error):
+                    self._decrease(type(error).__name__)
+                elif self.error_rate > self.max_error_rate:
+                    self._decrease("error_rate")
+            self._condition.notify_all()
+
+    def _maybe_increase(self) -> None:
+        if self.limit >= self.maximum or self.error_rate > self.max_error_rate:
+            return
+        if self.latencies and statistics.median(self.latencies) > self.latency_target:
+            return
+        self.limit += 1
+        self._record("increase")
+
+    def _decrease(self, reason: str) -> None:
+        now = time.perf_counter()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        new_limit = max(self.minimum, int(self.limit * self.decrease_factor))
+        if new_limit != self.limit:
+            self.limit = new_limit
+            self._record(f"decrease:{reason}")
+
+    @asynccontextmanager
+    async def slot(self):
+        """Занимает место на время блока и передаёт лимитеру время и исход навигации."""
+        await self.acquire()
+        start_time = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            await self.release(time.perf_counter() - start_time, e)
+            raise
+        await self.release(time.perf_counter() - start_time)
+
+    def export_csv(self, path: str) -> None:
+        """Сохраняет историю лимита: время (сек.), лимит, навигаций в работе, событие."""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["seconds", "limit", "in_flight", "event"])
+            writer.writerows((f"{seconds:.3f}", limit, in_flight, event)
+                             for seconds, limit, in_flight, event in self.history)
+
+    def print_summary(self) -> None:
+        limits = [limit for _, limit, _, _ in self.history]
+        decreases = sum(event.startswith("decrease") for *_, event in self.history)
+        print(
+            f"Параллельность: итоговый лимит {self.limit}, диапазон {min(limits)}–{max(limits)}, "
+            f"увеличений {sum(event == 'increase' for *_, event in self.history)}, уменьшений {decreases}, "
+            f"доля ошибок {self.error_rate:.0%}"
+        )
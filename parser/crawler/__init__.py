@@ -0,0 +1,10 @@
+"""
+Обход дерева категорий Wildberries: очередь узлов, обработчики типов страниц и единый цикл воркеров.
+Скрипты в scripts_async/ и scripts/parser_script_playwright_megatop.py — точки входа с разными настройками.
+"""
+from parser.crawler.engine import CategoryCrawler
+from parser.crawler.export import process_categories_to_excel
+from parser.crawler.frontier import Frontier
+from parser.crawler.handlers import HANDLERS, PageHandler
+
+__all__ = ["CategoryCrawler", "Frontier", "HANDLERS", "PageHandler", "process_categories_to_excel"]
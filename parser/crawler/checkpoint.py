@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import sqlite3
+
+CHECKPOINT_PATH = "crawl_checkpoint.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    parent_id INTEGER REFERENCES nodes (id),
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,  -- queued, done, failed, link
+    data TEXT NOT NULL     -- узел без subcategories (JSON)
+);
+CREATE INDEX IF NOT EXISTS nodes_parent ON nodes (parent_id, position);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def _node_data(node: dict) -> str:
+    return json.dumps({key: value for key, value in node.items() if key != 'subcategories'}, ensure_ascii=False)
+
+
+def _status(node: dict, done: bool) -> str:
+    if 'link' in node:
+        return 'link'
+    if not done:
+        return 'queued'
+    return 'failed' if node.get('Категория') == 'Ошибка загрузки' else 'done'
+
+
+class CheckpointStore:
+    """
+    Контрольные точки обхода в SQLite: очередь, посещённые URL и обработанные узлы.
+
+    Каждый узел дерева — строка nodes (родитель, позиция среди братьев, статус, данные узла).
+    Очередь — узлы со статусом queued, посещённые URL — все узлы, кроме ссылок.
+    Завершение узла и добавление его дочерних узлов записываются одним вызовом complete(),
+    а фиксация транзакции происходит только между такими вызовами (раз в commit_interval
+    секунд), поэтому файл всегда содержит согласованное состояние: после сбоя теряются
+    только последние секунды работы, а узлы, которые обрабатывались в момент сбоя,
+    остаются в очереди.
+
+    Args:
+        path (str): Файл базы SQLite.
+        commit_interval (float): Минимальный интервал (сек.) между фиксациями.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_PATH, commit_interval: float = 2.0):
+        self.path = path
+        self.commit_interval = commit_interval
+        self.connection: sqlite3.Connection | None = None
+        self._ids: dict[int, int] = {}  # id(узел) → nodes.id
+        self._last_commit = time.perf_counter()
+        self.writes = 0
+        self.commits = 0
+        self.time_spent = 0.0
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def open(self, fresh: bool) -> None:
+        """Открывает базу; при fresh=True удаляет прежние контрольные точки."""
+        if fresh and self.exists():
+            os.remove(self.path)
+        self.connection = sqlite3.connect(self.path)
+        self._ids = {}
+        # WAL и synchronous=NORMAL: фиксация без fsync на каждую транзакцию, файл остаётся согласованным
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        if self.connection:
+            start_time = time.perf_counter()
+            self.commit()
+            self.time_spent += time.perf_counter() - start_time
+            self.connection.close()
+            self.connection = None
+
+    def _insert(self, node: dict, parent_id: int | None, position: int) -> None:
+        cursor = self.connection.execute(
+            "INSERT INTO nodes (parent_id, position, url, status, data) VALUES (?, ?, ?, ?, ?)",
+            (parent_id, position, node['url'], _status(node, False), _node_data(node))
+        )
+        self._ids[id(node)] = cursor.lastrowid
+        self.writes += 1
+
+    def _maybe_commit(self) -> None:
+        if time.perf_counter() - self._last_commit >= self.commit_interval:
+            self.commit()
+
+    def commit(self) -> None:
+        # Время фиксации учитывают вызывающие методы (add_roots, complete, close) вместе со своей записью
+        self.connection.commit()
+        self._last_commit = time.perf_counter()
+        self.commits += 1
+
+    def add_roots(self, roots: list[dict]) -> None:
+        """Записывает основные категории нового обхода."""
+        start_time = time.perf_counter()
+        for position, root in enumerate(roots):
+            self._insert(root, None, position)
+        self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('started_at', ?)", (str(time.time()),))
+        self.commit()
+        self.time_spent += time.perf_counter() - start_time
+
+    def save_previous_tree(self, roots: list[dict]) -> None:
+        """Сохраняет дерево предыдущего обхода (кэш обновления), чтобы обновление можно было продолжить."""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('previous_tree', ?)", (json.dumps(roots, ensure_ascii=False),)
+        )
+        self.commit()
+
+    def load_previous_tree(self) -> list[dict] | None:
+        """Дерево предыдущего обхода, сохранённое save_previous_tree, или None."""
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'previous_tree'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def complete(self, node: dict, children: list[dict]) -> None:
+        """Отмечает узел обработанным и добавляет его дочерние узлы (в очередь или как ссылки)."""
+        start_time = time.perf_counter()
+        self.connection.execute(
+            "UPDATE nodes SET status = ?, data = ? WHERE id = ?",
+            (_status(node, True), _node_data(node), self._ids[id(node)])
+        )
+        self.writes += 1
+        parent_id = self._ids[id(node)]
+        for position, child in enumerate(children):
+            self._insert(child, parent_id, position)
+        self._maybe_commit()
+        self.time_spent += time.perf_counter() - start_time
+
+    def load(self) -> tuple[list[dict], list[dict], dict[str, dict], list[tuple[dict, dict]]]:
+        """
+        Восстанавливает дерево из контрольной точки.
+
+        Узлы, которые не удалось обработать (failed), снова ставятся в очередь.
+
+        Returns:
+            tuple: Основные категории (дерево собрано), узлы для очереди,
+                посещённые URL (canonical_url → узел) и ссылки (узел-ссылка, обходимый узел).
+        """
+        rows = self.connection.execute(
+            "SELECT id, parent_id, url, status, data FROM nodes ORDER BY parent_id IS NOT NULL, parent_id, position"
+        ).fetchall()
+
+        nodes: dict[int, dict] = {}
+        roots, queued, link_nodes = [], [], []
+        visited: dict[str, dict] = {}
+        for row_id, parent_id, url, status, data in rows:
+            node = json.loads(data)
+            node['subcategories'] = []
+            nodes[row_id] = node
+            self._ids[id(node)] = row_id
+            if parent_id is None:
+                roots.append(node)
+            else:
+                nodes[parent_id]['subcategories'].append(node)
+
+            if status == 'link':
+                link_nodes.append(node)
+                continue
+            visited[url] = node
+            if status == 'failed':
+                del node['Категория']
+                queued.append(node)
+            elif status == 'queued':
+                queued.append(node)
+
+        links = [(node, visited[node['url']]) for node in link_nodes if node['url'] in visited]
+        return roots, queued, visited, links
+
+    def print_summary(self, crawl_time: float) -> None:
+        share = self.time_spent / crawl_time if crawl_time else 0.0
+        print(
+            f"Контрольные точки ({self.path}): записей {self.writes}, фиксаций {self.commits}, "
+            f"время {self.time_spent:.2f} сек. ({share:.1%} времени обхода)"
+        )
@@ -0,0 +1,421 @@
+import os
+import time
+import asyncio
+
+from playwright.async_api import async_playwright, BrowserContext, Page
+
+from parser.asset_cache import AssetCache, setup_cache
+from parser.blocking import BandwidthMeter, apply_blocking
+from parser.concurrency import AdaptiveLimiter
+from parser.crawler.checkpoint import CheckpointStore
+from parser.crawler.frontier import Frontier
+from parser.crawler.refresh import REFRESH_DEPTH, REFRESH_TTL, TreeCache
+from parser.crawler.handlers import HANDLERS, PageHandler, handle_no_categories, load_main_categories
+from parser.crawler.session import create_browser_session, create_context
+from parser.crawler.urls import TARGET_URL
+from parser.memory import MemoryWatchdog, default_log_path
+from parser.page_pool import PagePool
+from parser.readiness import ReadinessStats, navigate
+from parser.retry import FatalError, RetryEngine
+from parser.sharding import run_sharded
+
+EXCLUDED_CATEGORIES = ['бренды', 'wibes', 'экспресс', 'акции', 'грузовая доставка']
+CONCURRENCY_LOG = "concurrency.csv"  # Временной ряд выбранного лимита параллельности
+DEAD_LETTERS_PATH = "dead_letters.json"  # Категории, которые не удалось обработать после всех повторов
+
+
+def process_log_path(path: str, processes: int) -> str:
+    """Имя файла статистики процесса: при обходе в нескольких процессах к имени добавляется pid."""
+    if processes <= 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_{os.getpid()}{ext}"
+
+
+class CategoryCrawler:
+    """
+    Обход дерева категорий Wildberries через явную очередь узлов (Frontier).
+
+    Воркеры берут узел из очереди, загружают его страницу на вкладке из PagePool,
+    определяют тип страницы по признакам готовности (parser.readiness) и передают её
+    обработчику из handlers. Дочерние узлы, которые вернул обработчик, записываются
+    в node['subcategories'] и ставятся в очередь — рекурсии нет, вкладка занята только
+    на время разбора одной страницы. Категория, уже встреченная у другого родителя,
+    не загружается повторно (Frontier сравнивает канонические URL). Число одновременных
+    навигаций подбирает AdaptiveLimiter, повторы и отказ от сломанных URL выполняет
+    RetryEngine, память браузера контролирует MemoryWatchdog.
+
+    Если задан checkpoint_path, состояние обхода по ходу работы сохраняется в CheckpointStore
+    (SQLite); с resume=True обход продолжается с последней контрольной точки, а не с главной
+    страницы. С refresh=True дерево предыдущего обхода из того же файла служит кэшем (TreeCache):
+    загружаются верхние уровни и узлы, у которых изменился набор подкатегорий или истёк срок,
+    остальное берётся из кэша.
+
+    Использование:
+        crawler = CategoryCrawler(workers=10)
+        tree = asyncio.run(crawler.run())
+        asyncio.run(process_categories_to_excel(tree))
+
+    Args:
+        workers (int): Количество воркеров и вкладок в пуле (в каждом процессе).
+        initial_concurrency (int): Одновременных навигаций на старте (дальше подбирается до workers).
+        processes (int): Количество процессов; при > 1 основные категории делятся между процессами.
+        main_categories_limit (int): Обойти только столько первых основных категорий (0 — все).
+        navigation_mode (str): "ready" — domcontentloaded + признак готовности, "networkidle" — затишье сети.
+        navigation_timeout (float): Таймаут навигации и ожидания готовности (мс).
+        page_task_timeout (float): Время (сек.) обработки страницы, после которого вкладка считается зависшей.
+        blocking_mode (str): Режим блокировки ресурсов из parser.blocking.BLOCKING_MODES.
+        blocking_profile (str): Профиль блокировки из parser.blocking.BLOCKING_PROFILES.
+        cache_mode (str): Режим кэша из parser.asset_cache.CACHE_MODES (record/replay — только при processes = 1).
+        har_path (str): Файл HAR для режимов record/replay.
+        memory_interval (float): Период замеров памяти (сек.).
+        max_renderer_mb (float): Порог памяти рендерера для пересоздания вкладок (0 — без ограничения).
+        max_browser_mb (float): Порог памяти браузера для переноса обхода в новый контекст (0 — без ограничения).
+        headless (bool): Запускать браузер без окна.
+        handlers (dict[str, PageHandler] | None): Обработчики типов страниц поверх HANDLERS.
+        checkpoint_path (str | None): Файл контрольных точек (по умолчанию None — без них; только при processes = 1).
+            Обход без resume удаляет прежний файл, поэтому у каждой точки входа должен быть свой.
+        resume (bool): Продолжить обход из checkpoint_path, если файл есть.
+        refresh (bool): Обновить дерево предыдущего обхода из checkpoint_path, а не обходить заново.
+        refresh_ttl (float): Срок (сек.), после которого узел при обновлении загружается заново.
+        refresh_depth (int): Уровни, которые при обновлении загружаются всегда.
+    """
+
+    def __init__(
+            self,
+            workers: int = 10,
+            initial_concurrency: int = 2,
+            processes: int = 1,
+            main_categories_limit: int = 0,
+            navigation_mode: str = "ready",
+            navigation_timeout: float = 30000,
+            page_task_timeout: float = 300,
+            blocking_mode: str = "cdp",
+            blocking_profile: str = "default",
+            cache_mode: str = "assets",
+            har_path: str = "categories.har.zip",
+            memory_interval: float = 15,
+            max_renderer_mb: float = 700,
+            max_browser_mb: float = 2500,
+            headless: bool = True,
+            handlers: dict[str, PageHandler] | None = None,
+            checkpoint_path: str | None = None,
+            resume: bool = False,
+            refresh: bool = False,
+            refresh_ttl: float = REFRESH_TTL,
+            refresh_depth: int = REFRESH_DEPTH
+    ):
+        self.workers = workers
+        self.initial_concurrency = initial_concurrency
+        self.processes = processes
+        self.main_categories_limit = main_categories_limit
+        self.navigation_mode = navigation_mode
+        self.navigation_timeout = navigation_timeout
+        self.page_task_timeout = page_task_timeout
+        self.blocking_mode = blocking_mode
+        self.blocking_profile = blocking_profile
+        self.cache_mode = cache_mode
+        self.har_path = har_path
+        self.memory_interval = memory_interval
+        self.max_renderer_mb = max_renderer_mb
+        self.max_browser_mb = max_browser_mb
+        self.headless = headless
+        self.handlers = {**HANDLERS, **(handlers or {})}
+        self.checkpoint_path = checkpoint_path
+        self.resume = resume
+        self.refresh = refresh
+        self.refresh_ttl = refresh_ttl
+        self.refresh_depth = refresh_depth
+
+        # Состояние одного обхода (создаётся в crawl, объект до обхода можно передать в другой процесс)
+        self.frontier: Frontier | None = None
+        self.page_pool: PagePool | None = None
+        self.limiter: AdaptiveLimiter | None = None
+        self.retry: RetryEngine | None = None
+        self.readiness: ReadinessStats | None = None
+        self.bandwidth: BandwidthMeter | None = None
+        self.checkpoint: CheckpointStore | None = None
+        self.tree_cache: TreeCache | None = None
+
+    async def run(self) -> list[dict]:
+        """Загружает основные категории и обходит их деревья (в одном или нескольких процессах)."""
+        if self.processes > 1:
+            if self.checkpoint_path:
+                print("Контрольные точки при обходе в нескольких процессах не сохраняются (resume и refresh не действуют)")
+            return await self._run_sharded()
+
+        resume = False
+        if self.checkpoint_path:
+            self.checkpoint = CheckpointStore(self.checkpoint_path)
+            resume = self.resume and self.checkpoint.exists()
+            if self.resume and not resume:
+                print(f"Нет контрольной точки {self.checkpoint_path}, обход начинается заново")
+            previous_tree = self._load_previous_tree() if self.refresh and not resume else None
+            self.checkpoint.open(fresh=not resume)
+            if self.refresh and resume:
+                # Продолжение обновления: кэш — дерево, сохранённое в контрольной точке при старте
+                previous_tree = self.checkpoint.load_previous_tree()
+                if previous_tree is None:
+                    print("В контрольной точке нет дерева предыдущего обхода, обход продолжается без кэша")
+            elif previous_tree is not None:
+                self.checkpoint.save_previous_tree(previous_tree)
+            if previous_tree is not None:
+                self.tree_cache = TreeCache(previous_tree, ttl=self.refresh_ttl, refresh_depth=self.refresh_depth)
+        elif self.refresh:
+            print("Обновление без checkpoint_path невозможно: дерево предыдущего обхода не сохраняется")
+
+        async with async_playwright() as p:
+            browser, context, browser_pids = await create_browser_session(p, self.headless)
+            cache = await setup_cache(context, self.cache_mode, self.har_path)
+            try:
+                if resume:
+                    roots, queued, visited, links = self.checkpoint.load()
+                    print(f"Продолжение обхода: в очереди {len(queued)}, уже посещено {len(visited)}")
+                    return await self.crawl(context, roots, browser_pids, cache, (queued, visited, links))
+                roots = await self.load_roots(context)
+                return await self.crawl(context, roots, browser_pids, cache)
+            finally:
+                if self.checkpoint:
+                    self.checkpoint.close()
+                if cache:
+                    cache.print_summary()
+                await context.close()
+                await browser.close()
+
+    def _load_previous_tree(self) -> list[dict] | None:
+        """Дерево предыдущего обхода из контрольной точки (до того, как она будет перезаписана)."""
+        previous = CheckpointStore(self.checkpoint_path)
+        if not previous.exists():
+            print(f"Нет дерева предыдущего обхода ({self.checkpoint_path}), обход выполняется полностью")
+            return None
+        previous.open(fresh=False)
+        try:
+            return previous.load()[0]
+        finally:
+            previous.close()
+
+    async def _run_sharded(self) -> list[dict]:
+        async with async_playwright() as p:
+            browser, context, _ = await create_browser_session(p, self.headless)
+            try:
+                roots = await self.load_roots(context)
+            finally:
+                await context.close()
+                await browser.close()
+
+        results = await asyncio.to_thread(run_sharded, self.crawl_shard, roots, self.processes)
+        # Часть, упавшая целиком, возвращает None — такие категории остаются без подкатегорий
+        return [result or root for result, root in zip(results, roots)]
+
+    async def crawl_shard(self, roots: list[dict]) -> list[dict]:
+        """Обходит часть основных категорий в отдельном процессе: свой браузер и цикл событий."""
+        async with async_playwright() as p:
+            browser, context, browser_pids = await create_browser_session(p, self.headless)
+            # Процессы делят только дисковый кэш ресурсов: HAR-файл пишет и читает один процесс
+            cache = await setup_cache(context, "assets" if self.cache_mode == "assets" else "none")
+            try:
+                return await self.crawl(context, roots, browser_pids, cache)
+            finally:
+                if cache:
+                    cache.print_summary()
+                await context.close()
+                await browser.close()
+
+    async def load_roots(self, context: BrowserContext) -> list[dict]:
+        """Загружает основные категории из главного меню."""
+        page = await context.new_page()
+        try:
+            await apply_blocking(page, self.blocking_mode, self.blocking_profile)
+            await navigate(page, TARGET_URL, ("main_menu",), mode=self.navigation_mode, timeout=self.navigation_timeout)
+            roots = await load_main_categories(page, EXCLUDED_CATEGORIES)
+        finally:
+            await page.close()
+        if self.main_categories_limit:
+            roots = roots[:self.main_categories_limit]
+        print(f"Основных категорий: {len(roots)}")
+        return roots
+
+    async def crawl(
+            self,
+            context: BrowserContext,
+            roots: list[dict],
+            browser_pids: set[int],
+            cache: AssetCache | None = None,
+            restored: tuple[list[dict], dict[str, dict], list[tuple[dict, dict]]] | None = None
+    ) -> list[dict]:
+        """
+        Обходит деревья категорий roots и возвращает их (узлы заполняются на месте).
+
+        Args:
+            context (BrowserContext): Контекст, в котором создаётся пул вкладок.
+            roots (list[dict]): Основные категории.
+            browser_pids (set[int]): Корневые процессы браузера для MemoryWatchdog.
+            cache (AssetCache | None): Кэш ресурсов, который подключается и к новому контексту.
+            restored (tuple | None): Очередь, посещённые URL и ссылки из CheckpointStore.load()
+                (тогда roots — уже частично собранное дерево).
+        """
+        self.frontier = Frontier()
+        self.limiter = AdaptiveLimiter(initial=self.initial_concurrency, maximum=self.workers)
+        self.retry = RetryEngine()
+        self.readiness = ReadinessStats()
+        self.bandwidth = BandwidthMeter(self.blocking_profile)
+        self.page_pool = PagePool(
+            context,
+            size=self.workers,
+            page_setup=self._setup_page,
+            task_timeout=self.page_task_timeout
+        )
+
+        async def _renew_pages(name: str) -> None:
+            await self.page_pool.recycle()
+
+        async def _renew_context(name: str) -> None:
+            # HAR записывается и воспроизводится в первом контексте — в этих режимах пересоздаются только вкладки
+            if self.cache_mode in ("record", "replay"):
+                await self.page_pool.recycle()
+                return
+            new_context = await create_context(self.page_pool.context.browser)
+            if cache:
+                await cache.attach(new_context)
+            await self.page_pool.recycle(new_context)
+
+        watchdog = MemoryWatchdog(
+            interval=self.memory_interval,
+            max_browser_mb=self.max_browser_mb,
+            max_renderer_mb=self.max_renderer_mb
+        )
+        watchdog.watch("browser", browser_pids, on_browser_limit=_renew_context, on_renderer_limit=_renew_pages)
+
+        start_time = time.perf_counter()
+        workers: list[asyncio.Task] = []
+        try:
+            await self.page_pool.start()
+            watchdog.start()
+            workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+            if restored:
+                self.frontier.restore(*restored)
+            else:
+                for root in roots:
+                    self.frontier.put(root)
+                if self.checkpoint:
+                    self.checkpoint.add_roots(roots)
+            join = asyncio.create_task(self.frontier.join())
+            # Воркер завершается раньше очереди только из-за FatalError (например, PagePoolError)
+            await asyncio.wait([join, *workers], return_when=asyncio.FIRST_COMPLETED)
+            failed = [worker for worker in workers if worker.done()]
+            if failed:
+                join.cancel()
+                raise failed[0].exception()
+
+            self.frontier.stop(self.workers)
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        finally:
+            # При ошибке или отмене обхода (Ctrl+C) воркеры не должны продолжать работу после закрытия пула
+            for worker in workers:
+                worker.cancel()
+            await watchdog.stop()
+            crawl_time = time.perf_counter() - start_time
+            print(f"Обход категорий: {crawl_time:.1f} сек.")
+            self.frontier.print_summary()
+            if self.tree_cache:
+                self.tree_cache.print_summary()
+            if self.checkpoint:
+                self.checkpoint.print_summary(crawl_time)
+            self.page_pool.print_summary()
+            self.bandwidth.print_summary()
+            self.readiness.print_summary()
+            self.limiter.print_summary()
+            self.limiter.export_csv(process_log_path(CONCURRENCY_LOG, self.processes))
+            self.retry.print_summary()
+            self.retry.dead_letters.export_json(process_log_path(DEAD_LETTERS_PATH, self.processes))
+            watchdog.print_summary()
+            watchdog.export_csv(default_log_path())
+            await self.page_pool.close()
+
+        return roots
+
+    async def _setup_page(self, page: Page) -> None:
+        await apply_blocking(page, self.blocking_mode, self.blocking_profile)
+        self.bandwidth.attach(page)
+
+    async def _worker(self) -> None:
+        """Единый цикл воркера: узел из очереди → страница → обработчик → дочерние узлы в очередь."""
+        while True:
+            node = await self.frontier.get()
+            try:
+                if node is None:  # Сигнал завершения
+                    break
+                children = await self.retry.run(
+                    node['url'],
+                    lambda: self.page_pool.use(lambda page: self._process(page, node)),
+                    node['name']
+                )
+                recovered = False
+                if children is None and self.tree_cache is not None:
+                    # При обновлении узел, который не загрузился, остаётся прежним вместе с поддеревом
+                    children = self.tree_cache.recover(node)
+                    recovered = children is not None
+                if children is None:
+                    node['Категория'] = 'Ошибка загрузки'
+                    children = []
+                elif not recovered:
+                    TreeCache.stamp(node, children)
+
+                node['subcategories'] = children
+                # Подкатегории не изменились (или взяты из кэша) — дочерние узлы можно взять из кэша без загрузки
+                from_cache = recovered or (self.tree_cache is not None and self.tree_cache.is_unchanged(node))
+                restored = self._schedule(children, from_cache)
+                # Узел и его дочерние узлы попадают в одну контрольную точку
+                if self.checkpoint:
+                    self.checkpoint.complete(node, children)
+                self._restore(restored)
+            except FatalError:
+                raise
+            except Exception as e:
+                print(f"Ошибка в воркере ({node['name'] if node else '-'}): {str(e)}")
+            finally:
+                self.frontier.task_done(node)
+
+    def _schedule(self, children: list[dict], from_cache: bool) -> list[tuple[dict, dict]]:
+        """
+        Ставит дочерние узлы в очередь; при from_cache узлы, годные в TreeCache, не загружаются.
+        Возвращает такие узлы вместе с их прежними версиями.
+        """
+        restored = []
+        for child in children:
+            cached = self.tree_cache.lookup(child) if from_cache else None
+            if cached is None:
+                self.frontier.put(child)
+            elif self.frontier.visit(child):
+                restored.append((child, cached))
+        return restored
+
+    def _restore(self, restored: list[tuple[dict, dict]]) -> None:
+        """Заполняет узлы и их поддеревья из TreeCache; устаревшие узлы поддеревьев ставятся в очередь."""
+        for node, cached in restored:  # список пополняется по ходу (обход в ширину)
+            children = self.tree_cache.restore(node, cached)
+            node['subcategories'] = children
+            restored.extend(self._schedule(children, True))
+            if self.checkpoint:
+                self.checkpoint.complete(node, children)
+
+    async def _process(self, page: Page, node: dict) -> list[dict]:
+        """Загружает страницу узла и разбирает её обработчиком типа страницы."""
+        start_time = time.perf_counter()
+        # Количество одновременных навигаций регулирует limiter (снижает при таймаутах и 403/429)
+        async with self.limiter.slot():
+            page_type = await navigate(
+                page,
+                node['url'],
+                stats=self.readiness,
+                mode=self.navigation_mode,
+                timeout=self.navigation_timeout
+            )
+        self.bandwidth.page_ready(time.perf_counter() - start_time, page_type is not None)
+
+        handler = self.handlers.get(page_type, handle_no_categories)
+        children = await handler(page, node)
+        print(f'{node["level"] * "-"} {node["name"]}: {page_type or "нет меню"}, подкатегорий {len(children)}')
+        return children
@@ -0,0 +1,223 @@
+import os
+import re
+from io import BytesIO
+from asyncio import to_thread
+
+import aiofiles
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.styles import Alignment
+
+
+async def process_categories_to_excel(
+        initial_data: list[dict],
+        output_filename: str = "categories.xlsx",
+        exclude_root_in_path: bool = True
+) -> None:
+    """
+    Обрабатывает категории и сохраняет их в Excel файл с уровнями вложенности
+    Args:
+        initial_data: Исходные данные категорий (список словарей)
+        output_filename: Имя выходного файла Excel
+        exclude_root_in_path: Исключать ли корневой элемент из пути
+    """
+    # Получаем уникальное имя файла
+    unique_filename = await get_unique_filename(output_filename)
+
+    # Вызываем функцию для записи данных в файл
+    await _write_categories_to_excel(initial_data, unique_filename, exclude_root_in_path)
+
+
+async def get_unique_filename(base_filename: str) -> str:
+    """
+    Асинхронно генерирует уникальное имя файла, если файл с таким именем уже существует.
+    Args:
+        base_filename: Базовое имя файла
+    Returns:
+        Уникальное имя файла
+    """
+    # Асинхронно проверяем существование файла
+    if not await to_thread(os.path.exists, base_filename):
+        return base_filename
+
+    # Разделяем имя файла и расширение
+    name, ext = os.path.splitext(base_filename)
+    directory = os.path.dirname(base_filename) or '.'
+
+    # Асинхронно получаем список файлов в директории
+    existing_files = await to_thread(
+        lambda: [f for f in os.listdir(directory)
+                 if f.startswith(name) and f.endswith(ext)]
+    )
+
+    if not existing_files:
+        return base_filename
+
+    # Находим максимальный суффикс
+    max_suffix = 0
+    for f in existing_files:
+        # Пытаемся извлечь суффикс из имени файла
+        try:
+            suffix_part = f[len(name):-len(ext)]
+            # Обрабатываем случай с подчеркиванием (например, "file_1.xlsx")
+            if '_' in suffix_part:
+                suffix = int(suffix_part.split('_')[-1])
+            else:
+                suffix = int(suffix_part)
+            if suffix > max_suffix:
+                max_suffix = suffix
+        except ValueError:
+            continue
+
+    # Генерируем новое имя файла
+    new_filename = f"{name}_{max_suffix + 1}{ext}" if max_suffix > 0 else f"{name}_1{ext}"
+    return new_filename
+
+
+async def _write_categories_to_excel(
+        initial_data: list[dict],
+        output_filename: str,
+        exclude_root_in_path: bool
+) -> None:
+    """
+    Асинхронно записывает категории в Excel файл
+    Args:
+        initial_data: Исходные данные категорий (список словарей)
+        output_filename: Имя выходного файла Excel
+        exclude_root_in_path: Исключать ли корневой элемент из пути
+    """
+
+    def _sanitize_sheet_name(name: str) -> str:
+        """Удаляет недопустимые символы из названия листа Excel"""
+        sanitized_name = re.sub(r'[\\/*?:\[\]]', '', name)
+        sanitized_name = sanitized_name[:31]
+        return sanitized_name
+
+    def _get_categories_with_levels(
+            item: dict,
+            current_level: int = 0,
+            parent_path: list[str] | None = None,
+            last_category: str | None = None
+    ) -> list[dict]:
+        """Рекурсивно извлекает категории с уровнями вложенности"""
+        categories: list[dict[str, str | int]] = []
+        current_path = parent_path if parent_path is not None else []
+
+        if not exclude_root_in_path or current_level > 0:
+            current_path = current_path + [item['name']]
+
+        if 'link' in item:
+            # Категория уже обойдена у другого родителя — указываем, где её поддерево
+            categories.append({
+                'Категория': f"→ {item['link']}",
+                'Уровень': current_level,
+                'Путь': ' → '.join(current_path) if current_path else item['name']
+            })
+
+        if 'Категория' in item:
+            item_categories = item['Категория']
+            if isinstance(item_categories, list):
+                for category in item_categories:
+                    if category == "Категорий нет" and last_category is not None:
+                        modified_path = current_path[:-1] if current_path else []
+                        categories.append({
+                            'Категория': last_category,
+                            'Уровень': current_level,
+                            'Путь': ' → '.join(modified_path) if modified_path else item['name']
+                        })
+                    else:
+                        categories.append({
+                            'Категория': category,
+                            'Уровень': current_level,
+                            'Путь': ' → '.join(current_path) if current_path else item['name']
+                        })
+                    if category != "Категорий нет":
+                        last_category = category
+            else:
+                if item_categories == "Категорий нет" and last_category is not None:
+                    modified_path = current_path[:-1] if current_path else []
+                    categories.append({
+                        'Категория': last_category,
+                        'Уровень': current_level,
+                        'Путь': ' → '.join(modified_path) if modified_path else item['name']
+                    })
+                else:
+                    categories.append({
+                        'Категория': item_categories,
+                        'Уровень': current_level,
+                        'Путь': ' → '.join(current_path) if current_path else item['name']
+                    })
+                if item_categories != "Категорий нет":
+                    last_category = item_categories
+
+        if 'subcategories' in item and item['subcategories']:
+            for sub in item['subcategories']:
+                categories.extend(_get_categories_with_levels(
+                    sub,
+                    current_level + 1,
+                    current_path.copy(),
+                    last_category
+                ))
+        return categories
+
+    # Создаем Excel-файл в памяти
+    wb = Workbook()
+    wb.remove(wb.active)  # Удаляем дефолтный лист
+
+    for section in initial_data:
+        section_id = section.get('data_menu_id', 'N/A')
+        section_name = _sanitize_sheet_name(f"{section['name']} (id {section_id})")
+
+        all_categories: list[dict[str, str | int]] = []
+
+        if 'subcategories' in section and section['subcategories']:
+            for subcategory in section['subcategories']:
+                all_categories.extend(_get_categories_with_levels(
+                    subcategory,
+                    current_level=1,
+                    parent_path=[],
+                    last_category=None
+                ))
+        elif 'Категория' in section:
+            all_categories.extend(_get_categories_with_levels(
+                section,
+                current_level=0,
+                parent_path=[],
+                last_category=None
+            ))
+
+        # Создаем DataFrame
+        df = pd.DataFrame(all_categories)
+        if not df.empty:
+            df = df[['Категория', 'Уровень', 'Путь']]
+
+            # Создаем лист в рабочей книге
+            ws = wb.create_sheet(title=section_name)
+
+            # Записываем заголовки
+            ws.append(['Категория', 'Уровень', 'Путь'])
+
+            # Записываем данные
+            for _, row in df.iterrows():
+                ws.append([row['Категория'], row['Уровень'], row['Путь']])
+
+            # Форматирование
+            for row in ws.iter_rows(min_row=2, min_col=2, max_col=2):
+                for cell in row:
+                    cell.alignment = Alignment(horizontal='center', vertical='center')
+
+            ws['B1'].alignment = Alignment(horizontal='center', vertical='center')
+            ws.column_dimensions['A'].width = 30
+            ws.column_dimensions['B'].width = 10
+            ws.column_dimensions['C'].width = 50
+        else:
+            # Создаем пустой лист
+            wb.create_sheet(title=section_name)
+
+    # Сохраняем файл асинхронно
+    buffer = BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+
+    async with aiofiles.open(output_filename, 'wb') as f:
+        await f.write(buffer.getvalue())
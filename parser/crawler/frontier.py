@@ -0,0 +1,92 @@
+import asyncio
+
+from parser.crawler.urls import canonical_url, count_nodes, node_path
+
+
+class Frontier:
+    """
+    Очередь узлов категорий, ожидающих загрузки (обход в ширину).
+
+    Узлы — словари категорий ('name', 'url', 'parent', 'level', 'subcategories'), которые
+    затем попадают в итоговое дерево, поэтому дочерние узлы заполняются на месте.
+    join() ждёт, пока все добавленные узлы (включая добавленные по ходу обхода) не будут
+    обработаны; stop() передаёт воркерам сигнал завершения (None).
+
+    Одна и та же категория доступна от нескольких родителей (меню, фильтр, бургер), поэтому
+    перед постановкой в очередь URL узла приводится к canonical_url и проверяется по visited.
+    Повторно найденный узел не загружается, а становится ссылкой: node['link'] — путь
+    узла, который обходится.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue[dict | None] = asyncio.Queue()
+        self.visited: dict[str, dict] = {}  # canonical_url → обходимый узел
+        self.links: list[tuple[dict, dict]] = []  # (узел-ссылка, обходимый узел)
+        self.added = 0
+        self.done = 0
+        self.max_size = 0
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def visit(self, node: dict) -> bool:
+        """
+        Отмечает URL узла посещённым, не ставя узел в очередь (узел заполняется из кэша).
+        Возвращает False, если URL уже встречался (узел стал ссылкой).
+        """
+        url = canonical_url(node['url'])
+        node['url'] = url
+        owner = self.visited.get(url)
+        if owner is not None:
+            node['link'] = node_path(owner)
+            self.links.append((node, owner))
+            return False
+
+        self.visited[url] = node
+        return True
+
+    def put(self, node: dict) -> bool:
+        """Ставит узел в очередь. Возвращает False, если URL уже встречался (узел стал ссылкой)."""
+        if not self.visit(node):
+            return False
+
+        self._queue.put_nowait(node)
+        self.added += 1
+        self.max_size = max(self.max_size, self._queue.qsize())
+        return True
+
+    def restore(self, queued: list[dict], visited: dict[str, dict], links: list[tuple[dict, dict]]) -> None:
+        """Восстанавливает очередь, посещённые URL и ссылки из контрольной точки."""
+        self.visited.update(visited)
+        self.links.extend(links)
+        for node in queued:
+            self._queue.put_nowait(node)
+            self.added += 1
+        self.max_size = max(self.max_size, self._queue.qsize())
+
+    async def get(self) -> dict | None:
+        return await self._queue.get()
+
+    def task_done(self, node: dict | None) -> None:
+        if node is not None:
+            self.done += 1
+        self._queue.task_done()
+
+    async def join(self) -> None:
+        await self._queue.join()
+
+    def stop(self, workers: int) -> None:
+        """Сигнал завершения для каждого из workers воркеров."""
+        for _ in range(workers):
+            self._queue.put_nowait(None)
+
+    @property
+    def navigations_saved(self) -> int:
+        """Загрузок страниц, которых не было благодаря ссылкам (поддеревья не обходились повторно)."""
+        return sum(count_nodes(owner) for _, owner in self.links)
+
+    def print_summary(self) -> None:
+        print(
+            f"Очередь обхода: узлов {self.added}, обработано {self.done}, максимум в очереди {self.max_size}, "
+            f"повторных ссылок {len(self.links)}, сэкономлено загрузок страниц {self.navigations_saved}"
+        )
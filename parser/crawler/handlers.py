@@ -0,0 +1,155 @@
+from typing import Awaitable, Callable
+
+from playwright.async_api import Page
+
+from parser.retry import SelectorMissError
+
+# Обработчик типа страницы: разбирает загруженную страницу узла, записывает в узел
+# найденные значения фильтра ('Категория') и возвращает дочерние узлы для обхода
+PageHandler = Callable[[Page, dict], Awaitable[list[dict]]]
+
+NO_CATEGORIES = 'Категорий нет'
+
+# Селекторы пунктов и ссылок меню категорий по типу страницы
+MENU_SELECTORS = {
+    'subcategory': ('li.menu-category__subcategory-item', 'a.menu-category__subcategory-link'),
+    'list': ('li.menu-category__item', 'a.menu-category__link'),
+}
+DROPDOWN_FILTER_SELECTOR = "div.dropdown-filter:has-text('Категория'):visible"
+BURGER_SELECTOR = 'button.dropdown-filter__btn--burger > div.dropdown-filter__btn-name'
+
+
+def child_node(parent: dict, name: str, url: str) -> dict:
+    """Создаёт дочерний узел категории: путь родителей, уровень и пустой список подкатегорий."""
+    return {
+        'name': name,
+        'url': url,
+        'parent': parent.get('parent', []) + [parent['name']],
+        'level': parent.get('level', 1) + 1,
+        'subcategories': [],
+    }
+
+
+async def handle_menu(page: Page, node: dict, menu_type: str) -> list[dict]:
+    """Собирает ссылки меню категорий (menu_type — 'subcategory' или 'list')."""
+    item_selector, link_selector = MENU_SELECTORS[menu_type]
+    children = []
+    for item in await page.locator(item_selector).all():
+        # Пропускаем элементы-заголовки (с тегом <p>)
+        if menu_type == 'list' and await item.locator('p.menu-category__item').count() > 0:
+            continue
+        link = item.locator(link_selector)
+        if await link.count() > 0:
+            children.append(child_node(node, (await link.inner_text()).strip(), await link.get_attribute('href')))
+    return children
+
+
+async def handle_subcategory_menu(page: Page, node: dict) -> list[dict]:
+    return await handle_menu(page, node, 'subcategory')
+
+
+async def handle_list_menu(page: Page, node: dict) -> list[dict]:
+    return await handle_menu(page, node, 'list')
+
+
+async def handle_dropdown_filter(page: Page, node: dict) -> list[dict]:
+    """
+    Конечная категория с фильтром "Категория": раскрывает фильтр, нажимает "Показать все",
+    подгружает список наведением на последний пункт и записывает значения в node['Категория'].
+    """
+    await page.locator(DROPDOWN_FILTER_SELECTOR).hover()
+    await page.wait_for_timeout(100)
+    show_all_button = page.locator("button.filter__show-all:has-text('Показать все'):visible").first
+    if await show_all_button.count() > 0 and await show_all_button.is_visible():
+        await show_all_button.click()
+        await page.locator('li.filter__item:visible').first.wait_for()
+
+        current_items = await page.locator('li.filter__item:visible').all()
+        while True:
+            await current_items[-1].hover()
+            await page.wait_for_timeout(100)
+
+            new_items = await page.locator('li.filter__item:visible').all()
+            if len(new_items) == len(current_items):
+                break
+            current_items = new_items
+    else:
+        current_items = await page.locator('li.filter__item:visible').all()
+
+    values = []
+    for item in current_items:
+        text = item.locator('span.checkbox-with-text__text')
+        if await text.count() > 0:
+            values.append((await text.inner_text()).strip())
+    node['Категория'] = values
+    return []
+
+
+async def handle_burger(page: Page, node: dict) -> list[dict]:
+    """
+    Категория с выпадающим списком подкатегорий (кнопка-бургер в фильтрах).
+
+    Если кнопка называется как один из родителей, список ведёт вверх по дереву —
+    подкатегорий нет. Иначе список раскрывается и его ссылки становятся дочерними узлами.
+    """
+    burger = page.locator(BURGER_SELECTOR).first
+    if (await burger.text_content() or '').strip() in node.get('parent', []):
+        node['Категория'] = NO_CATEGORIES
+        return []
+
+    await burger.hover()
+    await page.wait_for_timeout(100)
+    children = []
+    for item in await page.locator('ul.filter-category__list > li.filter-category__item').all():
+        link = item.locator('a.filter-category__link').first
+        if await link.count() > 0:
+            children.append(child_node(node, (await link.inner_text()).strip(), await link.get_attribute('href')))
+    if not children:
+        raise SelectorMissError(f"Пустой список подкатегорий: {node['url']}")
+    return children
+
+
+async def handle_no_categories(page: Page, node: dict) -> list[dict]:
+    """Страница без меню и фильтра категорий (например, сразу карточки товаров)."""
+    node['Категория'] = NO_CATEGORIES
+    return []
+
+
+# Обработчики по типам страниц из parser.readiness.PAGE_TYPES.
+# Тип страницы, для которого нет обработчика (или не определённый тип), обрабатывает handle_no_categories.
+HANDLERS: dict[str, PageHandler] = {
+    'subcategory': handle_subcategory_menu,
+    'list': handle_list_menu,
+    'dropdown_filter': handle_dropdown_filter,
+    'burger': handle_burger,
+}
+
+
+async def load_main_categories(page: Page, excluded: list[str]) -> list[dict]:
+    """
+    Открывает главное меню (бургер) на уже загруженной главной странице и возвращает
+    узлы основных категорий, кроме excluded.
+    """
+    await page.locator('button.nav-element__burger.j-menu-burger-btn').first.click()
+    await page.wait_for_selector(
+        'ul.menu-burger__main-list a.menu-burger__main-list-link:has-text("Бренды"):visible')
+
+    result = []
+    for category in await page.locator('ul.menu-burger__main-list > li.menu-burger__main-list-item').all():
+        category_link = category.locator('a.menu-burger__main-list-link')
+        if await category_link.count() == 0:
+            continue
+
+        name = (await category_link.inner_text()).strip()
+        if name.lower() in excluded:
+            continue
+
+        result.append({
+            'name': name,
+            'url': await category_link.get_attribute('href'),
+            'data_menu_id': await category.get_attribute('data-menu-id'),
+            'parent': [],
+            'level': 1,
+            'subcategories': [],
+        })
+    return result
@@ -0,0 +1,124 @@
+import time
+import hashlib
+
+from parser.crawler.urls import canonical_url
+
+REFRESH_DEPTH = 2  # Уровни дерева, которые при обновлении загружаются всегда
+REFRESH_TTL = 7 * 24 * 3600  # Срок (сек.), после которого узел загружается заново, даже если родитель не изменился
+
+# Ключи узла, которые не переносятся из кэша: путь и уровень пересчитываются от нового родителя
+_TREE_KEYS = {'parent', 'level', 'subcategories', 'link'}
+
+
+def fingerprint(children: list[dict]) -> str:
+    """Отпечаток дочерних узлов: названия и канонические URL в порядке на странице."""
+    digest = hashlib.sha1()
+    for child in children:
+        digest.update(f"{child['name']}\t{canonical_url(child['url'])}\n".encode())
+    return digest.hexdigest()
+
+
+class TreeCache:
+    """
+    Дерево предыдущего обхода для инкрементального обновления.
+
+    У каждого загруженного узла хранятся отпечаток дочерних узлов ('fingerprint') и время
+    загрузки ('crawled_at'). При обновлении уровни до refresh_depth загружаются всегда; если
+    отпечаток загруженного узла совпал с прежним, набор его подкатегорий не изменился и дочерние
+    узлы берутся из кэша (вместе с поддеревьями), пока не истёк ttl. Дочерние узлы изменившегося
+    узла, новые узлы, узлы с истёкшим сроком и узлы, которые в прошлый раз не загрузились,
+    загружаются заново. Если страницу узла не удалось загрузить, узел и его поддерево
+    восстанавливаются из кэша (recover), а не заменяются пустым узлом с ошибкой.
+
+    Args:
+        roots (list[dict]): Основные категории предыдущего обхода (дерево).
+        ttl (float): Срок годности узла (сек.).
+        refresh_depth (int): Уровни, которые загружаются всегда.
+    """
+
+    def __init__(self, roots: list[dict], ttl: float = REFRESH_TTL, refresh_depth: int = REFRESH_DEPTH):
+        self.ttl = ttl
+        self.refresh_depth = refresh_depth
+        self.nodes: dict[str, dict] = {}  # canonical_url → загруженный узел предыдущего обхода
+        self._index(roots)
+        self.unchanged = 0
+        self.changed = 0
+        self.expired = 0
+        self.reused = 0
+        self.recovered = 0
+
+    def _index(self, nodes: list[dict]) -> None:
+        for node in nodes:
+            if 'link' not in node and 'fingerprint' in node:
+                self.nodes[canonical_url(node['url'])] = node
+            self._index(node.get('subcategories', []))
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @staticmethod
+    def stamp(node: dict, children: list[dict]) -> None:
+        """Записывает в загруженный узел отпечаток дочерних узлов и время загрузки."""
+        node['fingerprint'] = fingerprint(children)
+        node['crawled_at'] = time.time()
+
+    def is_unchanged(self, node: dict) -> bool:
+        """Совпал ли отпечаток только что загруженного узла с прежним."""
+        cached = self.nodes.get(canonical_url(node['url']))
+        if cached is None or 'fingerprint' not in node:
+            return False
+        if cached['fingerprint'] == node['fingerprint']:
+            self.unchanged += 1
+            return True
+        self.changed += 1
+        return False
+
+    def lookup(self, node: dict) -> dict | None:
+        """Прежняя версия узла, если её можно взять без загрузки страницы."""
+        if node['level'] <= self.refresh_depth:
+            return None
+        cached = self.nodes.get(canonical_url(node['url']))
+        if cached is None:
+            return None
+        if time.time() - cached['crawled_at'] > self.ttl:
+            self.expired += 1
+            return None
+        return cached
+
+    def restore(self, node: dict, cached: dict) -> list[dict]:
+        """Переносит в узел данные прежней версии и возвращает его дочерние узлы из кэша."""
+        self.reused += 1
+        return self._copy(node, cached)
+
+    def recover(self, node: dict) -> list[dict] | None:
+        """
+        Восстанавливает из кэша узел, страницу которого не удалось загрузить (срок не учитывается).
+        Возвращает дочерние узлы прежней версии или None, если узла в кэше нет.
+        """
+        cached = self.nodes.get(canonical_url(node['url']))
+        if cached is None:
+            return None
+        self.recovered += 1
+        return self._copy(node, cached)
+
+    @staticmethod
+    def _copy(node: dict, cached: dict) -> list[dict]:
+        node.update({key: value for key, value in cached.items() if key not in _TREE_KEYS})
+        path = node['parent'] + [node['name']]
+        return [
+            {
+                'name': child['name'],
+                'url': child['url'],
+                'parent': path,
+                'level': node['level'] + 1,
+                'subcategories': [],
+            }
+            for child in cached.get('subcategories', [])
+        ]
+
+    def print_summary(self) -> None:
+        print(
+            f"Обновление ({len(self.nodes)} узлов в кэше): без изменений {self.unchanged}, изменилось {self.changed}, "
+            f"устарело {self.expired}; взято из кэша {self.reused} — столько загрузок страниц не понадобилось; "
+            f"восстановлено после ошибки загрузки {self.recovered}"
+        )
@@ -0,0 +1,45 @@
+from playwright.async_api import Playwright, Browser, BrowserContext
+
+from parser.memory import browser_root_pids, child_pids
+
+LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-infobars',
+    '--start-maximized',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-web-security',
+    '--disable-notifications'
+]
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+
+
+async def create_browser_session(p: Playwright, headless: bool = True) -> tuple[Browser, BrowserContext, set[int]]:
+    """
+    Запускает браузер и создаёт в нём контекст обхода.
+
+    Returns:
+        tuple[Browser, BrowserContext, set[int]]: Браузер, контекст и pid корневых процессов
+            браузера (для MemoryWatchdog).
+    """
+    before = child_pids()
+    browser = await p.chromium.launch(
+        headless=headless,
+        timeout=60000,  # Увеличиваем таймаут запуска браузера
+        args=LAUNCH_ARGS
+    )
+    browser_pids = browser_root_pids(before)
+    return browser, await create_context(browser), browser_pids
+
+
+async def create_context(browser: Browser) -> BrowserContext:
+    """Создаёт контекст (окно браузера) с настройками обхода."""
+    return await browser.new_context(
+        viewport={'width': 1280, 'height': 720},
+        user_agent=USER_AGENT,
+        # Дополнительные настройки защиты от обнаружения
+        bypass_csp=True,
+        java_script_enabled=True
+    )
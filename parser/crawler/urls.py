@@ -0,0 +1,44 @@
+import re
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urljoin, urlsplit, urlunsplit
+
+TARGET_URL = "https://www.wildberries.by"
+
+# Параметры, которые не меняют категорию: метки рекламы и аналитики, сортировка и страница выдачи
+TRACKING_PARAMS = {"gclid", "yclid", "fbclid", "_openstat", "from", "bid", "sort", "page"}
+TRACKING_PREFIXES = ("utm_",)
+
+
+def canonical_url(url: str, base: str = TARGET_URL) -> str:
+    """
+    Приводит ссылку на категорию к одному виду, чтобы одна и та же страница,
+    найденная у разных родителей, считалась одним узлом.
+
+    Относительная ссылка дополняется до абсолютной, схема и хост приводятся к нижнему регистру,
+    из пути убираются повторные и завершающий "/", а также index.html, кодирование символов
+    выравнивается, фрагмент отбрасывается, рекламные параметры и параметры выдачи
+    (TRACKING_PARAMS) удаляются, остальные сортируются.
+    """
+    parts = urlsplit(urljoin(base, url.strip()))
+    path = re.sub(r"/{2,}", "/", unquote(parts.path))
+    path = re.sub(r"/index\.html?$", "", path).rstrip("/") or "/"
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        quote(path, safe="/-._~"),
+        urlencode(query),
+        ""
+    ))
+
+
+def node_path(node: dict) -> str:
+    """Путь узла в дереве: родители и название через " → "."""
+    return " → ".join(node.get("parent", []) + [node["name"]])
+
+
+def count_nodes(node: dict) -> int:
+    """Количество загруженных страниц в поддереве узла (сам узел и все потомки, кроме ссылок)."""
+    return 1 + sum(count_nodes(child) for child in node.get("subcategories", []) if "link" not in child)
@@ -0,0 +1,340 @@
+import re
+import sys
+import html
+import time
+import random
+import timeit
+from decimal import Decimal
+
+import numpy as np
+from lxml import etree, html as lxml_html
+
+# Поля, которые извлекаются из карточки товара (в виде сырых строк)
+CARD_FIELDS = ("article_id", "title", "price", "discounted_price", "rating", "reviews_count")
+
+# Числовые поля карточки в порядке их следования в буфере пакетной нормализации
+NUMERIC_FIELDS = ("price", "discounted_price", "rating", "reviews_count")
+FIELD_SEPARATOR = '\x00'
+# Пробельные символы, которыми сайт разделяет разряды в ценах и счётчиках
+DIGIT_SPACES = (' ', '\xa0', '\u2009', '\u202f', '\t', '\n', '\r')
+
+# Извлекает сырые поля всех карточек страницы за один проход внутри браузера (один round trip вместо 100+).
+# Возвращает записи с ключами CARD_FIELDS, которые затем нормализуются через normalize_cards.
+EXTRACT_CARDS_SCRIPT = """
+() => Array.from(document.querySelectorAll('article.j-card-item'), card => {
+    const text = selector => {
+        const element = card.querySelector(selector);
+        return element ? element.textContent.replace(/\\u00A0/g, ' ').trim() : null;
+    };
+    return {
+        article_id: card.dataset.nmId || card.id.replace(/^c/, '') || null,
+        title: (text('.product-card__name') || '').replace(/^\\/\\s*/, '') || null,
+        price: text('ins.price__lower-price'),
+        discounted_price: text('del'),
+        rating: text('.address-rate-mini'),
+        reviews_count: text('.product-card__count'),
+    };
+})
+"""
+
+# Та же функция для Selenium: execute_script возвращает результат выражения после return
+# (подходит и для run_js в DrissionPage, который оборачивает скрипт в function(){...})
+SELENIUM_EXTRACT_CARDS_SCRIPT = f"return ({EXTRACT_CARDS_SCRIPT})();"
+
+# Предкомпилированные шаблоны для разбора outerHTML карточки.
+# Вместо ".*?" внутри атрибутов используются классы символов, чтобы шаблон не уходил
+# за пределы тега и не перебирал всю карточку при отсутствии совпадения.
+CARD_PATTERN = re.compile(r'<article\b[^>]*\bj-card-item\b[^>]*>.*?</article>', re.S)
+ARTICLE_ID_PATTERN = re.compile(r'^<article\b[^>]*?(?:data-nm-id="(\d+)"|\bid="c(\d+)")')
+TITLE_PATTERN = re.compile(r'<span class="product-card__name-separator[^"]*"> / </span>([^<]*)</span>')
+PRICE_PATTERN = re.compile(r'<ins class="price__lower-price[^"]*">(.*?)</ins>', re.S)
+DISCOUNTED_PRICE_PATTERN = re.compile(r'<del>(.*?)</del>', re.S)
+RATING_PATTERN = re.compile(r'<span class="address-rate-mini address-rate-mini--sm">([^<]*)</span>')
+REVIEWS_COUNT_PATTERN = re.compile(r'<span class="product-card__count">(.*?)</span>', re.S)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+SPACES_PATTERN = re.compile(r'\s+')
+NUMBER_PATTERN = re.compile(r'(\d+[.,]?\d*)')
+# Одно совпадение на каждое поле буфера: первое число поля (или пустая строка) и разделитель
+FIELD_NUMBER_PATTERN = re.compile(r'[^\d\x00]*(\d+(?:\.\d*)?)?[^\x00]*\x00')
+
+# Предкомпилированные XPath-выражения для lxml
+CARDS_XPATH = etree.XPath("//article[contains(concat(' ', normalize-space(@class), ' '), ' j-card-item ')]")
+TITLE_XPATH = etree.XPath("string(.//*[contains(@class, 'product-card__name')][1])")
+PRICE_XPATH = etree.XPath("string(.//ins[contains(@class, 'price__lower-price')][1])")
+DISCOUNTED_PRICE_XPATH = etree.XPath("string(.//del[1])")
+RATING_XPATH = etree.XPath("string(.//*[contains(@class, 'address-rate-mini')][1])")
+REVIEWS_COUNT_XPATH = etree.XPath("string(.//*[contains(@class, 'product-card__count')][1])")
+
+
+def _clean_text(fragment: str | None) -> str | None:
+    """Убирает теги, HTML-сущности и лишние пробелы. Пустая строка превращается в None."""
+    if fragment is None:
+        return None
+    text = SPACES_PATTERN.sub(' ', html.unescape(TAG_PATTERN.sub('', fragment))).strip()
+    return text or None
+
+
+def parse_number_from_text(text: str) -> int | float | None:
+    """
+    Извлекает число из строки. Возвращает int, float или None.
+    """
+    if not isinstance(text, str):
+        return 0
+
+    text = SPACES_PATTERN.sub('', text)
+    match = NUMBER_PATTERN.search(text)
+
+    if match:
+        number = float(match.group(1).replace(',', '.'))
+        return int(number) if number.is_integer() else number
+
+    return None
+
+
+def normalize_card(record: dict, currency: str = "BYN") -> dict:
+    """
+    Приводит сырые строки карточки к полям модели Item (плюс article_id).
+
+    Args:
+        record: Словарь с сырыми строками из CARD_FIELDS.
+        currency: Валюта цен на странице.
+
+    Returns:
+        dict: Словарь с title, price, discounted_price, rating, reviews_count, currency и article_id.
+    """
+    return {
+        "title": record["title"],
+        "price": parse_number_from_text(record["price"]) if record["price"] else None,
+        "discounted_price": parse_number_from_text(record["discounted_price"]) if record["discounted_price"] else None,
+        "rating": parse_number_from_text(record["rating"]) if record["rating"] else None,
+        "reviews_count": parse_number_from_text(record["reviews_count"]) if record["reviews_count"] else 0,
+        "currency": currency,
+        "article_id": record["article_id"],
+    }
+
+
+def _extract_number_columns(records: list[dict]) -> dict[str, list[str]]:
+    """
+    Находит числа во всех числовых полях всех записей за один проход регулярного выражения.
+
+    Поля склеиваются в один буфер через FIELD_SEPARATOR, из буфера разом удаляются пробелы
+    и запятые заменяются точками, после чего findall возвращает ровно одно значение на поле.
+    """
+    buffer = FIELD_SEPARATOR.join([record[field] or '' for record in records for field in NUMERIC_FIELDS])
+    buffer += FIELD_SEPARATOR
+    for space in DIGIT_SPACES:
+        buffer = buffer.replace(space, '')
+    numbers = FIELD_NUMBER_PATTERN.findall(buffer.replace(',', '.'))
+
+    if len(numbers) != len(records) * len(NUMERIC_FIELDS):
+        raise ValueError("Поля карточек не должны содержать символ-разделитель FIELD_SEPARATOR")
+    return {field: numbers[index::len(NUMERIC_FIELDS)] for index, field in enumerate(NUMERIC_FIELDS)}
+
+
+def normalize_columns(records: list[dict], currency: str = "BYN") -> dict[str, list]:
+    """
+    Пакетно приводит сырые строки карточек (страницы или всего прогона) к колонкам модели Item.
+
+    Цены преобразуются в Decimal напрямую из строки, без промежуточного float,
+    рейтинг — в float, количество отзывов — в int.
+
+    Args:
+        records: Список словарей с сырыми строками из CARD_FIELDS.
+        currency: Валюта цен.
+
+    Returns:
+        dict[str, list]: Колонки title, price, discounted_price, rating, reviews_count, currency, article_id.
+    """
+    numbers = _extract_number_columns(records)
+
+    ratings = np.array(numbers["rating"], dtype=object)
+    ratings[ratings == ''] = 'nan'
+    reviews = np.array(numbers["reviews_count"], dtype=object)
+    reviews[reviews == ''] = '0'
+
+    return {
+        "title": [record["title"] for record in records],
+        "price": [Decimal(value) if value else None for value in numbers["price"]],
+        "discounted_price": [Decimal(value) if value else None for value in numbers["discounted_price"]],
+        "rating": [None if value != value else value for value in ratings.astype(np.float64).tolist()],
+        "reviews_count": reviews.astype(np.float64).astype(np.int64).tolist(),
+        "currency": [currency] * len(records),
+        "article_id": [record["article_id"] for record in records],
+    }
+
+
+def normalize_cards(records: list[dict], currency: str = "BYN") -> list[dict]:
+    """
+    Пакетный аналог normalize_card: приводит список сырых записей к словарям полей модели Item.
+    """
+    if not records:
+        return []
+    columns = normalize_columns(records, currency)
+    return [
+        {
+            "title": title,
+            "price": price,
+            "discounted_price": discounted_price,
+            "rating": rating,
+            "reviews_count": reviews_count,
+            "currency": currency,
+            "article_id": article_id,
+        }
+        for title, price, discounted_price, rating, reviews_count, article_id in zip(
+            columns["title"], columns["price"], columns["discounted_price"],
+            columns["rating"], columns["reviews_count"], columns["article_id"],
+        )
+    ]
+
+
+def extract_card_html(card_html: str) -> dict:
+    """
+    Извлекает сырые строки полей из outerHTML одной карточки с помощью регулярных выражений.
+    """
+    def _group(pattern: re.Pattern) -> str | None:
+        match = pattern.search(card_html)
+        return _clean_text(match.group(1)) if match else None
+
+    article_id = ARTICLE_ID_PATTERN.search(card_html)
+    return {
+        "article_id": (article_id.group(1) or article_id.group(2)) if article_id else None,
+        "title": _group(TITLE_PATTERN),
+        "price": _group(PRICE_PATTERN),
+        "discounted_price": _group(DISCOUNTED_PRICE_PATTERN),
+        "rating": _group(RATING_PATTERN),
+        "reviews_count": _group(REVIEWS_COUNT_PATTERN),
+    }
+
+
+def parse_product_card_html(card_html: str, currency: str = "BYN") -> dict:
+    """
+    Разбирает outerHTML одной карточки товара в словарь полей модели Item.
+    """
+    return normalize_card(extract_card_html(card_html), currency)
+
+
+def extract_cards_regex(page_html: str) -> list[dict]:
+    """
+    Извлекает сырые поля всех карточек страницы: карточки находятся одним проходом
+    по HTML, поля каждой карточки — предкомпилированными шаблонами.
+    """
+    return [extract_card_html(match.group(0)) for match in CARD_PATTERN.finditer(page_html)]
+
+
+def extract_cards_lxml(page_html: str) -> list[dict]:
+    """
+    Извлекает сырые поля всех карточек страницы, разбирая HTML один раз через lxml и XPath.
+    """
+    root = lxml_html.fromstring(page_html)
+
+    result = []
+    for card in CARDS_XPATH(root):
+        article_id = card.get('data-nm-id') or (card.get('id') or '').removeprefix('c') or None
+        title = _clean_text(TITLE_XPATH(card))
+        result.append({
+            "article_id": article_id,
+            "title": title.removeprefix('/').lstrip() or None if title else None,
+            "price": _clean_text(PRICE_XPATH(card)),
+            "discounted_price": _clean_text(DISCOUNTED_PRICE_XPATH(card)),
+            "rating": _clean_text(RATING_XPATH(card)),
+            "reviews_count": _clean_text(REVIEWS_COUNT_XPATH(card)),
+        })
+    return result
+
+
+BACKENDS = {
+    "regex": extract_cards_regex,
+    "lxml": extract_cards_lxml,
+}
+
+
+def extract_cards(page_html: str, backend: str = "regex", currency: str = "BYN") -> list[dict]:
+    """
+    Разбирает HTML целой страницы результатов в список словарей товаров.
+
+    Args:
+        page_html: HTML страницы (например, результат page.content()).
+        backend: Имя бэкенда из BACKENDS ("regex" или "lxml").
+        currency: Валюта цен на странице.
+    """
+    return normalize_cards(BACKENDS[backend](page_html), currency)
+
+
+def benchmark_backends(page_html: str, repeat: int = 20) -> dict[str, float]:
+    """
+    Замеряет время разбора страницы каждым бэкендом.
+
+    Args:
+        page_html: HTML страницы результатов.
+        repeat: Количество повторов, берётся лучшее время.
+
+    Returns:
+        dict[str, float]: Время разбора одной страницы в секундах для каждого бэкенда.
+    """
+    results = {}
+    for name in BACKENDS:
+        timer = timeit.Timer(lambda: extract_cards(page_html, name))
+        results[name] = min(timer.repeat(repeat=repeat, number=1))
+
+    cards = len(extract_cards(page_html))
+    for name, seconds in sorted(results.items(), key=lambda item: item[1]):
+        print(f"{name:>6}: {seconds * 1000:.3f} мс/стр., {cards / seconds if seconds else 0:.0f} карточек/сек")
+    return results
+
+
+def pick_fastest_backend(page_html: str, repeat: int = 20) -> str:
+    """
+    Возвращает имя самого быстрого бэкенда для данной страницы.
+    """
+    results = benchmark_backends(page_html, repeat)
+    return min(results, key=results.get)
+
+
+def benchmark_normalizers(count: int = 100_000) -> dict[str, float]:
+    """
+    Сравнивает нормализацию по одной карточке (normalize_card) с пакетной (normalize_cards).
+
+    Args:
+        count: Количество синтетических карточек.
+
+    Returns:
+        dict[str, float]: Время нормализации всех карточек в секундах для каждого способа.
+    """
+    records = [
+        {
+            "article_id": str(index),
+            "title": f"Товар {index}",
+            "price": f"{random.randint(1, 99)}\xa0{random.randint(100, 999)},{random.randint(10, 99)}\xa0р.",
+            "discounted_price": f"{random.randint(1, 99)}\xa0000\xa0р." if index % 3 else None,
+            "rating": f"{random.randint(1, 5)},{random.randint(0, 9)}" if index % 5 else None,
+            "reviews_count": f"{random.randint(1, 9)}\xa0024 оценки",
+        }
+        for index in range(count)
+    ]
+
+    results = {}
+    start_time = time.perf_counter()
+    [normalize_card(record) for record in records]
+    results["по одной"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    normalize_cards(records)
+    results["пакетно"] = time.perf_counter() - start_time
+
+    for name, seconds in results.items():
+        print(f"{name:>9}: {seconds:.4f} сек., {count / seconds:.0f} карточек/сек")
+    print(f"Ускорение: x{results['по одной'] / results['пакетно']:.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    # python -m parser.extract page.html — сравнить бэкенды на сохранённой странице
+    # python -m parser.extract --normalize [count] — сравнить способы нормализации чисел
+    if len(sys.argv) < 2:
+        print("Использование: python -m parser.extract page.html | --normalize [count]")
+        sys.exit(1)
+    if sys.argv[1] == "--normalize":
+        benchmark_normalizers(int(sys.argv[2]) if len(sys.argv) > 2 else 100_000)
+    else:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            print(f"Самый быстрый бэкенд: {pick_fastest_backend(f.read())}")
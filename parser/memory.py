@@ -0,0 +1,217 @@
+import os
+import csv
+import time
+import asyncio
+from typing import Awaitable, Callable
+
+import psutil
+
+MemoryCallback = Callable[[str], Awaitable[None]]
+
+MB = 1024 * 1024
+
+
+def child_pids() -> set[int]:
+    """Возвращает pid всех дочерних процессов текущего процесса (рекурсивно)."""
+    try:
+        return {child.pid for child in psutil.Process().children(recursive=True)}
+    except psutil.Error:
+        return set()
+
+
+def browser_root_pids(before: set[int]) -> set[int]:
+    """
+    Корневые процессы браузера, запущенного после снимка before = child_pids().
+
+    Playwright не отдаёт pid браузера, поэтому сравниваются дочерние процессы до и после
+    запуска: новые процессы, родитель которых не входит в новые, и есть браузер.
+    Рендереры, которые браузер запускает позже, находятся как их потомки.
+    """
+    new_pids = child_pids() - before
+    roots = set()
+    for pid in new_pids:
+        try:
+            if psutil.Process(pid).ppid() not in new_pids:
+                roots.add(pid)
+        except psutil.Error:
+            continue
+    return roots
+
+
+def _is_renderer(process: psutil.Process) -> bool:
+    try:
+        return "--type=renderer" in process.cmdline()
+    except psutil.Error:
+        return False
+
+
+def measure_processes(roots: set[int]) -> tuple[float, list[float]]:
+    """
+    Память (RSS, МБ) процессов браузера с корнями roots и всех их потомков.
+
+    Returns:
+        tuple[float, list[float]]: Память процессов браузера (главный, GPU, сеть и т.п.)
+            и список памяти каждого рендерера.
+    """
+    processes = {}
+    for pid in roots:
+        try:
+            root = psutil.Process(pid)
+            processes[root.pid] = root
+            for child in root.children(recursive=True):
+                processes[child.pid] = child
+        except psutil.Error:
+            continue
+
+    browser_mb = 0.0
+    renderers = []
+    for process in processes.values():
+        try:
+            rss = process.memory_info().rss / MB
+        except psutil.Error:
+            continue
+        if _is_renderer(process):
+            renderers.append(rss)
+        else:
+            browser_mb += rss
+    return browser_mb, renderers
+
+
+def default_log_path() -> str:
+    """Имя CSV-файла памяти для текущего запуска (время запуска и pid — у каждого процесса свой файл)."""
+    return f"memory_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.csv"
+
+
+class MemoryWatchdog:
+    """
+    Следит за памятью браузеров и их рендереров и запускает пересоздание при превышении порогов.
+
+    Раз в interval секунд для каждого наблюдаемого браузера (watch) измеряется память
+    процессов браузера и каждого рендерера. Если суммарная память больше max_browser_mb,
+    вызывается on_browser_limit (перезапуск браузера), иначе если самый большой рендерер
+    больше max_renderer_mb — on_renderer_limit (пересоздание контекста или вкладок).
+    Обработчики не прерывают задачи: они помечают контекст/браузер, а пересоздание
+    происходит по мере возврата вкладок и контекстов, так что очередь работы не теряется.
+    После срабатывания браузер не проверяется cooldown секунд, пока идёт пересоздание.
+
+    Все замеры записываются в history (память во времени) и выгружаются через export_csv.
+
+    Использование:
+        async with MemoryWatchdog(max_renderer_mb=600) as watchdog:
+            watchdog.watch("browser", pids, on_renderer_limit=lambda name: page_pool.recycle())
+            ...
+        watchdog.export_csv(default_log_path())
+
+    Args:
+        interval (float): Период замеров (сек.).
+        max_browser_mb (float): Порог суммарной памяти браузера (0 — без ограничения).
+        max_renderer_mb (float): Порог памяти одного рендерера (0 — без ограничения).
+        cooldown (float): Пауза (сек.) после срабатывания для того же браузера.
+    """
+
+    def __init__(
+            self,
+            interval: float = 10.0,
+            max_browser_mb: float = 2000.0,
+            max_renderer_mb: float = 600.0,
+            cooldown: float = 60.0
+    ):
+        self.interval = interval
+        self.max_browser_mb = max_browser_mb
+        self.max_renderer_mb = max_renderer_mb
+        self.cooldown = cooldown
+        self.targets: dict[str, tuple[set[int], MemoryCallback | None, MemoryCallback | None]] = {}
+        # (время, браузер, всего МБ, процессы браузера МБ, рендереров, самый большой рендерер МБ, событие)
+        self.history: list[tuple[float, str, float, float, int, float, str]] = []
+        self.actions: dict[str, int] = {"recycle_browser": 0, "recycle_context": 0}
+        self._task: asyncio.Task | None = None
+        self._started_at = time.perf_counter()
+        self._last_action: dict[str, float] = {}
+
+    async def __aenter__(self) -> "MemoryWatchdog":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.stop()
+
+    def watch(
+            self,
+            name: str,
+            pids: set[int],
+            on_browser_limit: MemoryCallback | None = None,
+            on_renderer_limit: MemoryCallback | None = None
+    ) -> None:
+        """Начинает следить за браузером с корневыми процессами pids."""
+        self.targets[name] = (pids, on_browser_limit, on_renderer_limit)
+
+    def unwatch(self, name: str) -> None:
+        self.targets.pop(name, None)
+        self._last_action.pop(name, None)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._started_at = time.perf_counter()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"Ошибка контроля памяти: {e}")
+
+    async def check(self) -> None:
+        """Один раунд замеров и, при превышении порогов, запуск пересоздания."""
+        for name, (pids, on_browser_limit, on_renderer_limit) in list(self.targets.items()):
+            browser_mb, renderers = await asyncio.to_thread(measure_processes, pids)
+            total_mb = browser_mb + sum(renderers)
+            renderer_max = max(renderers, default=0.0)
+
+            event, callback = "", None
+            now = time.perf_counter()
+            if now - self._last_action.get(name, float("-inf")) >= self.cooldown:
+                if self.max_browser_mb and total_mb > self.max_browser_mb and on_browser_limit:
+                    event, callback = "recycle_browser", on_browser_limit
+                elif self.max_renderer_mb and renderer_max > self.max_renderer_mb and on_renderer_limit:
+                    event, callback = "recycle_context", on_renderer_limit
+
+            self.history.append(
+                (now - self._started_at, name, total_mb, browser_mb, len(renderers), renderer_max, event)
+            )
+            if callback:
+                print(f"{name}: {total_mb:.0f} МБ (рендерер до {renderer_max:.0f} МБ), {event}")
+                self._last_action[name] = now
+                self.actions[event] += 1
+                await callback(name)
+
+    def export_csv(self, path: str) -> None:
+        """Сохраняет замеры памяти: время (сек.), браузер, память (МБ), рендереры, событие."""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["seconds", "browser", "total_mb", "browser_mb", "renderers", "renderer_max_mb", "event"])
+            writer.writerows(
+                (f"{seconds:.1f}", name, f"{total:.1f}", f"{browser:.1f}", renderers, f"{renderer_max:.1f}", event)
+                for seconds, name, total, browser, renderers, renderer_max, event in self.history
+            )
+
+    def print_summary(self) -> None:
+        """Выводит максимум памяти по браузерам и количество пересозданий."""
+        peaks: dict[str, float] = {}
+        for _, name, total, *_ in self.history:
+            peaks[name] = max(peaks.get(name, 0.0), total)
+        per_browser = ", ".join(f"{name}: {peak:.0f} МБ" for name, peak in peaks.items()) or "нет замеров"
+        print(
+            f"Память (максимум): {per_browser}; перезапусков браузера {self.actions['recycle_browser']}, "
+            f"пересозданий контекста {self.actions['recycle_context']}"
+        )
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 04:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parser', '0008_rename_rating_count_item_reviews_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Название категории')),
+                ('url', models.CharField(db_index=True, help_text='Канонический URL страницы категории', max_length=1000, verbose_name='URL')),
+                ('path', models.CharField(help_text='Позиции узлов от корня, например 0003/0012/', max_length=255, unique=True, verbose_name='Путь')),
+                ('depth', models.PositiveSmallIntegerField(db_index=True, verbose_name='Уровень')),
+                ('category', models.JSONField(blank=True, default=None, help_text='Отметка обхода или список категорий фильтра', null=True, verbose_name='Категория')),
+                ('link', models.CharField(blank=True, default='', help_text='Путь категории, которая обходилась вместо этой', max_length=1000, verbose_name='Ссылка')),
+                ('crawled_at', models.DateTimeField(blank=True, default=None, null=True, verbose_name='Загружена')),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='parser.category', verbose_name='Родительская категория')),
+            ],
+            options={
+                'verbose_name': 'Категория',
+                'verbose_name_plural': 'Категории',
+                'ordering': ['path'],
+            },
+        ),
+    ]
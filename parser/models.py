@@ -61,3 +61,94 @@ class Item(models.Model):
         ordering = ["title"]
         verbose_name = "Название товара"
         verbose_name_plural = "Название товаров"
+
+
+class Category(models.Model):
+    """
+        Узел дерева категорий, собранного обходом (parser.crawler).
+
+        Дерево хранится двумя способами: ссылкой на родителя (parent) и материализованным
+        путём (path) — позиции узлов от корня, по PATH_STEP символов на уровень. Все потомки
+        узла — категории, у которых path начинается с path узла; такой запрос использует индекс.
+
+        Атрибуты:
+            name (str): Название категории.
+            url (str): Канонический URL страницы категории.
+            parent (Category, optional): Родительская категория (None — основная категория).
+            path (str): Материализованный путь, например "0003/0012/".
+            depth (int): Уровень в дереве (1 — основная категория).
+            category (str | list, optional): Значение "Категория" из обхода — отметка
+                ("Категорий нет", "Ошибка загрузки") или список категорий фильтра.
+            link (str): Путь узла, который обходился вместо этого (категория встречается у нескольких родителей).
+            crawled_at (datetime, optional): Время загрузки страницы категории.
+        """
+    PATH_STEP = 5  # Четыре цифры позиции и "/"
+
+    name = models.CharField(
+        verbose_name="Название категории",
+        max_length=255
+    )
+    url = models.CharField(
+        verbose_name="URL",
+        max_length=1000,
+        db_index=True,
+        help_text="Канонический URL страницы категории"
+    )
+    parent = models.ForeignKey(
+        'self',
+        verbose_name="Родительская категория",
+        related_name='children',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True
+    )
+    path = models.CharField(
+        verbose_name="Путь",
+        max_length=255,
+        unique=True,
+        help_text="Позиции узлов от корня, например 0003/0012/"
+    )
+    depth = models.PositiveSmallIntegerField(
+        verbose_name="Уровень",
+        db_index=True
+    )
+    category = models.JSONField(
+        verbose_name="Категория",
+        blank=True,
+        null=True,
+        default=None,
+        help_text="Отметка обхода или список категорий фильтра"
+    )
+    link = models.CharField(
+        verbose_name="Ссылка",
+        max_length=1000,
+        blank=True,
+        default="",
+        help_text="Путь категории, которая обходилась вместо этой"
+    )
+    crawled_at = models.DateTimeField(
+        verbose_name="Загружена",
+        blank=True,
+        null=True,
+        default=None
+    )
+
+    def descendants(self, max_depth: int | None = None) -> models.QuerySet:
+        """
+        Все потомки категории (без неё самой), упорядоченные по пути.
+
+        Пути потомков лежат в диапазоне (path, path без "/" + "0"), так как "/" < "0":
+        запрос по диапазону использует индекс path на любой БД, в отличие от LIKE.
+        """
+        queryset = Category.objects.filter(path__gt=self.path, path__lt=self.path[:-1] + '0')
+        if max_depth is not None:
+            queryset = queryset.filter(depth__lte=self.depth + max_depth)
+        return queryset
+
+    def __str__(self):
+        return f'{self.path} {self.name}'
+
+    class Meta:
+        ordering = ["path"]
+        verbose_name = "Категория"
+        verbose_name_plural = "Категории"
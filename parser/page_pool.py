@@ -0,0 +1,256 @@
+import time
+import asyncio
+import statistics
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable
+
+from playwright.async_api import BrowserContext, Page, Route, Request, Error as PlaywrightError
+
+from parser.retry import FatalError
+
+RouteHandler = Callable[[Route, Request], Awaitable[None]]
+PageSetup = Callable[[Page], Awaitable[None]]
+
+REPLACE_ATTEMPTS = 3  # Попыток создать вкладку взамен закрытой
+REPLACE_RETRY_DELAY = 1.0  # Пауза (сек.) перед повторной попыткой, умножается на номер попытки
+
+
+class PagePoolError(FatalError):
+    """Пул не смог заменить вкладку: работа на уменьшающемся пуле закончилась бы зависанием воркеров."""
+
+
+class PooledPage:
+    """
+    Вкладка пула: сама Page, счётчик навигаций главного фрейма и признак падения.
+    """
+
+    def __init__(self, index: int, page: Page, generation: int = 0):
+        self.index = index
+        self.page = page
+        self.generation = generation
+        self.navigations = 0
+        self.tasks = 0
+        self.crashed = False
+        page.on("framenavigated", self._on_navigation)
+        page.on("crash", self._on_crash)
+
+    def _on_navigation(self, frame) -> None:
+        if frame is self.page.main_frame:
+            self.navigations += 1
+
+    def _on_crash(self, page: Page) -> None:
+        self.crashed = True
+
+    @property
+    def alive(self) -> bool:
+        return not self.crashed and not self.page.is_closed()
+
+
+class PagePool:
+    """
+    Пул заранее созданных вкладок одного контекста с уже настроенной блокировкой ресурсов.
+
+    Вкладки выдаются строго по очереди ожидания (asyncio.Queue будит ожидающих в порядке FIFO),
+    поэтому ни один воркер не ждёт дольше остальных. Упавшая вкладка или вкладка, задача
+    на которой не уложилась в task_timeout (зависла), закрывается и заменяется новой.
+    Вкладка также пересоздаётся после max_navigations навигаций (0 — без ограничения).
+    recycle() пересоздаёт все вкладки (например, по сигналу MemoryWatchdog), при необходимости
+    в новом контексте, не прерывая выполняющиеся задачи.
+
+    Если новую вкладку не удалось создать за REPLACE_ATTEMPTS попыток, пул считается сломанным:
+    checkin, recycle и все последующие (в том числе ожидающие) checkout выбрасывают PagePoolError.
+
+    Использование:
+        async with PagePool(context, size=4, route_handler=route_handler) as pool:
+            result = await pool.use(lambda page: page.goto(url))
+
+    Args:
+        context (BrowserContext): Контекст, в котором создаются вкладки.
+        size (int): Количество вкладок.
+        route_handler (RouteHandler | None): Обработчик page.route("**/*") для каждой вкладки.
+        page_setup (PageSetup | None): Дополнительная настройка новой вкладки (например, apply_blocking).
+        task_timeout (float): Максимальное время (в секундах) задачи на вкладке, после которого она считается зависшей.
+        max_navigations (int): Навигаций, после которых вкладка пересоздаётся.
+    """
+
+    def __init__(
+            self,
+            context: BrowserContext,
+            size: int = 4,
+            route_handler: RouteHandler | None = None,
+            page_setup: PageSetup | None = None,
+            task_timeout: float = 180.0,
+            max_navigations: int = 0
+    ):
+        self.context = context
+        self.size = size
+        self.route_handler = route_handler
+        self.page_setup = page_setup
+        self.task_timeout = task_timeout
+        self.max_navigations = max_navigations
+        self.pages: list[PooledPage] = []
+        self.free: asyncio.Queue[PooledPage | None] = asyncio.Queue()  # None — пул сломан
+        self.error: PagePoolError | None = None
+
+        # Статистика
+        self.wait_times: list[float] = []
+        self.generation = 0  # Вкладки прошлых поколений пересоздаются при возврате (см. recycle)
+        self.replaced = {"crash": 0, "hang": 0, "navigations": 0, "memory": 0}
+        self.retired_navigations = 0
+
+    async def __aenter__(self) -> "PagePool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Создаёт все вкладки пула."""
+        for index in range(self.size):
+            pooled = await self._new_page(index)
+            self.pages.append(pooled)
+            self.free.put_nowait(pooled)
+
+    async def _new_page(self, index: int) -> PooledPage:
+        page = await self.context.new_page()
+        if self.route_handler:
+            await page.route("**/*", self.route_handler)
+        if self.page_setup:
+            await self.page_setup(page)
+        return PooledPage(index, page, self.generation)
+
+    async def checkout(self) -> PooledPage:
+        """Берёт свободную вкладку. Ждёт своей очереди, если все вкладки заняты."""
+        if self.error:
+            raise self.error
+        start_time = time.perf_counter()
+        pooled = await self.free.get()
+        if pooled is None:
+            self.free.put_nowait(None)  # Будит следующего ожидающего
+            raise self.error
+        self.wait_times.append(time.perf_counter() - start_time)
+        pooled.tasks += 1
+        return pooled
+
+    async def checkin(self, pooled: PooledPage, reason: str | None = None) -> None:
+        """
+        Возвращает вкладку в пул. Если вкладка упала, зависла (reason="hang")
+        или исчерпала лимит навигаций, вместо неё в пул ставится новая.
+        """
+        if reason is None and not pooled.alive:
+            reason = "crash"
+        if reason is None and self.max_navigations and pooled.navigations >= self.max_navigations:
+            reason = "navigations"
+        if reason is None and pooled.generation != self.generation:
+            reason = "memory"
+
+        if reason is None:
+            self.free.put_nowait(pooled)
+            return
+
+        self.replaced[reason] += 1
+        self.retired_navigations += pooled.navigations
+        try:
+            await pooled.page.close()
+        except PlaywrightError:
+            pass
+
+        replacement = await self._replace(pooled)
+        self.pages[self.pages.index(pooled)] = replacement
+        self.free.put_nowait(replacement)
+        await self._close_unused_context(pooled.page.context)
+
+    async def _replace(self, pooled: PooledPage) -> PooledPage:
+        """Создаёт вкладку на место pooled, повторяя попытки; при неудаче ломает пул."""
+        for attempt in range(1, REPLACE_ATTEMPTS + 1):
+            try:
+                return await self._new_page(pooled.index)
+            except PlaywrightError as e:
+                print(f"Не удалось заменить вкладку {pooled.index} (попытка {attempt}): {e}")
+                error = e
+                if attempt < REPLACE_ATTEMPTS:
+                    await asyncio.sleep(REPLACE_RETRY_DELAY * attempt)
+
+        self.pages.remove(pooled)
+        self.error = PagePoolError(f"Не удалось заменить вкладку {pooled.index}: {error}")
+        self.free.put_nowait(None)
+        raise self.error from error
+
+    async def _close_unused_context(self, context: BrowserContext) -> None:
+        # Прежний контекст закрывается, когда в нём не осталось вкладок пула
+        if context is self.context or any(pooled.page.context is context for pooled in self.pages):
+            return
+        try:
+            await context.close()
+        except PlaywrightError:
+            pass
+
+    async def recycle(self, context: BrowserContext | None = None) -> None:
+        """
+        Пересоздаёт все вкладки пула: свободные — сразу, занятые — когда задача на них завершится.
+        Если передан context, новые вкладки создаются в нём, а прежний контекст закрывается
+        после замены его последней вкладки. Сломанный пул выбрасывает PagePoolError.
+        """
+        if self.error:
+            raise self.error
+        if context is not None:
+            self.context = context
+        self.generation += 1
+        free = []
+        while not self.free.empty():
+            free.append(self.free.get_nowait())
+        for pooled in free:
+            await self.checkin(pooled)
+
+    async def use(self, task: Callable[[Page], Awaitable[Any]]) -> Any:
+        """
+        Выполняет task(page) на свободной вкладке и возвращает её результат.
+
+        Если task не завершилась за task_timeout, вкладка заменяется, а вызывающему
+        пробрасывается asyncio.TimeoutError.
+        """
+        pooled = await self.checkout()
+        reason = None
+        try:
+            return await asyncio.wait_for(task(pooled.page), self.task_timeout)
+        except asyncio.TimeoutError:
+            reason = "hang"
+            raise
+        finally:
+            await self.checkin(pooled, reason)
+
+    @asynccontextmanager
+    async def page(self):
+        """Берёт вкладку на время блока async with (без контроля зависания) и возвращает её в пул."""
+        pooled = await self.checkout()
+        try:
+            yield pooled.page
+        finally:
+            await self.checkin(pooled)
+
+    @property
+    def navigations(self) -> int:
+        """Общее количество навигаций, включая заменённые вкладки."""
+        return self.retired_navigations + sum(pooled.navigations for pooled in self.pages)
+
+    async def close(self) -> None:
+        """Закрывает все вкладки пула."""
+        for pooled in self.pages:
+            try:
+                await pooled.page.close()
+            except PlaywrightError:
+                pass
+        self.pages = []
+
+    def print_summary(self) -> None:
+        """Выводит навигации по вкладкам, ожидание вкладки и количество замен."""
+        per_page = ", ".join(f"{pooled.index}: {pooled.navigations}" for pooled in self.pages)
+        print(f"Пул вкладок ({self.size}): навигаций {self.navigations} [{per_page}]")
+        if self.wait_times:
+            print(
+                f"Ожидание вкладки: среднее {statistics.mean(self.wait_times):.3f} сек., "
+                f"максимум {max(self.wait_times):.3f} сек."
+            )
+        print(f"Заменено вкладок: упавших {self.replaced['crash']}, зависших {self.replaced['hang']}, "
+              f"по лимиту навигаций {self.replaced['navigations']}, по памяти {self.replaced['memory']}")
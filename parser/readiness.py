@@ -0,0 +1,124 @@
+import time
+import statistics
+
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+
+from parser.concurrency import raise_for_throttling
+
+# Типы страниц и признак готовности каждого: видимый элемент по selector (и с текстом text, если задан).
+# Порядок — приоритет: страница относится к первому типу, признак которого выполнился.
+PAGE_TYPES = {
+    "main_menu": {"selector": "button.nav-element__burger.j-menu-burger-btn"},
+    "subcategory": {"selector": "ul.menu-category__subcategory li.menu-category__subcategory-item"},
+    "list": {"selector": "ul.menu-category__list li.menu-category__item"},
+    "dropdown_filter": {"selector": "div.dropdown-filter", "text": "Категория"},
+    "burger": {"selector": "button.dropdown-filter__btn--burger > div.dropdown-filter__btn-name"},
+    "search_results": {"selector": "article.j-card-item"},
+    # Сообщение о пустой выдаче: в категории нет ни подкатегорий, ни товаров
+    "empty_listing": {"selector": "div.catalog-page__not-found, div.not-found-search, div.catalog-page__empty"},
+}
+
+# Типы, которые встречаются на страницах категорий (карточки товаров или сообщение о пустой
+# выдаче — признак отрисованной страницы без меню, когда категорий нет)
+CATEGORY_PAGE_TYPES = ("subcategory", "list", "dropdown_filter", "burger", "search_results", "empty_listing")
+
+NAVIGATION_MODES = ("ready", "networkidle")
+
+# Возвращает имя первого типа страницы, признак которого выполнен, или null
+PAGE_TYPE_SCRIPT = """
+types => {
+    for (const [name, selector, text] of types) {
+        for (const element of document.querySelectorAll(selector)) {
+            if (text && !element.textContent.includes(text)) continue;
+            if (element.getClientRects().length) return name;
+        }
+    }
+    return null;
+}
+"""
+
+
+def _predicates(page_types: tuple[str, ...]) -> list[list[str | None]]:
+    return [[name, PAGE_TYPES[name]["selector"], PAGE_TYPES[name].get("text")] for name in page_types]
+
+
+class ReadinessStats:
+    """
+    Время навигации до готовности страницы по типам страниц и режимам ожидания.
+    """
+
+    def __init__(self):
+        self.samples: dict[tuple[str, str], list[float]] = {}
+        self.timeouts: dict[str, int] = {}
+
+    def record(self, mode: str, page_type: str | None, seconds: float) -> None:
+        self.samples.setdefault((mode, page_type or "unknown"), []).append(seconds)
+
+    def timeout(self, mode: str) -> None:
+        self.timeouts[mode] = self.timeouts.get(mode, 0) + 1
+
+    def print_summary(self) -> None:
+        """Выводит количество, медиану и максимум времени готовности для каждого типа страницы."""
+        for (mode, page_type), samples in sorted(self.samples.items()):
+            print(
+                f"Готовность ({mode}) {page_type}: страниц {len(samples)}, "
+                f"медиана {statistics.median(samples):.3f} сек., максимум {max(samples):.3f} сек."
+            )
+        for mode, count in self.timeouts.items():
+            print(f"Не дождались готовности ({mode}): {count}")
+
+
+async def detect_page_type(page: Page, page_types: tuple[str, ...] = CATEGORY_PAGE_TYPES) -> str | None:
+    """Возвращает тип уже загруженной страницы или None."""
+    return await page.evaluate(PAGE_TYPE_SCRIPT, _predicates(page_types))
+
+
+async def navigate(
+        page: Page,
+        url: str,
+        page_types: tuple[str, ...] = CATEGORY_PAGE_TYPES,
+        stats: ReadinessStats | None = None,
+        mode: str = "ready",
+        timeout: float = 30000
+) -> str | None:
+    """
+    Открывает url и ждёт, пока страница станет готова для разбора.
+
+    В режиме "ready" ждёт только domcontentloaded и затем признак одного из page_types
+    (wait_for_function внутри страницы), не дожидаясь затишья сети — аналитика и
+    долгие запросы больше не задерживают разбор. Режим "networkidle" — прежнее ожидание,
+    оставлен для сравнения.
+
+    Args:
+        page (Page): Вкладка.
+        url (str): Адрес страницы.
+        page_types (tuple[str, ...]): Возможные типы страницы из PAGE_TYPES в порядке приоритета.
+        stats (ReadinessStats | None): Куда записать время готовности.
+        mode (str): "ready" или "networkidle".
+        timeout (float): Таймаут навигации и ожидания признака (мс).
+
+    Returns:
+        str | None: Тип страницы; None — только в режиме "networkidle", если признаков нет.
+
+    Raises:
+        ThrottledError: Сайт ответил 403 или 429.
+        PlaywrightTimeoutError: В режиме "ready" ни один признак не выполнился за timeout —
+            страница не отрисовалась, её загрузку нужно повторить, а не считать страницей без меню.
+    """
+    start_time = time.perf_counter()
+    if mode == "networkidle":
+        raise_for_throttling(await page.goto(url, timeout=timeout, wait_until="networkidle"))
+        page_type = await detect_page_type(page, page_types)
+    else:
+        raise_for_throttling(await page.goto(url, timeout=timeout, wait_until="domcontentloaded"))
+        try:
+            handle = await page.wait_for_function(PAGE_TYPE_SCRIPT, arg=_predicates(page_types), timeout=timeout)
+            page_type = await handle.json_value()
+        except PlaywrightTimeoutError:
+            if stats:
+                stats.timeout(mode)
+            raise
+
+    if stats:
+        stats.record(mode, page_type, time.perf_counter() - start_time)
+    return page_type
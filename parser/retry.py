@@ -0,0 +1,285 @@
+import json
+import time
+import random
+import asyncio
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlsplit
+
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+from parser.concurrency import ThrottledError
+
+# Классы ошибок и сколько всего попыток даётся для каждого.
+# Отсутствие элемента на загруженной странице обычно повторяется и при следующей загрузке,
+# поэтому такие ошибки повторяются реже, а неизвестные ошибки не повторяются вовсе.
+ERROR_ATTEMPTS = {
+    "timeout": 4,  # Навигация или задача на вкладке не уложились в таймаут
+    "throttled": 5,  # Сайт ответил 403/429
+    "navigation": 4,  # Сетевая ошибка навигации, закрытая или упавшая вкладка
+    "selector": 2,  # Страница загрузилась, но нужного элемента на ней нет
+    "other": 1,
+}
+# Во сколько раз увеличивается пауза перед повтором для класса ошибки (сайту нужно больше времени)
+ERROR_DELAY_FACTORS = {"throttled": 4.0}
+
+# Сколько первых сегментов пути входит в ветку размыкателя: /catalog/<раздел>/<подраздел>
+CIRCUIT_SCOPE_DEPTH = 3
+
+# Признаки сетевых ошибок и закрытых вкладок в тексте исключений Playwright
+NAVIGATION_ERROR_MARKERS = ("net::ERR_", "NS_ERROR_", "Navigation", "Target closed", "has been closed", "crashed")
+
+
+class SelectorMissError(Exception):
+    """На загруженной странице не найден ожидаемый элемент."""
+
+
+class FatalError(Exception):
+    """Ошибка, после которой повторять задачи бессмысленно: RetryEngine.run её не перехватывает."""
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Определяет класс ошибки для ERROR_ATTEMPTS: timeout, throttled, navigation, selector или other.
+
+    Таймаут ожидания локатора (страница загружена, элемента нет) относится к selector,
+    таймаут самой навигации или зависшей задачи — к timeout.
+    """
+    if isinstance(error, ThrottledError):
+        return "throttled"
+    if isinstance(error, SelectorMissError):
+        return "selector"
+    if isinstance(error, PlaywrightTimeoutError):
+        message = str(error)
+        if "locator(" in message or "selector" in message:
+            return "selector"
+        return "timeout"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, PlaywrightError):
+        if any(marker in str(error) for marker in NAVIGATION_ERROR_MARKERS):
+            return "navigation"
+    return "other"
+
+
+class RetryPolicy:
+    """
+    Экспоненциальная пауза между попытками со случайным разбросом (full jitter).
+
+    Перед попыткой attempt + 1 выжидается случайное время от 0 до
+    min(max_delay, base_delay * multiplier ** (attempt - 1)) * ERROR_DELAY_FACTORS[класс] секунд,
+    чтобы одновременно упавшие вкладки не повторяли запросы синхронно.
+
+    Args:
+        base_delay (float): Пауза после первой неудачи (сек.).
+        max_delay (float): Максимальная пауза (сек.).
+        multiplier (float): Во сколько раз растёт пауза с каждой попыткой.
+        attempts (dict[str, int] | None): Попыток для каждого класса ошибки (по умолчанию ERROR_ATTEMPTS).
+    """
+
+    def __init__(
+            self,
+            base_delay: float = 1.0,
+            max_delay: float = 60.0,
+            multiplier: float = 2.0,
+            attempts: dict[str, int] | None = None
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.attempts = {**ERROR_ATTEMPTS, **(attempts or {})}
+
+    def should_retry(self, kind: str, attempt: int) -> bool:
+        """Можно ли повторить задачу после attempt неудачных попыток, последняя из которых — класса kind."""
+        return attempt < self.attempts.get(kind, 1)
+
+    def delay(self, kind: str, attempt: int) -> float:
+        ceiling = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(0, ceiling * ERROR_DELAY_FACTORS.get(kind, 1.0))
+
+
+def circuit_scope(url: str, depth: int = CIRCUIT_SCOPE_DEPTH) -> str:
+    """Ветка URL для размыкателя: хост и первые depth сегментов пути."""
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split("/") if segment][:depth]
+    return "/".join([parts.netloc.lower(), *segments])
+
+
+class CircuitBreaker:
+    """
+    Размыкатель по ветке каталога (circuit_scope: хост и первые scope_depth сегментов пути).
+
+    Неудачные попытки считаются по всем URL ветки: после failure_threshold неудач подряд
+    (успех любого URL ветки сбрасывает счётчик) ветка считается сломанной и в течение
+    reset_timeout секунд не загружается вовсе. URL при обходе не повторяются, а попыток
+    на один URL меньше порога, поэтому счёт по отдельному URL цепь бы не размыкал.
+    По истечении reset_timeout даётся одна пробная попытка: успех сбрасывает счётчик,
+    неудача снова размыкает цепь.
+
+    Args:
+        failure_threshold (int): Неудач подряд, после которых цепь размыкается.
+        reset_timeout (float): Время (сек.), на которое ветка исключается из обхода.
+        scope_depth (int): Сегментов пути в ключе ветки.
+    """
+
+    def __init__(
+            self,
+            failure_threshold: int = 5,
+            reset_timeout: float = 300.0,
+            scope_depth: int = CIRCUIT_SCOPE_DEPTH
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.scope_depth = scope_depth
+        self.failures: dict[str, int] = {}
+        self.opened_at: dict[str, float] = {}
+        self.rejected = 0
+
+    def allow(self, key: str) -> bool:
+        """Можно ли загружать URL key сейчас."""
+        scope = circuit_scope(key, self.scope_depth)
+        opened_at = self.opened_at.get(scope)
+        if opened_at is None:
+            return True
+        if time.monotonic() - opened_at >= self.reset_timeout:
+            # Пробная попытка: при неудаче цепь снова разомкнётся сразу
+            del self.opened_at[scope]
+            self.failures[scope] = self.failure_threshold - 1
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self, key: str) -> None:
+        self.failures.pop(circuit_scope(key, self.scope_depth), None)
+
+    def record_failure(self, key: str) -> None:
+        scope = circuit_scope(key, self.scope_depth)
+        self.failures[scope] = self.failures.get(scope, 0) + 1
+        if self.failures[scope] >= self.failure_threshold and scope not in self.opened_at:
+            print(f"Ветка {scope} отключена на {self.reset_timeout:.0f} сек. после {self.failures[scope]} ошибок подряд")
+            self.opened_at[scope] = time.monotonic()
+
+    @property
+    def open_count(self) -> int:
+        return len(self.opened_at)
+
+
+class DeadLetters:
+    """
+    Список задач, от которых отказались окончательно: ключ, название, класс и текст последней ошибки,
+    количество попыток. Сохраняется в JSON, чтобы повторить только их.
+    """
+
+    def __init__(self):
+        self.items: list[dict] = []
+
+    def add(self, key: str, name: str, kind: str, error: BaseException | None, attempts: int) -> None:
+        self.items.append({
+            "key": key,
+            "name": name,
+            "kind": kind,
+            "error": str(error) if error else "",
+            "attempts": attempts,
+        })
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def export_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.items, f, ensure_ascii=False, indent=2)
+
+
+class RetryEngine:
+    """
+    Выполняет задачу с повторами по RetryPolicy, размыкателем CircuitBreaker и списком DeadLetters.
+
+    Задача, которая не удалась после всех попыток своего класса ошибки (или ветка которой
+    отключена размыкателем), попадает в dead_letters, а вызывающему возвращается None —
+    одна сломанная категория не останавливает и не задерживает обход остальных.
+
+    Использование:
+        retry = RetryEngine()
+        result = await retry.run(url, lambda: page_pool.use(task), name=category['name'])
+        ...
+        retry.print_summary()
+
+    Args:
+        policy (RetryPolicy | None): Паузы и количество попыток.
+        breaker (CircuitBreaker | None): Размыкатель по ветке URL задачи.
+    """
+
+    def __init__(self, policy: RetryPolicy | None = None, breaker: CircuitBreaker | None = None):
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.dead_letters = DeadLetters()
+        self.errors: dict[str, int] = {}
+        self.retries = 0
+        self.recovered = 0
+        self.waited = 0.0
+
+    def _failed(self, key: str, name: str, error: BaseException, attempt: int) -> float | None:
+        """Учитывает неудачную попытку и возвращает паузу перед следующей или None, если повторять не нужно."""
+        kind = classify_error(error)
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+        self.breaker.record_failure(key)
+        print(f"Попытка {attempt} для {name} не удалась ({kind}): {str(error)}")
+
+        if not self.policy.should_retry(kind, attempt) or not self.breaker.allow(key):
+            print(f"Отказ от {name} после {attempt} попыток ({kind})")
+            self.dead_letters.add(key, name, kind, error, attempt)
+            return None
+
+        self.retries += 1
+        delay = self.policy.delay(kind, attempt)
+        self.waited += delay
+        return delay
+
+    def _rejected(self, key: str, name: str) -> None:
+        print(f"Пропуск {name}: ветка отключена после повторяющихся ошибок")
+        self.dead_letters.add(key, name, "circuit_open", None, 0)
+
+    def _succeeded(self, key: str, attempt: int) -> None:
+        self.breaker.record_success(key)
+        if attempt > 1:
+            self.recovered += 1
+
+    async def run(self, key: str, task: Callable[[], Awaitable[Any]], name: str | None = None) -> Any:
+        """
+        Выполняет await task() с повторами. Возвращает её результат или None, если задача не удалась.
+
+        Args:
+            key (str): URL задачи (по нему определяется ветка размыкателя).
+            task (Callable[[], Awaitable[Any]]): Функция без аргументов, создающая новую попытку.
+            name (str | None): Название задачи для вывода и dead_letters.
+        """
+        name = name or key
+        if not self.breaker.allow(key):
+            self._rejected(key, name)
+            return None
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = await task()
+            except FatalError:
+                raise
+            except Exception as e:
+                delay = self._failed(key, name, e, attempt)
+                if delay is None:
+                    return None
+                await asyncio.sleep(delay)
+                continue
+            self._succeeded(key, attempt)
+            return result
+
+    def print_summary(self) -> None:
+        """Выводит ошибки по классам, повторы, восстановленные и окончательно неудачные задачи."""
+        errors = ", ".join(f"{kind} {count}" for kind, count in sorted(self.errors.items())) or "нет"
+        print(
+            f"Повторы: ошибок [{errors}], повторов {self.retries} (ожидание {self.waited:.1f} сек.), "
+            f"удались после повтора {self.recovered}, отказано {len(self.dead_letters)}, "
+            f"отключено веток {self.breaker.open_count}"
+        )
+        for item in self.dead_letters.items:
+            print(f"  {item['name']} ({item['kind']}, попыток {item['attempts']}): {item['error']}")
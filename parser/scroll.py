@@ -0,0 +1,137 @@
+import time
+import statistics
+
+CARD_SELECTOR = "article.j-card-item"
+
+# Ожидает подгрузку карточек внутри страницы: MutationObserver следит за ростом списка,
+# IntersectionObserver докручивает страницу, когда последняя карточка попадает в область видимости.
+# Promise завершается, как только карточек стало не меньше target ("target"), либо список
+# не меняется в течение адаптивного окна ("stable"), либо истёк общий таймаут ("timeout").
+# Окно стабильности — удвоенный средний интервал между подгрузками в пределах [minStable, maxStable].
+SCROLL_OBSERVER_SCRIPT = """
+({selector, target, minStable, maxStable, timeout}) => new Promise(resolve => {
+    const started = performance.now();
+    const cards = () => document.querySelectorAll(selector);
+    const gaps = [];
+    let lastCount = cards().length;
+    let lastChange = started;
+    let stableWindow = minStable;
+    let stableTimer = null;
+    let deadlineTimer = null;
+    let mutationObserver = null;
+    let intersectionObserver = null;
+    let settled = false;
+
+    const finish = reason => {
+        if (settled) return;
+        settled = true;
+        mutationObserver && mutationObserver.disconnect();
+        intersectionObserver && intersectionObserver.disconnect();
+        clearTimeout(stableTimer);
+        clearTimeout(deadlineTimer);
+        resolve({count: cards().length, reason, elapsed: performance.now() - started});
+    };
+    const armStableTimer = () => {
+        clearTimeout(stableTimer);
+        if (lastCount > 0) stableTimer = setTimeout(() => finish('stable'), stableWindow);
+    };
+    const followLastCard = () => {
+        const list = cards();
+        intersectionObserver.disconnect();
+        if (list.length) {
+            const last = list[list.length - 1];
+            intersectionObserver.observe(last);
+            last.scrollIntoView({block: 'end'});
+        }
+    };
+
+    intersectionObserver = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) window.scrollBy(0, window.innerHeight);
+    });
+    mutationObserver = new MutationObserver(() => {
+        const count = cards().length;
+        if (count === lastCount) return;
+        const now = performance.now();
+        gaps.push(now - lastChange);
+        lastChange = now;
+        lastCount = count;
+        const meanGap = gaps.reduce((sum, gap) => sum + gap, 0) / gaps.length;
+        stableWindow = Math.min(maxStable, Math.max(minStable, 2 * meanGap));
+        if (count >= target) return finish('target');
+        followLastCard();
+        armStableTimer();
+    });
+
+    const container = document.querySelector('.product-card-list') || document.body;
+    mutationObserver.observe(container, {childList: true, subtree: true});
+    deadlineTimer = setTimeout(() => finish('timeout'), timeout);
+    if (lastCount >= target) return finish('target');
+    followLastCard();
+    armStableTimer();
+})
+"""
+
+# Та же функция для Selenium: execute_async_script передаёт результат через последний аргумент
+SELENIUM_SCROLL_OBSERVER_SCRIPT = f"""
+const done = arguments[arguments.length - 1];
+({SCROLL_OBSERVER_SCRIPT})(arguments[0]).then(done);
+"""
+
+# Та же функция для DrissionPage: run_js оборачивает скрипт в function(){...} и дожидается Promise
+DRISSIONPAGE_SCROLL_OBSERVER_SCRIPT = f"return ({SCROLL_OBSERVER_SCRIPT})(arguments[0]);"
+
+
+def scroll_options(
+        target: int,
+        min_stable: int = 150,
+        max_stable: int = 1500,
+        timeout: int = 15000
+) -> dict:
+    """
+    Формирует аргумент для SCROLL_OBSERVER_SCRIPT.
+
+    Args:
+        target: Сколько карточек ожидается на странице.
+        min_stable: Нижняя граница окна стабильности (мс).
+        max_stable: Верхняя граница окна стабильности (мс).
+        timeout: Общий таймаут ожидания (мс).
+    """
+    return {
+        "selector": CARD_SELECTOR,
+        "target": target,
+        "minStable": min_stable,
+        "maxStable": max_stable,
+        "timeout": timeout,
+    }
+
+
+class ScrollLatency:
+    """
+    Накопитель времени прокрутки страниц по способам ("polling", "observer") для сравнения.
+    """
+
+    def __init__(self):
+        self.samples: dict[str, list[tuple[float, int]]] = {}
+
+    def measure(self, method: str):
+        """Возвращает функцию-финализатор, которая записывает время с момента вызова measure."""
+        start_time = time.perf_counter()
+
+        def _stop(count: int) -> float:
+            elapsed = time.perf_counter() - start_time
+            self.samples.setdefault(method, []).append((elapsed, count))
+            print(f"Прокрутка ({method}): {count} карточек за {elapsed:.3f} сек.")
+            return elapsed
+
+        return _stop
+
+    def print_summary(self) -> None:
+        """Выводит среднее, медиану и максимум задержки по каждому способу."""
+        for method, samples in self.samples.items():
+            latencies = [elapsed for elapsed, _ in samples]
+            print(
+                f"Прокрутка ({method}): страниц {len(samples)}, "
+                f"среднее {statistics.mean(latencies):.3f} сек., "
+                f"медиана {statistics.median(latencies):.3f} сек., "
+                f"максимум {max(latencies):.3f} сек."
+            )
@@ -0,0 +1,75 @@
+import os
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Awaitable, Callable
+
+ShardWorker = Callable[[list], Awaitable[list]]
+
+
+def split_shards(count: int, shards: int) -> list[list[int]]:
+    """
+    Делит индексы 0..count-1 на shards частей по кругу (0, n, 2n, ... в первую часть и т.д.),
+    чтобы соседние по списку (и часто похожие по размеру) элементы попадали в разные процессы.
+    Пустые части отбрасываются.
+    """
+    return [indexes for indexes in (list(range(start, count, shards)) for start in range(shards)) if indexes]
+
+
+def _run_shard(worker: ShardWorker, items: list) -> tuple[list, float]:
+    """Выполняется в дочернем процессе: свой цикл событий (и свой браузер внутри worker)."""
+    start_time = time.perf_counter()
+    result = asyncio.run(worker(items))
+    return result, time.perf_counter() - start_time
+
+
+def run_sharded(worker: ShardWorker, items: list, processes: int | None = None) -> list[Any]:
+    """
+    Запускает асинхронную функцию worker на частях списка items в отдельных процессах.
+
+    worker получает свою часть элементов и должен вернуть список результатов той же длины
+    и в том же порядке (None — элемент не обработан). Результаты собираются обратно в порядке items.
+    Процессы запускаются методом spawn (браузер и цикл событий нельзя наследовать через fork),
+    поэтому worker должен быть функцией уровня модуля, а запуск — под if __name__ == "__main__".
+
+    Args:
+        worker (ShardWorker): Асинхронная функция обработки части элементов.
+        items (list): Элементы для обработки (должны сериализоваться pickle).
+        processes (int | None): Количество процессов (по умолчанию количество ядер).
+
+    Returns:
+        list[Any]: Результаты в порядке items; для упавших частей — None.
+    """
+    processes = processes or os.cpu_count() or 1
+    shards = split_shards(len(items), processes)
+    merged: list[Any] = [None] * len(items)
+    shard_times = []
+
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = {
+            executor.submit(_run_shard, worker, [items[index] for index in indexes]): (number, indexes)
+            for number, indexes in enumerate(shards)
+        }
+        for future in as_completed(futures):
+            number, indexes = futures[future]
+            try:
+                result, elapsed = future.result()
+            except Exception as e:
+                print(f"Часть {number} ({len(indexes)} эл.) завершилась с ошибкой: {e}")
+                continue
+            shard_times.append(elapsed)
+            print(f"Часть {number}: {len(indexes)} эл. за {elapsed:.2f} сек.")
+            for index, value in zip(indexes, result):
+                merged[index] = value
+
+    wall_time = time.perf_counter() - start_time
+    if shard_times and wall_time:
+        print(
+            f"Процессов: {len(shards)}, общее время {wall_time:.2f} сек., "
+            f"сумма времени частей {sum(shard_times):.2f} сек., "
+            f"ускорение x{sum(shard_times) / wall_time:.1f}, "
+            f"самая долгая часть {max(shard_times):.2f} сек."
+        )
+    return merged
@@ -1,3 +1,868 @@
-from django.test import TestCase
+import os
+import re
+import time
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+from parser import browser_pool, page_pool, sharding
+from parser.asset_cache import CACHEABLE_URL_PATTERN, FINGERPRINTED_LIFETIME, AssetCache, cache_lifetime
+from parser.blocking import BandwidthMeter, profile_url_patterns
+from parser.browser_pool import BrowserPool, PooledBrowser
+from parser.concurrency import AdaptiveLimiter, ThrottledError
+from parser.crawler import engine
+from parser.crawler.checkpoint import CheckpointStore
+from parser.crawler.engine import CategoryCrawler
+from parser.crawler.frontier import Frontier
+from parser.crawler.handlers import child_node
+from parser.crawler.refresh import TreeCache, fingerprint
+from parser.crawler.urls import TARGET_URL, canonical_url
+from parser.extract import BACKENDS, extract_cards, normalize_cards
+from parser.memory import MemoryWatchdog, measure_processes
+from parser.models import Category, Item
+from parser.page_pool import PagePool, PagePoolError
+from parser.readiness import ReadinessStats, navigate
+from parser.retry import (
+    ERROR_ATTEMPTS, CircuitBreaker, FatalError, RetryEngine, RetryPolicy, SelectorMissError, circuit_scope,
+    classify_error
+)
+from parser.sharding import run_sharded, split_shards
+from parser.writer import CategoryTreeWriter, ItemStreamWriter
+from scripts.parser_script_playwright import parse_search_payload
+
+CARD_HTML = (
+    '<article class="product-card j-card-item" data-nm-id="{id}">'
+    '<span class="product-card__name"><span class="product-card__name-separator"> / </span>{title}</span>'
+    '<ins class="price__lower-price wallet-price">{price}</ins>{old_price}'
+    '{rating}<span class="product-card__count">{reviews}</span>'
+    '</article>'
+)
+PAGE_HTML = "<html><body><div class=\"catalog\">{}</div></body></html>".format("".join([
+    CARD_HTML.format(
+        id=1, title="Молд &amp; форма", price="1\xa0234,50\xa0р.", old_price="<del>2 000 р.</del>",
+        rating='<span class="address-rate-mini address-rate-mini--sm">4,8</span>', reviews="1 024 оценки"
+    ),
+    CARD_HTML.format(id=2, title="Форма", price="99 р.", old_price="", rating="", reviews=""),
+]))
+
+
+def make_node(name: str, children: list[dict] | None = None, parent: list[str] | None = None, **extra) -> dict:
+    """Узел дерева обхода с заполненными parent и level у всех потомков."""
+    parent = parent or []
+    node = {'name': name, 'url': f"/{name}", 'parent': parent, 'level': len(parent) + 1, 'subcategories': [], **extra}
+    for child in children or []:
+        node['subcategories'].append(make_node(parent=parent + [name], **child))
+    return node
+
+
+def tree_names(nodes: list[dict]) -> list:
+    return [(node['name'], tree_names(node['subcategories'])) for node in nodes]
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.url = None
+        self.main_frame = object()
+
+    def on(self, *args):
+        pass
+
+    def is_closed(self) -> bool:
+        return False
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+        self.closed = False
+
+    def on(self, *args):
+        pass
+
+    async def new_page(self) -> FakePage:
+        return FakePage(self)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeSite:
+    """Дерево категорий сайта (путь → дочерние пути) и страницы, которые не загружаются."""
+
+    def __init__(self, tree: dict[str, list[str]]):
+        self.tree = tree
+        self.broken: set[str] = set()
+        self.loaded: list[str] = []
+
+    async def navigate(self, page: FakePage, url: str, *args, **kwargs) -> str | None:
+        await asyncio.sleep(0)
+        path = url.removeprefix(TARGET_URL)
+        if path in self.broken:
+            raise RuntimeError(f"не загрузилась {path}")
+        self.loaded.append(path)
+        page.url = path
+        return "list" if self.tree[path] else None
+
+    async def handler(self, page: FakePage, node: dict) -> list[dict]:
+        return [child_node(node, path.strip('/'), path) for path in self.tree[page.url]]
+
+
+class FakeBrowser:
+    async def new_context(self) -> FakeContext:
+        return FakeContext()
+
+    async def close(self) -> None:
+        pass
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = mock.Mock(launch=mock.AsyncMock(side_effect=lambda **kwargs: FakeBrowser()))
+
+
+class SearchPayloadTests(SimpleTestCase):
+    def test_dict_payload(self):
+        payload = {"data": {"products": [
+            {"id": 1, "name": "Молд", "sizes": [{"price": {"product": 123450, "basic": 200000}}],
+             "reviewRating": 4.8, "feedbacks": 12},
+            {"id": 2, "name": "Форма", "salePriceU": 9900, "priceU": 9900},
+            {"id": 3, "name": "Без цены", "sizes": []},
+        ]}}
+        first, second = parse_search_payload(payload, "RUB")
+        self.assertEqual(first["price"], Decimal("1234.5"))
+        self.assertEqual(first["discounted_price"], Decimal("2000"))
+        self.assertEqual((first["rating"], first["reviews_count"], first["article_id"]), (4.8, 12, "1"))
+        self.assertEqual(first["currency"], "RUB")
+        self.assertEqual(second["price"], Decimal("99"))
+        self.assertIsNone(second["discounted_price"])
+        self.assertEqual(second["reviews_count"], 0)
+
+    def test_payload_without_data(self):
+        products = parse_search_payload({"products": [{"id": 5, "name": "Молд", "salePriceU": 500}]})
+        self.assertEqual([product["article_id"] for product in products], ["5"])
+        self.assertEqual(parse_search_payload({"data": None, "state": 0}), [])
+
+    def test_list_payload(self):
+        self.assertEqual(parse_search_payload([{"products": []}]), [])
+
+
+class ExtractBackendsTests(SimpleTestCase):
+    def test_backends_agree(self):
+        raw = {name: backend(PAGE_HTML) for name, backend in BACKENDS.items()}
+        self.assertEqual(raw["regex"], raw["lxml"])
+        self.assertEqual(raw["regex"][0]["title"], "Молд & форма")
+        self.assertEqual(raw["regex"][0]["article_id"], "1")
+
+        first, second = extract_cards(PAGE_HTML, "lxml")
+        self.assertEqual((first["price"], first["discounted_price"]), (Decimal("1234.50"), Decimal("2000")))
+        self.assertEqual((first["rating"], first["reviews_count"]), (4.8, 1024))
+        self.assertIsNone(second["rating"])
+
+
+class NormalizeCardsTests(SimpleTestCase):
+    def test_numbers_are_parsed(self):
+        records = [
+            {"article_id": "1", "title": "Молд", "price": "1 234,50 р.", "discounted_price": "2\xa0000 р.",
+             "rating": "4,8", "reviews_count": "1 024 оценки"},
+            {"article_id": "2", "title": "Форма", "price": "99 р.", "discounted_price": None,
+             "rating": None, "reviews_count": None},
+        ]
+        first, second = normalize_cards(records)
+        self.assertEqual(first["price"], 1234.5)
+        self.assertEqual(first["discounted_price"], 2000)
+        self.assertEqual(first["rating"], 4.8)
+        self.assertEqual(first["reviews_count"], 1024)
+        self.assertEqual(first["currency"], "BYN")
+        self.assertIsNone(second["discounted_price"])
+        self.assertIsNone(second["rating"])
+        self.assertEqual(second["reviews_count"], 0)
+
+    def test_empty(self):
+        self.assertEqual(normalize_cards([]), [])
+
+
+@mock.patch('builtins.print', mock.Mock())
+class ItemStreamWriterTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(Item.objects, 'bulk_create')
+        self.bulk_create = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def batch_sizes(self) -> list[int]:
+        return [len(call.args[0]) for call in self.bulk_create.call_args_list]
+
+    def test_flush_by_count(self):
+        async def scenario():
+            async with ItemStreamWriter(batch_size=3, flush_interval=3600) as writer:
+                await writer.put_many([{"title": str(index), "price": index} for index in range(7)])
+                while self.bulk_create.call_count < 2:
+                    await asyncio.sleep(0.01)
+                self.assertEqual(self.batch_sizes(), [3, 3])
+
+        asyncio.run(scenario())
+        self.assertEqual(self.batch_sizes(), [3, 3, 1])
+
+    def test_flush_by_interval(self):
+        async def scenario():
+            async with ItemStreamWriter(batch_size=100, flush_interval=0.05) as writer:
+                await writer.put_many([{"title": "a", "price": 1}, {"title": "b", "price": 2}])
+                await asyncio.sleep(0.3)
+                self.assertEqual(self.batch_sizes(), [2])
+
+        asyncio.run(scenario())
+        self.assertEqual(self.batch_sizes(), [2])
+
+
+@mock.patch.object(browser_pool, 'child_pids', mock.Mock(return_value=set()))
+@mock.patch.object(browser_pool, 'browser_root_pids', mock.Mock(return_value={1}))
+@mock.patch('builtins.print', mock.Mock())
+class BrowserPoolTests(SimpleTestCase):
+    def test_context_recycled_after_navigations(self):
+        async def scenario():
+            async with BrowserPool(FakePlaywright(), browsers=1, contexts_per_browser=2, max_navigations=2,
+                                   max_memory_mb=0) as pool:
+                pooled = await pool.checkout()
+                pooled.navigations = 2
+                await pool.checkin(pooled)
+                self.assertTrue(pooled.context.closed)
+                self.assertEqual(pool.contexts_recycled, 1)
+                self.assertEqual(pool.free.qsize(), 2)
+
+        asyncio.run(scenario())
+
+    def test_memory_sampled_on_interval_and_reported_from_last_sample(self):
+        async def scenario():
+            async with BrowserPool(FakePlaywright(), browsers=1, contexts_per_browser=2, max_memory_mb=100) as pool:
+                with mock.patch.object(PooledBrowser, 'memory_mb', return_value=50.0) as memory_mb:
+                    for _ in range(3):
+                        async with pool.context():
+                            pass
+                    self.assertEqual(pool.stats()["memory_mb"], {0: 50.0})
+                    self.assertEqual(memory_mb.call_count, 1)
+
+                    memory_mb.return_value = 500.0
+                    pool.browsers[0].memory_checked_at = float('-inf')
+                    async with pool.context():
+                        pass
+                self.assertEqual(pool.browsers_recycled, 1)
+                self.assertEqual(pool.stats()["memory_mb"], {0: None})
+                self.assertEqual(pool.free.qsize(), 2)
+
+        asyncio.run(scenario())
+
+
+@mock.patch.object(page_pool, 'REPLACE_RETRY_DELAY', 0)
+@mock.patch('builtins.print', mock.Mock())
+class PagePoolTests(SimpleTestCase):
+    def test_crashed_page_is_replaced(self):
+        async def scenario():
+            async with PagePool(FakeContext(), size=2) as pool:
+                pooled = await pool.checkout()
+                pooled.crashed = True
+                await pool.checkin(pooled)
+                self.assertEqual(pool.replaced["crash"], 1)
+                self.assertNotIn(pooled, pool.pages)
+                self.assertEqual(pool.free.qsize(), 2)
+
+        asyncio.run(scenario())
+
+    def test_replacement_failure_breaks_pool(self):
+        async def scenario():
+            context = FakeContext()
+            async with PagePool(context, size=2) as pool:
+                context.new_page = mock.AsyncMock(side_effect=PlaywrightError("Target closed"))
+                pooled, _ = await pool.checkout(), await pool.checkout()
+                with self.assertRaises(PagePoolError):
+                    await pool.checkin(pooled, "hang")
+                self.assertEqual(context.new_page.call_count, page_pool.REPLACE_ATTEMPTS)
+                with self.assertRaises(PagePoolError):
+                    await pool.checkout()
+                with self.assertRaises(PagePoolError):
+                    await pool.recycle()
+
+        asyncio.run(scenario())
+
+
+class ThreadExecutor(ThreadPoolExecutor):
+    """Замена ProcessPoolExecutor в тестах: части выполняются в потоках текущего процесса."""
+
+    def __init__(self, max_workers: int, mp_context=None):
+        super().__init__(max_workers)
+
+
+async def shard_worker(items: list[int]) -> list[int]:
+    if -1 in items:
+        raise RuntimeError("часть с элементом -1")
+    # Первая часть завершается последней, чтобы порядок завершения отличался от порядка частей
+    await asyncio.sleep(0.05 if items[0] == 0 else 0)
+    return [item * 10 for item in items]
+
+
+@mock.patch.object(sharding, 'ProcessPoolExecutor', ThreadExecutor)
+@mock.patch('builtins.print', mock.Mock())
+class ShardingTests(SimpleTestCase):
+    def test_split_is_balanced(self):
+        shards = split_shards(10, 3)
+        self.assertEqual(shards, [[0, 3, 6, 9], [1, 4, 7], [2, 5, 8]])
+        self.assertLessEqual(max(map(len, shards)) - min(map(len, shards)), 1)
+        self.assertEqual(sorted(sum(shards, [])), list(range(10)))
+        self.assertEqual(split_shards(2, 4), [[0], [1]])
+
+    def test_merge_keeps_order(self):
+        self.assertEqual(run_sharded(shard_worker, list(range(8)), processes=2), [0, 10, 20, 30, 40, 50, 60, 70])
+
+    def test_failed_shard_gives_none(self):
+        self.assertEqual(run_sharded(shard_worker, [0, 1, 2, -1, 4, 5], processes=3), [None, 10, 20, None, 40, 50])
+
+
+def blocked_by_patterns(url: str, patterns: list[str]) -> bool:
+    """Проверка URL шаблонами Network.setBlockedURLs ("*" — любая последовательность символов)."""
+    return any(re.fullmatch(re.escape(pattern).replace(r"\*", ".*"), url) for pattern in patterns)
+
+
+class BlockingTests(SimpleTestCase):
+    def test_profile_patterns(self):
+        patterns = profile_url_patterns("minimal")
+        for url in (
+                "https://mc.yandex.ru/watch/1",
+                "https://sub.mc.yandex.ru/metrika/tag.js",
+                "https://yandex.ru/ads/system/context.js",
+                "https://www.wildberries.by/static/app.css?v=1",
+                "https://static.wbstatic.net/i/logo.svg",
+        ):
+            self.assertTrue(blocked_by_patterns(url, patterns), url)
+        for url in (
+                "https://www.wildberries.by/catalog/obuv?ref=mc.yandex.ru",
+                "https://www.wildberries.by/?utm_source=google-analytics.com",
+                "https://yandex.ru/search",
+                "https://www.wildberries.by/catalog/file.css.html",
+                "https://search.wb.ru/exactmatch/ru/common/v4/search?query=svg",
+        ):
+            self.assertFalse(blocked_by_patterns(url, patterns), url)
+
+    def test_bandwidth_from_content_length(self):
+        meter = BandwidthMeter("default")
+        for headers in ({"content-length": "1024"}, {"content-length": "2048"}, {}):
+            meter._on_response(mock.Mock(headers=headers))
+        meter._on_failed(mock.Mock(failure="net::ERR_BLOCKED_BY_CLIENT"))
+        meter._on_failed(mock.Mock(failure="net::ERR_TIMED_OUT"))
+        meter.page_ready(1.5)
+        stats = meter.stats()
+        self.assertEqual((stats["requests"], stats["blocked"], stats["failed"]), (3, 1, 1))
+        self.assertEqual(meter.bytes, 3072)
+        self.assertEqual(meter.unknown_sizes, 1)
+        self.assertEqual(stats["megabytes_per_page"], 3072 / (1024 * 1024))
+
+
+class AssetCacheTests(SimpleTestCase):
+    def test_only_immutable_or_fingerprinted_assets_are_cacheable(self):
+        plain = "https://static.wbstatic.net/app.js"
+        self.assertEqual(cache_lifetime(plain, {"cache-control": "public, max-age=31536000, immutable"}), 31536000)
+        self.assertEqual(cache_lifetime(plain, {"cache-control": "max-age=604800"}), 604800)
+        self.assertEqual(cache_lifetime("https://static.wbstatic.net/main.4f1a2b3c9d.js", {}), FINGERPRINTED_LIFETIME)
+        self.assertEqual(cache_lifetime(plain + "?v=12", {}), FINGERPRINTED_LIFETIME)
+        self.assertIsNone(cache_lifetime(plain, {}))
+        self.assertIsNone(cache_lifetime(plain, {"cache-control": "max-age=600"}))
+        self.assertIsNone(cache_lifetime("https://static.wbstatic.net/main.4f1a2b3c9d.js", {"cache-control": "no-store"}))
+        self.assertIsNone(cache_lifetime(plain + "?v=12", {"cache-control": "max-age=60"}))
+
+    def test_route_pattern_matches_static_assets_only(self):
+        for url in ("https://a.wb.ru/app.js", "https://a.wb.ru/main.CSS?v=1", "https://a.wb.ru/font.woff2"):
+            self.assertTrue(CACHEABLE_URL_PATTERN.search(url), url)
+        for url in (
+                "https://www.wildberries.by/catalog/obuv",
+                "https://search.wb.ru/exactmatch/ru/common/v4/search?query=app.js",
+                "https://www.wildberries.by/api/menu.json",
+        ):
+            self.assertFalse(CACHEABLE_URL_PATTERN.search(url), url)
+
+    def test_store_and_expire(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = AssetCache(directory)
+            cache.store("https://a.wb.ru/app.js", 200, {"content-type": "text/javascript", "date": "x"}, b"js", 60)
+            cache.store("https://a.wb.ru/copy.js", 200, {}, b"js", 60)
+            meta, body = cache.load("https://a.wb.ru/app.js")
+            self.assertEqual((meta["status"], meta["headers"], body), (200, {"content-type": "text/javascript"}, b"js"))
+            self.assertEqual(sum(len(files) for _, _, files in os.walk(os.path.join(directory, "blobs"))), 1)
+            with mock.patch('parser.asset_cache.time.time', return_value=time.time() + 120):
+                self.assertIsNone(cache.load("https://a.wb.ru/app.js"))
+            self.assertEqual(cache.expired, 1)
+
+
+class RenderedPage:
+    """
+    Вкладка с уже отрисованными элементами: CSS-селектор (как в PAGE_TYPES) → текст элемента.
+    wait_for_function проверяет признаки типов страниц так же, как PAGE_TYPE_SCRIPT.
+    """
+
+    def __init__(self, elements: dict[str, str], status: int = 200):
+        self.elements = elements
+        self.status = status
+
+    async def goto(self, url: str, **kwargs):
+        return mock.Mock(status=self.status, url=url)
+
+    async def wait_for_function(self, script: str, arg: list, timeout: float):
+        for name, selector, text in arg:
+            for part in selector.split(","):
+                element_text = self.elements.get(part.strip())
+                if element_text is not None and (not text or text in element_text):
+                    return mock.Mock(json_value=mock.AsyncMock(return_value=name))
+        raise PlaywrightTimeoutError("Timeout exceeded")
+
+
+class ReadinessTests(SimpleTestCase):
+    def page_type(self, elements: dict[str, str], stats: ReadinessStats | None = None) -> str | None:
+        return asyncio.run(navigate(RenderedPage(elements), "/catalog", stats=stats, timeout=10))
+
+    def test_menu_takes_priority_over_cards(self):
+        elements = {"ul.menu-category__list li.menu-category__item": "Обувь", "article.j-card-item": "Молд"}
+        self.assertEqual(self.page_type(elements), "list")
+        self.assertEqual(self.page_type({"article.j-card-item": "Молд"}), "search_results")
+
+    def test_filter_requires_text(self):
+        self.assertEqual(self.page_type({"div.dropdown-filter": "Категория"}), "dropdown_filter")
+        stats = ReadinessStats()
+        with self.assertRaises(PlaywrightTimeoutError):
+            self.page_type({"div.dropdown-filter": "Цена"}, stats)
+        self.assertEqual(stats.timeouts, {"ready": 1})
+
+    def test_empty_listing_is_ready(self):
+        stats = ReadinessStats()
+        self.assertEqual(self.page_type({"div.catalog-page__not-found": "Ничего не нашлось"}, stats), "empty_listing")
+        self.assertEqual(list(stats.samples), [("ready", "empty_listing")])
+
+    def test_throttled_response(self):
+        with self.assertRaises(ThrottledError):
+            asyncio.run(navigate(RenderedPage({}, status=429), "/catalog"))
+
+
+class AdaptiveLimiterTests(SimpleTestCase):
+    def test_increase_after_limit_successes(self):
+        async def scenario():
+            limiter = AdaptiveLimiter(initial=2, maximum=3, latency_target=1.0)
+            for _ in range(2):
+                async with limiter.slot():
+                    pass
+            self.assertEqual(limiter.limit, 3)
+            for _ in range(6):
+                async with limiter.slot():
+                    pass
+            self.assertEqual(limiter.limit, 3)
+
+        asyncio.run(scenario())
+
+    def test_no_increase_when_slow(self):
+        async def scenario():
+            limiter = AdaptiveLimiter(initial=2, latency_target=1.0)
+            for _ in range(4):
+                await limiter.acquire()
+                await limiter.release(5.0)
+            self.assertEqual(limiter.limit, 2)
+
+        asyncio.run(scenario())
+
+    def test_decrease_with_cooldown(self):
+        async def scenario():
+            limiter = AdaptiveLimiter(initial=8, cooldown=3600)
+            for _ in range(3):
+                with self.assertRaises(ThrottledError):
+                    async with limiter.slot():
+                        raise ThrottledError(429, "/catalog")
+            self.assertEqual(limiter.limit, 4)
+            self.assertEqual([event for *_, event in limiter.history], ["start", "decrease:ThrottledError"])
+
+            limiter._last_decrease -= 3600
+            await limiter.acquire()
+            await limiter.release(0.1, asyncio.TimeoutError())
+            self.assertEqual(limiter.limit, 2)
+            self.assertEqual(limiter.in_flight, 0)
+
+        asyncio.run(scenario())
+
+    def test_slot_waits_for_limit(self):
+        async def scenario():
+            limiter = AdaptiveLimiter(initial=1, maximum=1)
+            await limiter.acquire()
+            waiting = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0.01)
+            self.assertFalse(waiting.done())
+            await limiter.release(0.1)
+            await asyncio.wait_for(waiting, 1)
+            self.assertEqual(limiter.in_flight, 1)
+
+        asyncio.run(scenario())
+
+
+@mock.patch('builtins.print', mock.Mock())
+class RetryTests(SimpleTestCase):
+    def setUp(self):
+        self.retry = RetryEngine(RetryPolicy(base_delay=0))
+
+    def run_task(self, url: str, errors: list[BaseException]):
+        """Выполняет задачу, которая выбрасывает errors по очереди, а затем возвращает url."""
+        calls = []
+
+        async def task():
+            calls.append(url)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return url
+
+        return asyncio.run(self.retry.run(url, task)), len(calls)
+
+    def test_classify_error(self):
+        self.assertEqual(classify_error(ThrottledError(429, "/")), "throttled")
+        self.assertEqual(classify_error(SelectorMissError()), "selector")
+        self.assertEqual(classify_error(PlaywrightTimeoutError("Timeout 30000ms exceeded navigating")), "timeout")
+        self.assertEqual(classify_error(PlaywrightTimeoutError("waiting for locator('ul')")), "selector")
+        self.assertEqual(classify_error(asyncio.TimeoutError()), "timeout")
+        self.assertEqual(classify_error(PlaywrightError("net::ERR_CONNECTION_RESET")), "navigation")
+        self.assertEqual(classify_error(ValueError()), "other")
+
+    def test_recovers_after_retry(self):
+        self.assertEqual(self.run_task("https://wb.by/catalog/a", [asyncio.TimeoutError()]), ("https://wb.by/catalog/a", 2))
+        self.assertEqual(self.retry.recovered, 1)
+        self.assertEqual(len(self.retry.dead_letters), 0)
+
+    def test_attempt_budget_and_dead_letters(self):
+        result, calls = self.run_task("https://wb.by/catalog/a", [SelectorMissError("нет меню")] * 10)
+        self.assertIsNone(result)
+        self.assertEqual(calls, ERROR_ATTEMPTS["selector"])
+        result, calls = self.run_task("https://wb.by/catalog/b", [ValueError("сбой")])
+        self.assertEqual((result, calls), (None, 1))
+        self.assertEqual(
+            [(item["key"], item["kind"], item["attempts"]) for item in self.retry.dead_letters.items],
+            [("https://wb.by/catalog/a", "selector", 2), ("https://wb.by/catalog/b", "other", 1)]
+        )
+
+    def test_fatal_error_is_not_retried(self):
+        with self.assertRaises(FatalError):
+            self.run_task("https://wb.by/catalog/a", [FatalError()])
+
+    def test_circuit_scope(self):
+        self.assertEqual(circuit_scope("https://WB.by/catalog/obuv/zhenskaya/botinki?page=2"), "wb.by/catalog/obuv/zhenskaya")
+        self.assertEqual(circuit_scope("https://wb.by/catalog"), "wb.by/catalog")
+
+    def test_breaker_opens_across_urls_of_a_branch(self):
+        branch = "https://wb.by/catalog/obuv/zhenskaya"
+        for name in ("a", "b", "c", "d", "e"):
+            self.assertEqual(self.run_task(f"{branch}/{name}", [ValueError()]), (None, 1))
+        self.assertEqual(self.retry.breaker.open_count, 1)
+        # Следующий URL ветки не загружается вовсе, другие ветки — загружаются
+        self.assertEqual(self.run_task(f"{branch}/f", []), (None, 0))
+        self.assertEqual(self.retry.dead_letters.items[-1]["kind"], "circuit_open")
+        self.assertEqual(self.run_task("https://wb.by/catalog/obuv/muzhskaya/a", []), ("https://wb.by/catalog/obuv/muzhskaya/a", 1))
+
+    def test_breaker_resets_on_success_and_after_timeout(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+        breaker.record_failure("https://wb.by/catalog/a/b/1")
+        breaker.record_success("https://wb.by/catalog/a/b/2")
+        breaker.record_failure("https://wb.by/catalog/a/b/3")
+        self.assertEqual(breaker.open_count, 0)
+        breaker.record_failure("https://wb.by/catalog/a/b/4")
+        self.assertEqual(breaker.open_count, 1)
+        # Пробная попытка после reset_timeout: новая неудача сразу размыкает цепь
+        self.assertTrue(breaker.allow("https://wb.by/catalog/a/b/5"))
+        breaker.record_failure("https://wb.by/catalog/a/b/5")
+        self.assertEqual(breaker.open_count, 1)
+
+
+@mock.patch('builtins.print', mock.Mock())
+class MemoryWatchdogTests(SimpleTestCase):
+    def setUp(self):
+        self.sizes = {}  # имя браузера → (память процессов браузера, память рендереров)
+        patcher = mock.patch('parser.memory.measure_processes', side_effect=lambda pids: self.sizes[min(pids)])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = []
+
+    async def on_limit(self, name: str) -> None:
+        self.calls.append(name)
+
+    def test_thresholds_and_cooldown(self):
+        async def scenario():
+            watchdog = MemoryWatchdog(max_browser_mb=1000, max_renderer_mb=300, cooldown=3600)
+            watchdog.watch("big", {1}, on_browser_limit=self.on_limit)
+            watchdog.watch("renderer", {2}, on_renderer_limit=self.on_limit)
+            watchdog.watch("small", {3}, on_browser_limit=self.on_limit, on_renderer_limit=self.on_limit)
+            self.sizes.update({1: (800.0, [300.0]), 2: (200.0, [100.0, 400.0]), 3: (200.0, [250.0])})
+            await watchdog.check()
+            await watchdog.check()
+            return watchdog
+
+        watchdog = asyncio.run(scenario())
+        self.assertEqual(self.calls, ["big", "renderer"])
+        self.assertEqual(watchdog.actions, {"recycle_browser": 1, "recycle_context": 1})
+        self.assertEqual([event for *_, event in watchdog.history], ["recycle_browser", "recycle_context", ""] + [""] * 3)
+        self.assertEqual(watchdog.history[0][2:6], (1100.0, 800.0, 1, 300.0))
+
+    def test_export_csv(self):
+        watchdog = MemoryWatchdog()
+        watchdog.watch("browser", {1})
+        self.sizes[1] = (100.0, [50.0])
+        asyncio.run(watchdog.check())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "memory.csv")
+            watchdog.export_csv(path)
+            with open(path, encoding="utf-8") as f:
+                header, row = f.read().splitlines()
+        self.assertTrue(header.startswith("seconds,browser,total_mb"))
+        self.assertTrue(row.endswith(",browser,150.0,100.0,1,50.0,"))
+
+
+class MeasureProcessesTests(SimpleTestCase):
+    def test_current_process(self):
+        browser_mb, renderers = measure_processes({os.getpid()})
+        self.assertGreater(browser_mb, 0)
+        self.assertEqual(renderers, [])
+        self.assertEqual(measure_processes({2 ** 22 + 1}), (0.0, []))
+
+
+class CanonicalUrlTests(SimpleTestCase):
+    def test_relative_url_is_made_absolute(self):
+        self.assertEqual(canonical_url("/catalog/obuv"), f"{TARGET_URL}/catalog/obuv")
+
+    def test_equivalent_urls_are_equal(self):
+        expected = canonical_url("https://www.wildberries.by/catalog/obuv?b=2&a=1")
+        for url in (
+                "HTTPS://WWW.Wildberries.by//catalog/obuv/?a=1&b=2",
+                "https://www.wildberries.by/catalog/obuv/index.html?a=1&b=2#top",
+                "https://www.wildberries.by/catalog/obuv?a=1&utm_source=x&b=2&sort=popular&page=3",
+                "https://www.wildberries.by/catalog/%6Fbuv?b=2&a=1",
+        ):
+            self.assertEqual(canonical_url(url), expected, url)
+
+    def test_meaningful_params_are_kept(self):
+        self.assertNotEqual(canonical_url("/catalog/obuv?subject=1"), canonical_url("/catalog/obuv?subject=2"))
+
+    def test_root_path(self):
+        self.assertEqual(canonical_url("https://www.wildberries.by"), f"{TARGET_URL}/")
+
+
+class FrontierTests(SimpleTestCase):
+    def test_duplicate_url_becomes_link(self):
+        async def scenario():
+            frontier = Frontier()
+            owner = make_node('a', [{'name': 'x'}])
+            duplicate = make_node('b')
+            duplicate['url'] = "/a/"
+            self.assertTrue(frontier.put(owner))
+            self.assertFalse(frontier.put(duplicate))
+            self.assertEqual(duplicate['link'], "a")
+            self.assertEqual(len(frontier), 1)
+            self.assertEqual(frontier.navigations_saved, 2)
+            self.assertTrue(frontier.visit(make_node('c')))
+            self.assertEqual(len(frontier), 1)
+
+        asyncio.run(scenario())
+
+
+class CheckpointStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "checkpoint.sqlite3")
+
+    def test_round_trip_and_resume_state(self):
+        store = CheckpointStore(self.path, commit_interval=0)
+        store.open(fresh=True)
+        roots = [make_node('a'), make_node('b')]
+        for root in roots:
+            root['url'] = canonical_url(root['url'])
+        store.add_roots(roots)
+
+        a1, a2 = child_node(roots[0], 'a1', canonical_url('/a1')), child_node(roots[0], 'a2', canonical_url('/a2'))
+        roots[0]['subcategories'] = [a1, a2]
+        store.complete(roots[0], [a1, a2])
+        a1['Категория'] = 'Ошибка загрузки'
+        store.complete(a1, [])
+        link = child_node(roots[1], 'a2', canonical_url('/a2'))
+        link['link'] = 'a → a2'
+        store.complete(roots[1], [link])
+        store.close()
+
+        store = CheckpointStore(self.path)
+        store.open(fresh=False)
+        loaded_roots, queued, visited, links = store.load()
+        store.close()
+
+        self.assertEqual(tree_names(loaded_roots), [('a', [('a1', []), ('a2', [])]), ('b', [('a2', [])])])
+        # a2 ещё не обработан, a1 не загрузился — оба снова в очереди, у a1 снята отметка об ошибке
+        self.assertEqual([node['name'] for node in queued], ['a1', 'a2'])
+        self.assertNotIn('Категория', queued[0])
+        self.assertEqual(set(visited), {canonical_url(path) for path in ('/a', '/b', '/a1', '/a2')})
+        self.assertEqual([(node['link'], owner['name']) for node, owner in links], [('a → a2', 'a2')])
+
+    def test_overhead_counts_commit_once(self):
+        store = CheckpointStore(self.path, commit_interval=0)
+        store.open(fresh=True)
+        connection = store.connection
+        store.connection = mock.Mock(wraps=connection)
+        store.connection.commit.side_effect = lambda: time.sleep(0.05)
+        store.add_roots([make_node('a')])
+        store.connection = connection
+        self.assertLess(store.time_spent, 0.09)
+
+
+class TreeCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.previous = [make_node('a', [{'name': 'a1', 'children': [{'name': 'a11'}]}])]
+        for node in (self.previous[0], self.previous[0]['subcategories'][0]):
+            TreeCache.stamp(node, node['subcategories'])
+        self.cache = TreeCache(self.previous, ttl=3600, refresh_depth=1)
+
+    def test_unchanged_fingerprint(self):
+        node = make_node('a', [{'name': 'a1'}])
+        TreeCache.stamp(node, node['subcategories'])
+        self.assertTrue(self.cache.is_unchanged(node))
+        node['subcategories'].append(make_node('new', parent=['a']))
+        TreeCache.stamp(node, node['subcategories'])
+        self.assertFalse(self.cache.is_unchanged(node))
+
+    def test_node_without_fingerprint_is_not_unchanged(self):
+        self.assertFalse(self.cache.is_unchanged(make_node('a')))
+
+    def test_lookup_respects_depth_and_ttl(self):
+        self.assertIsNone(self.cache.lookup(make_node('a')))
+        a1 = make_node('a1', parent=['a'])
+        self.assertIsNotNone(self.cache.lookup(a1))
+        self.cache.ttl = 0
+        self.cache.nodes[canonical_url('/a1')]['crawled_at'] -= 1
+        self.assertIsNone(self.cache.lookup(a1))
+        self.assertEqual(self.cache.expired, 1)
+
+    def test_recover_ignores_ttl(self):
+        self.cache.ttl = 0
+        node = make_node('a1', parent=['a'])
+        children = self.cache.recover(node)
+        self.assertEqual([child['name'] for child in children], ['a11'])
+        self.assertEqual(children[0]['parent'], ['a', 'a1'])
+        self.assertEqual(node['fingerprint'], fingerprint(self.previous[0]['subcategories'][0]['subcategories']))
+        self.assertIsNone(self.cache.recover(make_node('unknown')))
+
+
+@mock.patch('parser.crawler.engine.apply_blocking', mock.AsyncMock())
+@mock.patch('parser.concurrency.AdaptiveLimiter.export_csv', mock.Mock())
+@mock.patch('parser.retry.DeadLetters.export_json', mock.Mock())
+@mock.patch('parser.memory.MemoryWatchdog.export_csv', mock.Mock())
+@mock.patch('builtins.print', mock.Mock())
+class CrawlerTests(SimpleTestCase):
+    """Обход с поддельным сайтом: контрольные точки, продолжение и обновление."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "checkpoint.sqlite3")
+        self.site = FakeSite({
+            "/a": ["/a1", "/a2"], "/a1": ["/a11"], "/a11": [], "/a2": ["/x"], "/x": [], "/b": ["/a2"],
+        })
+
+    def crawl(self, refresh: bool = False, resume: bool = False, stop_after: int | None = None) -> list[dict] | None:
+        crawler = CategoryCrawler(
+            workers=1,
+            memory_interval=3600,
+            handlers={"list": self.site.handler},
+            checkpoint_path=self.path,
+            refresh=refresh,
+            refresh_depth=1
+        )
+        crawler.checkpoint = CheckpointStore(self.path)
+        previous = crawler._load_previous_tree() if refresh else None
+        crawler.checkpoint.open(fresh=not resume)
+        if previous:
+            crawler.tree_cache = TreeCache(previous, ttl=crawler.refresh_ttl, refresh_depth=1)
+        roots = [make_node('a'), make_node('b')]
+        restored = None
+        if resume:
+            roots, *restored = crawler.checkpoint.load()
+
+        async def scenario():
+            task = asyncio.create_task(crawler.crawl(FakeContext(), roots, set(), None, restored))
+            if stop_after is None:
+                return await task
+            while len(self.site.loaded) < stop_after and not task.done():
+                await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        try:
+            with mock.patch.object(engine, 'navigate', self.site.navigate):
+                return asyncio.run(scenario())
+        finally:
+            crawler.checkpoint.close()
+
+    def test_resume_completes_interrupted_crawl(self):
+        full = tree_names(self.crawl())
+        self.site.loaded.clear()
+        self.crawl(stop_after=2)
+        interrupted = list(self.site.loaded)
+        self.site.loaded.clear()
+        self.assertEqual(tree_names(self.crawl(resume=True)), full)
+        # Обработанные до остановки страницы не загружаются снова (кроме той, что обрабатывалась в момент остановки)
+        self.assertEqual(set(interrupted) | set(self.site.loaded), {"/a", "/b", "/a1", "/a2", "/a11", "/x"})
+        self.assertLessEqual(len(self.site.loaded), 6 - len(interrupted) + 1)
+
+    def test_checkpoints_are_opt_in(self):
+        self.assertIsNone(CategoryCrawler().checkpoint_path)
+
+    def test_refresh_loads_only_changed_nodes(self):
+        self.crawl()
+        self.site.loaded.clear()
+        result = self.crawl(refresh=True)
+        self.assertEqual(sorted(self.site.loaded), ["/a", "/b"])
+        self.assertEqual(tree_names(result), [('a', [('a1', [('a11', [])]), ('a2', [('x', [])])]), ('b', [('a2', [])])])
+
+    def test_refresh_keeps_cached_subtree_when_load_fails(self):
+        self.crawl()
+        self.site.tree["/a"] = ["/a1", "/a2", "/new"]
+        self.site.tree["/new"] = []
+        self.site.broken = {"/a1"}
+        with mock.patch('parser.crawler.refresh.time.time', return_value=time.time() + 10 ** 9):
+            result = self.crawl(refresh=True)
+        a1 = result[0]['subcategories'][0]
+        self.assertNotEqual(a1.get('Категория'), 'Ошибка загрузки')
+        self.assertEqual(tree_names([a1]), [('a1', [('a11', [])])])
+
+        store = CheckpointStore(self.path)
+        store.open(fresh=False)
+        statuses = dict(store.connection.execute("SELECT status, count(*) FROM nodes GROUP BY status").fetchall())
+        store.close()
+        self.assertNotIn('queued', statuses)
+
+
+class CategoryTreeWriterTests(TestCase):
+    def setUp(self):
+        tree = [
+            make_node('a', [{'name': 'a1', 'children': [{'name': 'a11', 'Категория': 'Категорий нет'}]},
+                            {'name': 'a2', 'Категория': ['x', 'y']}]),
+            make_node('b', [{'name': 'a2', 'link': 'a → a2'}]),
+        ]
+        self.writer = CategoryTreeWriter()
+        self.writer.write(tree)
+
+    def test_tree_is_written(self):
+        self.assertEqual(self.writer.written, 6)
+        a11 = Category.objects.get(name='a11')
+        self.assertEqual((a11.path, a11.depth, a11.parent.name), ("0000/0000/0000/", 3, 'a1'))
+        self.assertEqual(Category.objects.get(path="0000/0001/").category, ['x', 'y'])
+        self.assertEqual(Category.objects.get(path="0001/0000/").link, 'a → a2')
+
+    def test_rewrite_replaces_tree(self):
+        CategoryTreeWriter().write([make_node('c')])
+        self.assertEqual(list(Category.objects.values_list('name', flat=True)), ['c'])
+
+    def test_descendants(self):
+        a = Category.objects.get(path="0000/")
+        self.assertEqual([category.name for category in a.descendants()], ['a1', 'a11', 'a2'])
+        self.assertEqual([category.name for category in a.descendants(max_depth=1)], ['a1', 'a2'])
+        self.assertFalse(Category.objects.get(name='a11').descendants().exists())
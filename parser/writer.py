@@ -0,0 +1,259 @@
+import time
+import asyncio
+import statistics
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from parser.models import Item, Category
+
+# Поля модели Item, которые заполняются из словаря товара (лишние ключи, например article_id, отбрасываются)
+ITEM_FIELDS = tuple(field.name for field in Item._meta.concrete_fields if not field.primary_key)
+
+_STOP = object()  # Сигнал остановки для очереди ItemStreamWriter
+
+# Позиция узла среди братьев в материализованном пути Category.path
+PATH_SEGMENT = "{:04d}/"
+
+
+def product_to_item(product: dict) -> Item:
+    """
+    Создаёт (несохранённый) объект Item из словаря товара.
+    """
+    return Item(**{key: value for key, value in product.items() if key in ITEM_FIELDS})
+
+
+class ItemBatchWriter:
+    """
+    Синхронная запись товаров в БД пачками через bulk_create.
+
+    Товары накапливаются в буфере и записываются, как только в буфере batch_size товаров
+    или с последней записи прошло flush_interval секунд. Память ограничена размером пачки,
+    а при падении парсера теряется не больше одной незаписанной пачки.
+
+    Args:
+        batch_size (int): Размер пачки bulk_create.
+        flush_interval (float): Максимальное время (в секундах) между записями.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 5.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer: list[dict] = []
+        self.last_flush = time.monotonic()
+        self.written = 0
+        self.failed = 0
+        self.flush_latencies: list[float] = []
+
+    def add(self, product: dict) -> None:
+        """Добавляет товар в буфер и записывает пачку, если пора."""
+        self.buffer.append(product)
+        if len(self.buffer) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def add_many(self, products: list[dict]) -> None:
+        for product in products:
+            self.add(product)
+
+    def flush(self) -> None:
+        """Записывает накопленный буфер."""
+        batch, self.buffer = self.buffer, []
+        self.write(batch)
+
+    def write(self, batch: list[dict]) -> None:
+        """Записывает пачку товаров одним bulk_create и учитывает время записи."""
+        self.last_flush = time.monotonic()
+        if not batch:
+            return
+
+        start_time = time.perf_counter()
+        try:
+            Item.objects.bulk_create([product_to_item(product) for product in batch])
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Ошибка записи пачки из {len(batch)} товаров: {e}")
+        self.flush_latencies.append(time.perf_counter() - start_time)
+
+    def close(self) -> None:
+        """Записывает остаток буфера."""
+        self.flush()
+
+    def print_summary(self) -> None:
+        """Выводит количество записанных товаров и время записи пачек."""
+        print(f"Записано товаров в БД: {self.written}, ошибок записи: {self.failed}")
+        if self.flush_latencies:
+            print(
+                f"Записей пачек: {len(self.flush_latencies)}, "
+                f"среднее время {statistics.mean(self.flush_latencies):.4f} сек., "
+                f"максимум {max(self.flush_latencies):.4f} сек."
+            )
+
+
+class ItemStreamWriter:
+    """
+    Асинхронная потоковая запись товаров в БД.
+
+    Парсер кладёт товары в asyncio.Queue размером high_water, отдельная задача забирает их
+    и записывает пачками (каждые batch_size товаров или flush_interval секунд).
+    Когда очередь заполнена, put() ждёт — так запись в БД притормаживает парсер (backpressure).
+
+    Использование:
+        async with ItemStreamWriter() as writer:
+            await writer.put_many(products)
+
+    Args:
+        batch_size (int): Размер пачки bulk_create.
+        flush_interval (float): Максимальное время (в секундах) между записями.
+        high_water (int): Максимальное количество товаров, ожидающих записи.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 5.0, high_water: int = 2000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=high_water)
+        self.queue_depths: list[int] = []
+        self._writer = ItemBatchWriter(batch_size, flush_interval)
+        self._task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "ItemStreamWriter":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def put(self, product: dict) -> None:
+        """Ставит товар в очередь записи. Ждёт, если очередь заполнена."""
+        await self.queue.put(product)
+
+    async def put_many(self, products: list[dict]) -> None:
+        for product in products:
+            await self.queue.put(product)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        batch = []
+        deadline = loop.time() + self.flush_interval
+
+        while True:
+            try:
+                product = await asyncio.wait_for(self.queue.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                product = None
+
+            if product is _STOP:
+                break
+            if product is not None:
+                batch.append(product)
+
+            if len(batch) >= self.batch_size or loop.time() >= deadline:
+                await self._flush(batch)
+                batch = []
+                deadline = loop.time() + self.flush_interval
+
+        await self._flush(batch)
+
+    async def _flush(self, batch: list[dict]) -> None:
+        if not batch:
+            return
+        self.queue_depths.append(self.queue.qsize())
+        await sync_to_async(self._writer.write)(batch)
+        print(f"Записано {len(batch)} товаров за {self._writer.flush_latencies[-1]:.4f} сек., "
+              f"в очереди {self.queue.qsize()}")
+
+    async def close(self) -> None:
+        """Дожидается записи всех товаров из очереди и останавливает задачу записи."""
+        if self._task is None:
+            return
+        await self.queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    @property
+    def written(self) -> int:
+        return self._writer.written
+
+    def print_summary(self) -> None:
+        """Выводит статистику записи и глубины очереди."""
+        self._writer.print_summary()
+        if self.queue_depths:
+            print(
+                f"Глубина очереди при записи: средняя {statistics.mean(self.queue_depths):.0f}, "
+                f"максимальная {max(self.queue_depths)} (предел {self.queue.maxsize})"
+            )
+
+
+def node_to_category(node: dict, parent: Category | None, path: str) -> Category:
+    """
+    Создаёт (несохранённый) объект Category из узла дерева обхода.
+    """
+    crawled_at = node.get('crawled_at')
+    return Category(
+        name=node['name'],
+        url=node['url'],
+        parent=parent,
+        path=path,
+        depth=path.count('/'),
+        category=node.get('Категория'),
+        link=node.get('link', ''),
+        crawled_at=datetime.fromtimestamp(crawled_at, timezone.utc) if crawled_at else None
+    )
+
+
+class CategoryTreeWriter:
+    """
+    Запись дерева категорий из результата обхода (parser.crawler) в БД.
+
+    Дерево заменяется целиком в одной транзакции: прежние категории удаляются, новые создаются
+    bulk_create по уровням — сначала все основные категории, затем все их дочерние и т.д.
+    К моменту записи уровня у родителей уже есть id, а число запросов зависит от количества
+    уровней и batch_size, а не от количества узлов.
+
+    Использование:
+        writer = CategoryTreeWriter()
+        await writer.awrite(tree)
+        writer.print_summary()
+
+    Args:
+        batch_size (int): Размер пачки bulk_create.
+    """
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self.written = 0
+        self.deleted = 0
+        self.levels = 0
+        self.write_time = 0.0
+
+    def write(self, roots: list[dict]) -> int:
+        """Заменяет категории в БД деревом roots. Возвращает количество записанных категорий."""
+        start_time = time.perf_counter()
+        with transaction.atomic():
+            self.deleted, _ = Category.objects.all().delete()
+            level = [(root, None, PATH_SEGMENT.format(position)) for position, root in enumerate(roots)]
+            while level:
+                categories = [node_to_category(node, parent, path) for node, parent, path in level]
+                Category.objects.bulk_create(categories, batch_size=self.batch_size)
+                self.written += len(categories)
+                self.levels += 1
+                level = [
+                    (child, category, category.path + PATH_SEGMENT.format(position))
+                    for (node, _, _), category in zip(level, categories)
+                    for position, child in enumerate(node.get('subcategories', []))
+                ]
+        self.write_time = time.perf_counter() - start_time
+        return self.written
+
+    async def awrite(self, roots: list[dict]) -> int:
+        return await sync_to_async(self.write)(roots)
+
+    def print_summary(self) -> None:
+        print(
+            f"Записано категорий в БД: {self.written} ({self.levels} уровней), "
+            f"удалено прежних {self.deleted}, время {self.write_time:.2f} сек."
+        )
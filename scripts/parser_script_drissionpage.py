@@ -1,61 +1,199 @@
+import os
 import time
+import statistics
+import django
 
-from DrissionPage import ChromiumPage
+from DrissionPage import ChromiumPage, ChromiumOptions
 from DrissionPage._functions.keys import Keys
+from DrissionPage.errors import JavaScriptError
 
+from parser.decorators import timeit
+from parser.extract import SELENIUM_EXTRACT_CARDS_SCRIPT, normalize_cards
+from parser.scroll import CARD_SELECTOR, DRISSIONPAGE_SCROLL_OBSERVER_SCRIPT, ScrollLatency, scroll_options
 
+# Настройка Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
 
-page = ChromiumPage()
-
-SEARCH_QUERY = "носки"
-category_url = 'https://www.wildberries.ru'
-page.get(category_url)
-
-
-search = page.ele('#searchInput')
-search.focus()
-time.sleep(0.2)
-search.input(SEARCH_QUERY)
-page.actions.type(Keys.ENTER)
-
-
-num_page = 0
-def group_item():
-    global num_page
-    count = 0
-    time.sleep(0.5)
-    while len(page.ele('.product-card-list').children()) != 100:
-        time.sleep(0.5)
-        page.scroll.to_see(page.ele('.product-card-list').children()[-1])
-        if count > 3:
-            page.scroll.to_top()
-        time.sleep(0.5)
-        count += 1
-    script = """
-    const items = document.querySelector('.product-card-list').children
-    const itemList = []
-            items.forEach(item => {
-                itemList.push({
-            title: item.querySelector('.product-card__name').innerText.replace(/^ ?\/ ?/, '') || '',
-            price: item.querySelector('del')?.innerText.replace(/\u00A0/g, ' ') || '',
-            discounted_price: item.querySelector('.price__lower-price')?.innerText.replace(/\u00A0/g, ' ') || '',
-            rating: item.querySelector('.address-rate-mini')?.innerText.replace(/\u00A0/g, ' ') || '',
-            rating_count: item.querySelector('.product-card__count')?.innerText.replace(/\u00A0/g, ' ') || ''
-    });
-    })
-
-    return itemList
-    """
-    items = page.run_js(script)
-    num_page += 1
-    print(f"Страница {num_page}")
-    return items
-
-def next_page():
-    page.ele('text:Следующая страница').click()
-
-
-while True:
-    x = group_item()
-    print(x)
-    next_page()
+from parser.writer import ItemBatchWriter
+
+# Переменные
+search_query = "молды"  # Поисковый запрос на сайте (тот же, что у Playwright/Selenium-парсеров, для сравнения)
+items_to_parse = 6500  # Общее количество товаров, которые нужно распарсить
+
+# Константы
+TARGET_URL = "https://www.wildberries.by/"
+CURRENCY = "BYN"
+HEADLESS = True
+MAX_ELEMENTS = 100  # Количество карточек на полной странице результатов
+SEARCH_TIMEOUT = 10  # Максимальное время (в секундах) ожидания поля поиска и первых карточек
+SCROLL_TIMEOUT = 15  # Максимальное время (в секундах) ожидания карточек при прокрутке через observer
+NEXT_PAGE_TIMEOUT = 10  # Максимальное время (в секундах) ожидания смены страницы после перехода
+WRITE_BATCH_SIZE = 500  # Размер пачки bulk_create при потоковой записи в БД
+WRITE_INTERVAL = 5.0  # Максимальное время (в секундах) между записями пачек
+
+
+def setup_page() -> ChromiumPage:
+    """
+    Создаёт и возвращает вкладку браузера DrissionPage.
+    """
+    options = ChromiumOptions()
+    options.headless(HEADLESS)
+    options.set_argument("--window-size", "1920,1080")
+    options.set_argument("--disable-gpu")
+    options.set_argument("--no-sandbox")
+    options.set_argument("--disable-dev-shm-usage")
+    return ChromiumPage(options)
+
+
+def setup_and_search(page: ChromiumPage, query: str = search_query) -> bool:
+    """
+    Открывает сайт и выполняет поиск по ключевому слову.
+
+    Вместо фиксированных пауз ждёт появления поля поиска и первых карточек результатов.
+    Возвращает False, если за SEARCH_TIMEOUT карточки так и не появились.
+    """
+    page.get(TARGET_URL)
+
+    search_input = page.ele('#searchInput', timeout=SEARCH_TIMEOUT)
+    if not search_input:
+        raise RuntimeError("Поле поиска не найдено")
+    search_input.focus()
+    search_input.input(query, clear=True)
+    page.actions.type(Keys.ENTER)
+
+    return bool(page.wait.eles_loaded(f'css:{CARD_SELECTOR}', timeout=SEARCH_TIMEOUT))
+
+
+def scroll_page_observed(page: ChromiumPage) -> int:
+    """
+    Прокручивает страницу и ждёт карточки через MutationObserver/IntersectionObserver внутри браузера.
+
+    Один вызов run_js завершается, как только карточек стало MAX_ELEMENTS, список перестал расти
+    в течение адаптивного окна или истёк SCROLL_TIMEOUT — короткая последняя страница не вешает парсер.
+    Возвращает количество объектов на странице.
+    """
+    try:
+        result = page.run_js(
+            DRISSIONPAGE_SCROLL_OBSERVER_SCRIPT,
+            scroll_options(MAX_ELEMENTS, timeout=SCROLL_TIMEOUT * 1000),
+            timeout=SCROLL_TIMEOUT + 5
+        )
+    except (TimeoutError, JavaScriptError) as e:
+        print(f"Ошибка ожидания карточек: {e}")
+        return len(page.eles(f'css:{CARD_SELECTOR}', timeout=0))
+
+    print(f"На странице {result['count']} объектов ({result['reason']}).")
+    return result['count']
+
+
+def go_to_next_page(page: ChromiumPage) -> bool:
+    """
+    Переходит на следующую страницу. Возвращает True, если получилось.
+
+    Кнопки "Следующая страница" нет на последней странице — тогда возвращается False.
+    После клика ждёт, пока карточки текущей страницы будут заменены новыми.
+    """
+    next_button = page.ele('text:Следующая страница', timeout=0)
+    if not next_button:
+        print("Кнопка следующей страницы не найдена — это последняя страница")
+        return False
+
+    first_card = page.ele(f'css:{CARD_SELECTOR}', timeout=0)
+    try:
+        next_button.click()
+    except Exception as e:
+        print(f"Не удалось перейти на следующую страницу: {e}")
+        return False
+
+    if first_card and not page.wait.ele_deleted(first_card, timeout=NEXT_PAGE_TIMEOUT):
+        print("Карточки не обновились после перехода на следующую страницу")
+        return False
+    if not page.wait.eles_loaded(f'css:{CARD_SELECTOR}', timeout=NEXT_PAGE_TIMEOUT):
+        print("Карточки следующей страницы не появились")
+        return False
+
+    print("Перешли на следующую страницу")
+    return True
+
+
+def extract_page_cards(page: ChromiumPage) -> list[dict]:
+    """
+    Извлекает все карточки текущей страницы одним вызовом run_js.
+
+    Возвращает записи в том же формате, что и Playwright/Selenium-парсеры: title, price (текущая цена),
+    discounted_price (старая цена), rating, reviews_count, currency и article_id.
+    """
+    records = page.run_js(SELENIUM_EXTRACT_CARDS_SCRIPT)
+    return normalize_cards(records or [], currency=CURRENCY)
+
+
+def print_page_summary(page_times: list[tuple[int, float]], wall_time: float) -> None:
+    """
+    Выводит время обработки страниц (прокрутка + извлечение) и итоговую скорость для сравнения с Playwright.
+    """
+    if not page_times:
+        return
+    times = [elapsed for _, elapsed in page_times]
+    total_cards = sum(cards for cards, _ in page_times)
+    print(
+        f"Страниц: {len(page_times)}, карточек: {total_cards}, "
+        f"среднее время страницы {statistics.mean(times):.3f} сек., "
+        f"медиана {statistics.median(times):.3f} сек., максимум {max(times):.3f} сек."
+    )
+    print(f"Общее время {wall_time:.2f} сек., {total_cards / wall_time if wall_time else 0:.1f} карточек/сек")
+
+
+@timeit
+def parse_products() -> None:
+    """
+    Запускает парсинг товаров: ищет, собирает данные и сохраняет в БД.
+    """
+    page = setup_page()
+    collected = 0
+    page_times = []
+    scroll_latency = ScrollLatency()
+    # Товары записываются в БД пачками по мере сбора, а не одной транзакцией в конце
+    writer = ItemBatchWriter(batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_INTERVAL)
+    start_time = time.perf_counter()
+
+    try:
+        if not setup_and_search(page):
+            print(f"По запросу '{search_query}' не найдено товаров")
+            return
+
+        while True:
+            page_start = time.perf_counter()
+            scroll_latency.measure("observer")(scroll_page_observed(page))
+            products = extract_page_cards(page)
+            page_times.append((len(products), time.perf_counter() - page_start))
+            print(f"Страница {len(page_times)}: извлечено {len(products)} карточек "
+                  f"за {page_times[-1][1]:.3f} сек.")
+
+            for product_data in products:
+                if collected >= items_to_parse:
+                    break
+                if product_data["title"] and product_data["price"]:
+                    writer.add(product_data)
+                    collected += 1
+
+            print(f"Товаров собрано: {collected}")
+
+            # Неполная страница — последняя, дальше переходить некуда
+            if collected >= items_to_parse or len(products) < MAX_ELEMENTS:
+                break
+            if not go_to_next_page(page):
+                break
+
+        scroll_latency.print_summary()
+        print(f"Всего товаров собрано: {collected} (лимит: {items_to_parse})")
+
+    finally:
+        writer.close()
+        writer.print_summary()
+        print_page_summary(page_times, time.perf_counter() - start_time)
+        page.quit()
+
+
+if __name__ == "__main__":
+    parse_products()
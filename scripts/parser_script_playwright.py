@@ -1,18 +1,23 @@
 import os
 import re
+import time
+import math
 import asyncio
 import django
+from decimal import Decimal
+from urllib.parse import urlparse, parse_qs, quote
 
-from playwright.async_api import async_playwright, Page
+from playwright.async_api import async_playwright, Page, Response, Browser, BrowserContext
 from playwright.async_api import Locator
-from asgiref.sync import sync_to_async
 
 # Django setup
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
-from parser.models import Item
 from parser.decorators import timeit
+from parser.writer import ItemStreamWriter
+from parser.extract import EXTRACT_CARDS_SCRIPT, extract_cards, normalize_cards, parse_product_card_html
+from parser.scroll import SCROLL_OBSERVER_SCRIPT, ScrollLatency, scroll_options
 
 # Константы
 TARGET_URL = "https://www.wildberries.by/"
@@ -22,22 +27,128 @@ items_to_parse = 6500
 SCROLL_PAUSE = 0.5
 PAGE_LOAD_TIMEOUT = 0.5
 MAX_ELEMENTS = 100
-
-async def setup_and_search(page: Page) -> None:
+# "observer" — ожидание карточек через MutationObserver внутри страницы, "polling" — опрос каждые SCROLL_PAUSE,
+# "compare" — чередовать оба способа по страницам, чтобы сравнить задержку за один прогон
+SCROLL_MODE = "observer"
+# "concurrent" — страницы результатов открываются по URL (&page=N) параллельно в PAGE_POOL_SIZE вкладках,
+# "sequential" — переход кнопкой "Следующая страница" в одной вкладке
+PAGINATION_MODE = "concurrent"
+PAGE_POOL_SIZE = 4
+NAVIGATION_TIMEOUT = 30000
+WRITE_BATCH_SIZE = 500  # Размер пачки bulk_create при потоковой записи в БД
+WRITE_INTERVAL = 5.0  # Максимальное время (в секундах) между записями пачек
+# "batch" — все карточки одним evaluate, "html" — разбор page.content() бэкендом HTML_BACKEND,
+# "card" — по одной карточке
+EXTRACTION_MODE = "batch"
+HTML_BACKEND = "regex"  # "regex" или "lxml", см. parser.extract.pick_fastest_backend
+CAPTURE_MODE = "network"  # "network" — товары из JSON-ответов поиска, "dom" — прокрутка и разбор карточек
+CAPTURE_TIMEOUT = 10  # Сколько секунд ждать JSON-ответ со страницей товаров, прежде чем перейти к DOM
+
+# JSON-ответы поиска и каталога, из которых сайт заполняет карточки товаров
+SEARCH_RESPONSE_PATTERN = re.compile(r"^https://[\w.-]*(?:search|catalog)\.wb\.ru/.+/(?:search|catalog)\?")
+
+
+async def setup_and_search(page: Page, query: str = search_query) -> None:
     await page.goto(TARGET_URL, timeout=5000)
     # await page.screenshot(path="screenshot.png", full_page=True)
     await page.wait_for_timeout(PAGE_LOAD_TIMEOUT * 1000)
 
     search_input = await page.wait_for_selector("input[type='search']")
-    await search_input.fill(search_query)
+    await search_input.fill(query)
     await search_input.press("Enter")
 
     await page.wait_for_timeout(PAGE_LOAD_TIMEOUT * 1000)
 
 
-async def scroll_page(page: Page) -> None:
+def parse_search_payload(payload, currency: str = "BYN") -> list[dict]:
+    """
+    Преобразует JSON-ответ поиска/каталога в список словарей товаров.
+
+    Поддерживает оба формата ответа: с ценами в sizes[].price (в копейках) и
+    со старыми полями salePriceU/priceU. Поля совпадают с разбором карточек из DOM:
+    price — текущая цена, discounted_price — зачёркнутая цена до скидки.
+    Ответ другого вида (например, JSON-массив) даёт пустой список.
+    """
+    if not isinstance(payload, dict):
+        return []
+    data = payload.get("data") or payload
+    products = (data.get("products") or []) if isinstance(data, dict) else []
+
+    result = []
+    for product in products:
+        sizes_prices = [size["price"] for size in product.get("sizes") or [] if size.get("price")]
+        if sizes_prices:
+            sale_price = sizes_prices[0].get("product")
+            basic_price = sizes_prices[0].get("basic")
+        else:
+            sale_price = product.get("salePriceU")
+            basic_price = product.get("priceU")
+        if not sale_price:
+            continue
+
+        result.append({
+            "title": product.get("name") or "Неизвестно",
+            "price": Decimal(sale_price) / 100,
+            "discounted_price": Decimal(basic_price) / 100 if basic_price and basic_price != sale_price else None,
+            "rating": product.get("reviewRating", product.get("rating")),
+            "reviews_count": product.get("feedbacks", product.get("nmFeedbacks")) or 0,
+            "currency": currency,
+            "article_id": str(product["id"]) if product.get("id") else None,
+        })
+    return result
+
+
+class SearchResponseCapture:
+    """
+    Перехватывает JSON-ответы поиска на странице и складывает из них товары в очередь.
+
+    Подписывается на page.on("response") до выполнения поиска, поэтому первая страница
+    результатов не теряется. Ответы без товаров (фильтры, подсказки) игнорируются.
+    """
+
+    def __init__(self, page: Page):
+        self._products: asyncio.Queue = asyncio.Queue()
+        page.on("response", self._on_response)
+
+    async def _on_response(self, response: Response) -> None:
+        if response.request.resource_type not in ("xhr", "fetch"):
+            return
+        if not SEARCH_RESPONSE_PATTERN.match(response.url):
+            return
+        currency = parse_qs(urlparse(response.url).query).get("curr", ["byn"])[0].upper()
+        try:
+            products = parse_search_payload(await response.json(), currency)
+        except Exception as e:
+            print(f"Не удалось разобрать ответ {response.url}: {e}")
+            return
+
+        if products:
+            await self._products.put(products)
+
+    def clear(self) -> None:
+        """Отбрасывает ответы, полученные до перехода на следующую страницу."""
+        while not self._products.empty():
+            self._products.get_nowait()
+
+    async def wait_products(self, timeout: float = CAPTURE_TIMEOUT) -> list[dict] | None:
+        """Ждёт очередной ответ с товарами. Возвращает None, если ответа не было."""
+        try:
+            return await asyncio.wait_for(self._products.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def search_page_url(query: str, page_number: int) -> str:
+    """
+    Формирует URL страницы результатов поиска с номером page_number.
+    """
+    return f"{TARGET_URL}catalog/0/search.aspx?search={quote(query)}&page={page_number}"
+
+
+async def scroll_page(page: Page) -> int:
     """
     Прокручивает страницу, пока не будут загружены все элементы или не прекратится рост их количества.
+    Возвращает количество найденных карточек.
     """
     print("Прокрутка страницы для загрузки контента...")
 
@@ -53,7 +164,7 @@ async def scroll_page(page: Page) -> None:
         # Если количество элементов не изменилось — останавливаемся
         if found_elements_count == current_count:
             print(f"На странице всего {current_count} объектов. Прокрутка завершена.")
-            break
+            return current_count
 
         print(f"Шаг {count + 1}: найдено {current_count} объектов")
 
@@ -64,13 +175,43 @@ async def scroll_page(page: Page) -> None:
         # Проверка на достижение максимума
         if current_count >= MAX_ELEMENTS:
             print(f"Достигнуто необходимое количество объектов ({MAX_ELEMENTS}).")
-            break
+            return current_count
 
         await asyncio.sleep(SCROLL_PAUSE)
 
         found_elements_count = current_count
         count += 1
 
+    return found_elements_count
+
+
+async def scroll_page_observed(page: Page) -> int:
+    """
+    Прокручивает страницу и ждёт карточки через MutationObserver/IntersectionObserver внутри браузера.
+
+    Завершается сразу, как только карточек стало MAX_ELEMENTS или список перестал расти
+    в течение адаптивного окна, без фиксированных пауз между шагами. Возвращает количество карточек.
+    """
+    result = await page.evaluate(SCROLL_OBSERVER_SCRIPT, scroll_options(MAX_ELEMENTS))
+    print(f"На странице {result['count']} объектов ({result['reason']}). Прокрутка завершена.")
+    return result["count"]
+
+
+async def scroll_results(page: Page, latency: ScrollLatency) -> None:
+    """
+    Прокручивает страницу способом SCROLL_MODE и записывает задержку прокрутки.
+    """
+    method = SCROLL_MODE
+    if method == "compare":
+        scrolled_pages = sum(len(samples) for samples in latency.samples.values())
+        method = "polling" if scrolled_pages % 2 == 0 else "observer"
+
+    stop = latency.measure(method)
+    if method == "observer":
+        stop(await scroll_page_observed(page))
+    else:
+        stop(await scroll_page(page))
+
 
 async def go_to_next_page(page: Page) -> bool:
     try:
@@ -86,18 +227,6 @@ async def go_to_next_page(page: Page) -> bool:
         return False
 
 
-async def parse_number_from_text(text: str) -> int | float | None:
-    if not isinstance(text, str):
-        return 0
-    text = text.replace(" ", "")
-    match = re.search(r'(\d+[.,]?\d*)', text)
-    if match:
-        number_str = match.group(1).replace(',', '.')
-        number = float(number_str)
-        return int(number) if number.is_integer() else number
-    return None
-
-
 async def parse_product_card(card: Locator) -> dict | None:
     """
     Оптимизированный асинхронный парсинг карточки товара с использованием регулярных выражений.
@@ -105,43 +234,72 @@ async def parse_product_card(card: Locator) -> dict | None:
     try:
         # Получаем весь HTML карточки единожды
         html = await card.evaluate("element => element.outerHTML")
-
-        title_match = re.search(
-            r'<span class="product-card__name-separator.*?"> / </span>(.*?)</span>', html
-        )
-        price_match = re.search(
-            r'<ins class="price__lower-price.*?">.*?(\d+[.,]?\d*).*?</ins>', html
-        )
-        discounted_match = re.search(
-            r'<del>.*?(\d+[.,]?\d*).*?</del>', html
-        )
-        rating_match = re.search(
-            r'<span class="address-rate-mini address-rate-mini--sm">(.*?)</span>', html
-        )
-        reviews_match = re.search(
-            r'<span class="product-card__count">.*?(\d+).*?</span>', html
-        )
-
-        currency = "BYN"  # Можно подставить динамически, если надо
-
-        return {
-            "title": title_match.group(1) if title_match else "Неизвестно",
-            "price": await parse_number_from_text(price_match.group(1)) if price_match else None,
-            "discounted_price": await parse_number_from_text(discounted_match.group(1)) if discounted_match else None,
-            "rating": await parse_number_from_text(rating_match.group(1)) if rating_match else None,
-            "reviews_count": await parse_number_from_text(reviews_match.group(1)) if reviews_match else 0,
-            "currency": currency,
-        }
+        return parse_product_card_html(html, currency="BYN")
 
     except Exception as e:
         print(f"Ошибка в карточке товара: {e}")
         return None
 
 
-@sync_to_async
-def save_item(data: list):
-    items_to_create = [Item(**product) for product in data]
-    Item.objects.bulk_create(items_to_create)
+async def extract_page_cards(page: Page) -> list[dict]:
+    """
+    Извлекает все карточки текущей страницы одним вызовом evaluate.
+
+    Возвращает список словарей с полями title, price, discounted_price, rating,
+    reviews_count, currency и article_id. Числовые поля всей страницы нормализуются одним пакетом.
+    """
+    records = await page.evaluate(EXTRACT_CARDS_SCRIPT)
+    return normalize_cards(records, currency="BYN")
+
+
+async def extract_page_cards_by_one(page: Page) -> list[dict]:
+    """
+    Извлекает карточки текущей страницы по одной (отдельный evaluate на каждую карточку).
+    """
+    products = []
+    for card in await page.locator("article.j-card-item").all():
+        data = await parse_product_card(card)
+        if data:
+            products.append(data)
+    return products
+
+
+async def extract_products(page: Page, stats: list[tuple[int, float]]) -> list[dict]:
+    """
+    Извлекает карточки страницы в режиме EXTRACTION_MODE и выводит время извлечения.
+
+    Args:
+        page (Page): Страница с результатами поиска.
+        stats (list[tuple[int, float]]): Накопитель статистики (количество карточек, время в секундах).
+    """
+    start_time = time.perf_counter()
+    if EXTRACTION_MODE == "batch":
+        products = await extract_page_cards(page)
+    elif EXTRACTION_MODE == "html":
+        products = extract_cards(await page.content(), HTML_BACKEND, currency="BYN")
+    else:
+        products = await extract_page_cards_by_one(page)
+    elapsed = time.perf_counter() - start_time
+
+    stats.append((len(products), elapsed))
+    speed = len(products) / elapsed if elapsed else 0
+    print(f"Извлечено {len(products)} карточек за {elapsed:.4f} сек. ({speed:.1f} шт/сек, режим {EXTRACTION_MODE})")
+    return products
+
+
+def print_extraction_summary(stats: list[tuple[int, float]]) -> None:
+    """
+    Выводит итоговую скорость извлечения карточек по всем страницам.
+    """
+    total_cards = sum(cards for cards, _ in stats)
+    total_time = sum(elapsed for _, elapsed in stats)
+    if not stats or not total_time:
+        return
+    print(
+        f"Извлечение ({EXTRACTION_MODE}): страниц {len(stats)}, карточек {total_cards}, "
+        f"время {total_time:.4f} сек., в среднем {total_time / len(stats):.4f} сек./стр., "
+        f"{total_cards / total_time:.1f} шт/сек"
+    )
 
 
 @timeit
@@ -149,42 +307,197 @@ def parse_products():
     asyncio.run(_parse_products())
 
 
-async def _parse_products():
+async def collect_page_products(
+        page: Page,
+        capture: SearchResponseCapture | None,
+        extraction_stats: list[tuple[int, float]],
+        scroll_latency: ScrollLatency
+) -> list[dict]:
+    """
+    Собирает товары открытой страницы результатов.
 
-    products_info = []
+    Берёт товары из перехваченного JSON-ответа поиска, а если ответа нет — прокручивает
+    страницу и разбирает карточки из DOM.
+    """
+    products = await capture.wait_products() if capture else None
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
+    if products is None:
+        if capture:
+            print("JSON-ответ с товарами не получен, разбираем страницу через DOM")
+        await scroll_results(page, scroll_latency)
+        products = await extract_products(page, extraction_stats)
+    else:
+        print(f"Из ответа поиска получено {len(products)} товаров")
 
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-        )
+    return products
 
-        page = await context.new_page()
 
-        await setup_and_search(page)
+def filter_products(products: list[dict]) -> list[dict]:
+    """Отбрасывает товары без названия или цены."""
+    return [data for data in products if data["title"] and data["price"]]
 
-        while True:
-            await scroll_page(page)
 
-            items = await page.locator("article.j-card-item").all()
+async def parse_pages_sequentially(
+        context: BrowserContext,
+        query: str,
+        limit: int,
+        writer: ItemStreamWriter,
+        extraction_stats: list[tuple[int, float]],
+        scroll_latency: ScrollLatency
+) -> int:
+    """
+    Обходит страницы результатов по одной, переходя кнопкой "Следующая страница".
+
+    Товары каждой страницы сразу передаются в writer. Возвращает количество переданных товаров.
+    """
+    collected = 0
 
-            for card in items:
-                data = await parse_product_card(card)
-                if data and data["title"] and data["price"]:
-                    products_info.append(data)
+    page = await context.new_page()
+    try:
+        capture = SearchResponseCapture(page) if CAPTURE_MODE == "network" else None
+
+        await setup_and_search(page, query)
+
+        while True:
+            products = await collect_page_products(page, capture, extraction_stats, scroll_latency)
+            products = filter_products(products)[:limit - collected]
+            await writer.put_many(products)
+            collected += len(products)
 
-            print(f"Товаров собрано: {len(products_info)}")
+            print(f"Товаров собрано: {collected}")
 
-            if len(products_info) >= items_to_parse:
+            if collected >= limit:
                 break
+            if capture:
+                capture.clear()
             if not await go_to_next_page(page):
                 break
+    finally:
+        await page.close()
 
-        print(f"Всего товаров для сохранения в БД: {len(products_info[:items_to_parse])}")
+    return collected
 
-        # Создаем список объектов Item и сохраняем их в БД за одну транзакцию
-        await save_item(products_info[:items_to_parse])
+
+async def parse_pages_concurrently(
+        context: BrowserContext,
+        query: str,
+        limit: int,
+        writer: ItemStreamWriter,
+        extraction_stats: list[tuple[int, float]],
+        scroll_latency: ScrollLatency
+) -> int:
+    """
+    Открывает страницы результатов по URL параллельно в пуле из PAGE_POOL_SIZE вкладок.
+
+    Каждая вкладка берёт следующий свободный номер страницы. Страница, на которой товаров меньше
+    MAX_ELEMENTS, считается последней: номера после неё больше не выдаются, а уже загруженные
+    страницы за ней отбрасываются. Товары передаются в writer в порядке номеров страниц:
+    страница, загруженная раньше предыдущих, ждёт их в буфере (не больше размера пула).
+    Возвращает количество переданных товаров.
+    """
+    pages_needed = math.ceil(limit / MAX_ELEMENTS)
+    pending: dict[int, list[dict]] = {}
+    last_page = pages_needed
+    next_page_number = 1
+    next_page_to_write = 1
+    collected = 0
+
+    async def _write_ready_pages() -> None:
+        nonlocal next_page_to_write, collected
+        while next_page_to_write in pending and next_page_to_write <= last_page:
+            products = filter_products(pending.pop(next_page_to_write))[:limit - collected]
+            next_page_to_write += 1
+            collected += len(products)
+            await writer.put_many(products)
+
+    async def _worker(page: Page) -> None:
+        nonlocal last_page, next_page_number
+        capture = SearchResponseCapture(page) if CAPTURE_MODE == "network" else None
+
+        while next_page_number <= last_page:
+            page_number = next_page_number
+            next_page_number += 1
+
+            if capture:
+                capture.clear()
+            try:
+                await page.goto(
+                    search_page_url(query, page_number),
+                    timeout=NAVIGATION_TIMEOUT,
+                    wait_until="domcontentloaded"
+                )
+                products = await collect_page_products(page, capture, extraction_stats, scroll_latency)
+            except Exception as e:
+                # Ошибка загрузки не означает конец выдачи, поэтому страница просто пропускается
+                print(f"Не удалось загрузить страницу {page_number}: {e}")
+                pending[page_number] = []
+                await _write_ready_pages()
+                continue
+
+            print(f"Страница {page_number}: {len(products)} товаров")
+
+            if len(products) < MAX_ELEMENTS and page_number < last_page:
+                print(f"Страница {page_number} последняя, дальнейшие страницы не загружаются")
+                last_page = page_number
+
+            pending[page_number] = products
+            await _write_ready_pages()
+
+    pages = [await context.new_page() for _ in range(min(PAGE_POOL_SIZE, pages_needed))]
+    try:
+        await asyncio.gather(*(_worker(page) for page in pages))
+    finally:
+        for page in pages:
+            await page.close()
+
+    return collected
+
+
+async def create_search_context(browser: Browser) -> BrowserContext:
+    """
+    Создаёт контекст браузера с настройками для страниц поиска.
+    """
+    return await browser.new_context(
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+    )
+
+
+async def scrape_query(
+        context: BrowserContext,
+        query: str,
+        limit: int,
+        writer: ItemStreamWriter,
+        extraction_stats: list[tuple[int, float]],
+        scroll_latency: ScrollLatency
+) -> int:
+    """
+    Собирает до limit товаров по поисковому запросу query в режиме PAGINATION_MODE
+    и передаёт их в writer. Возвращает количество собранных товаров.
+    """
+    if PAGINATION_MODE == "concurrent":
+        return await parse_pages_concurrently(context, query, limit, writer, extraction_stats, scroll_latency)
+    return await parse_pages_sequentially(context, query, limit, writer, extraction_stats, scroll_latency)
+
+
+async def _parse_products():
+
+    extraction_stats = []
+    scroll_latency = ScrollLatency()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await create_search_context(browser)
+
+        # Товары записываются в БД пачками по мере сбора, а не одной транзакцией в конце
+        async with ItemStreamWriter(batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_INTERVAL) as writer:
+            collected = await scrape_query(
+                context, search_query, items_to_parse, writer, extraction_stats, scroll_latency
+            )
+
+        print_extraction_summary(extraction_stats)
+        scroll_latency.print_summary()
+        print(f"Всего товаров собрано: {collected}")
+        writer.print_summary()
 
         await browser.close()
 
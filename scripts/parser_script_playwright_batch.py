@@ -0,0 +1,179 @@
+import os
+import time
+import asyncio
+import django
+
+from playwright.async_api import async_playwright
+
+# Django setup
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from parser.browser_pool import BrowserPool
+from parser.decorators import timeit
+from parser.memory import MemoryWatchdog, default_log_path
+from parser.scroll import ScrollLatency
+from parser.writer import ItemStreamWriter
+from scripts.parser_script_playwright import (
+    create_search_context, scrape_query, print_extraction_summary, WRITE_BATCH_SIZE, WRITE_INTERVAL
+)
+
+# Константы
+QUERIES_FILE = "queries.txt"  # Файл запросов: по одному на строку, "запрос;лимит" (лимит необязателен)
+QUERIES = [("молды", 500), ("носки", 300)]  # Используются, если файла QUERIES_FILE нет
+DEFAULT_ITEMS_LIMIT = 1000  # Лимит товаров для запроса без явно указанного лимита
+BROWSERS_COUNT = 1  # Количество прогретых браузеров в пуле
+CONTEXTS_PER_BROWSER = 3  # Количество контекстов в каждом браузере, по которым распределяются запросы
+CONTEXT_MAX_NAVIGATIONS = 300  # Контекст пересоздаётся после стольких навигаций, чтобы не разрастался
+BROWSER_MAX_MEMORY_MB = 2000  # Браузер перезапускается, когда его процессы занимают больше памяти (МБ)
+RENDERER_MAX_MEMORY_MB = 700  # Контексты браузера пересоздаются, когда один рендерер занимает больше (МБ)
+MEMORY_CHECK_INTERVAL = 15  # Период фоновых замеров памяти (сек.)
+
+
+def load_queries(path: str = QUERIES_FILE) -> list[tuple[str, int]]:
+    """
+    Загружает список запросов с лимитами товаров.
+
+    Строки вида "запрос;лимит" или "запрос". Пустые строки и строки, начинающиеся с "#", пропускаются.
+    Если файла нет, возвращается QUERIES.
+    """
+    if not os.path.exists(path):
+        return QUERIES
+
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            query, _, limit = line.partition(";")
+            queries.append((query.strip(), int(limit) if limit.strip() else DEFAULT_ITEMS_LIMIT))
+    return queries
+
+
+class QueryWriter:
+    """
+    Передаёт товары одного запроса в общий потоковый writer и считает переданные товары,
+    чтобы в отчёт попало число записанных товаров и тогда, когда запрос завершился ошибкой.
+    """
+
+    def __init__(self, writer: ItemStreamWriter):
+        self.writer = writer
+        self.written = 0
+
+    async def put_many(self, products: list[dict]) -> None:
+        for product in products:
+            await self.writer.put(product)
+            self.written += 1
+
+
+async def query_worker(
+        pool: BrowserPool,
+        queue: asyncio.Queue,
+        writer: ItemStreamWriter,
+        report: list[dict],
+        extraction_stats: list[tuple[int, float]],
+        scroll_latency: ScrollLatency
+) -> None:
+    """
+    Обрабатывает запросы из очереди на прогретых контекстах пула браузеров.
+
+    На каждый запрос из пула берётся свободный контекст и возвращается после запроса,
+    поэтому запуск браузера и прогрев контекста не повторяются для каждого запроса,
+    а разросшиеся контексты и браузеры пул пересоздаёт сам.
+    Товары всех запросов пишутся в БД через общий потоковый writer.
+    """
+    while True:
+        try:
+            query, limit = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+
+        start_time = time.perf_counter()
+        query_writer = QueryWriter(writer)
+        error = None
+        try:
+            async with pool.context() as context:
+                await scrape_query(context, query, limit, query_writer, extraction_stats, scroll_latency)
+        except Exception as e:
+            error = str(e)
+            print(f"Ошибка при обработке запроса '{query}' (записано товаров: {query_writer.written}): {e}")
+        elapsed = time.perf_counter() - start_time
+        collected = query_writer.written
+
+        report.append({"query": query, "limit": limit, "items": collected, "seconds": elapsed, "error": error})
+        print(f"Запрос '{query}': {collected}/{limit} товаров за {elapsed:.2f} сек. "
+              f"({collected / elapsed if elapsed else 0:.1f} шт/сек)")
+
+
+def print_batch_report(report: list[dict], wall_time: float) -> None:
+    """
+    Выводит производительность по каждому запросу и итог по всему пакету.
+    """
+    print("\nЗапрос | товаров | сек. | шт/сек")
+    for row in report:
+        speed = row["items"] / row["seconds"] if row["seconds"] else 0
+        error = f" | ошибка: {row['error']}" if row["error"] else ""
+        print(f"{row['query']} | {row['items']}/{row['limit']} | {row['seconds']:.2f} | {speed:.1f}{error}")
+
+    total_items = sum(row["items"] for row in report)
+    print(
+        f"Всего: запросов {len(report)}, товаров {total_items}, время {wall_time:.2f} сек., "
+        f"{total_items / wall_time if wall_time else 0:.1f} шт/сек, "
+        f"{len(report) / wall_time * 3600 if wall_time else 0:.0f} запросов/час"
+    )
+
+
+@timeit
+def parse_queries() -> None:
+    asyncio.run(_parse_queries(load_queries()))
+
+
+async def _parse_queries(queries: list[tuple[str, int]]) -> None:
+    queue = asyncio.Queue()
+    for query in queries:
+        queue.put_nowait(query)
+
+    report = []
+    extraction_stats = []
+    scroll_latency = ScrollLatency()
+
+    # Проверяет память и между возвратами контекстов, пока запросы долго выполняются
+    watchdog = MemoryWatchdog(
+        interval=MEMORY_CHECK_INTERVAL,
+        max_browser_mb=BROWSER_MAX_MEMORY_MB,
+        max_renderer_mb=RENDERER_MAX_MEMORY_MB
+    )
+
+    async with async_playwright() as p:
+        pool = BrowserPool(
+            p,
+            browsers=BROWSERS_COUNT,
+            contexts_per_browser=CONTEXTS_PER_BROWSER,
+            max_navigations=CONTEXT_MAX_NAVIGATIONS,
+            max_memory_mb=BROWSER_MAX_MEMORY_MB,
+            context_factory=create_search_context,
+            watchdog=watchdog
+        )
+        start_time = time.perf_counter()
+        async with pool, watchdog:
+            try:
+                async with ItemStreamWriter(batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_INTERVAL) as writer:
+                    await asyncio.gather(*(
+                        query_worker(pool, queue, writer, report, extraction_stats, scroll_latency)
+                        for _ in range(min(pool.size, len(queries)))
+                    ))
+            finally:
+                wall_time = time.perf_counter() - start_time
+                pool.print_summary()
+                watchdog.print_summary()
+                watchdog.export_csv(default_log_path())
+
+    print_extraction_summary(extraction_stats)
+    scroll_latency.print_summary()
+    writer.print_summary()
+    print_batch_report(report, wall_time)
+
+
+if __name__ == "__main__":
+    parse_queries()
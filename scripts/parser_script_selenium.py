@@ -1,5 +1,4 @@
 import os
-import re
 import time
 import django
 from selenium import webdriver
@@ -8,14 +7,19 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver, WebElement
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 
 from parser.decorators import timeit
+from parser.extract import SELENIUM_EXTRACT_CARDS_SCRIPT, normalize_cards, parse_product_card_html
+from parser.scroll import SELENIUM_SCROLL_OBSERVER_SCRIPT, ScrollLatency, scroll_options
 
 # Настройка Django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
-from parser.models import Item
+from parser.writer import ItemBatchWriter
 
 # Переменные
 search_query = "молды"  # Поисковый запрос на сайте
@@ -27,6 +31,16 @@ TARGET_URL = "https://www.wildberries.by/"
 SCROLL_PAUSE = 0.5  # Задержка (в секундах) после каждой прокрутки, чтобы успели подгрузиться элементы
 PAGE_LOAD_TIMEOUT = 0.5  # Время ожидания загрузки страницы после действий (например, после поиска)
 IMPLICIT_WAIT = 2  # Неявное ожидание элементов при поиске через Selenium
+# "batch" — все карточки одним execute_script, "card" — outerHTML каждой карточки отдельным запросом
+EXTRACTION_MODE = "batch"
+BENCHMARK_EXTRACTION = False  # Сравнить скорость обоих способов извлечения на первой странице
+WRITE_BATCH_SIZE = 500  # Размер пачки bulk_create при потоковой записи в БД
+WRITE_INTERVAL = 5.0  # Максимальное время (в секундах) между записями пачек
+SCROLL_TIMEOUT = 15  # Максимальное время (в секундах) ожидания карточек при прокрутке через observer
+NEXT_PAGE_TIMEOUT = 10  # Максимальное время (в секундах) ожидания смены страницы после перехода
+# "observer" — ожидание карточек через MutationObserver внутри страницы, "polling" — опрос каждые SCROLL_PAUSE,
+# "compare" — чередовать оба способа по страницам, чтобы сравнить задержку за один прогон
+SCROLL_MODE = "observer"
 
 
 def setup_driver() -> WebDriver:
@@ -83,9 +97,10 @@ def setup_and_search(driver: WebDriver) -> None:
     time.sleep(PAGE_LOAD_TIMEOUT)
 
 
-def scroll_page(driver: WebDriver) -> None:
+def scroll_page(driver: WebDriver) -> int:
     """
     Прокручивает страницу до тех пор, пока не будет получены все объекты на странице.
+    Возвращает количество найденных объектов.
     """
     count = 0
     max_elements_page = 100
@@ -100,7 +115,7 @@ def scroll_page(driver: WebDriver) -> None:
         # Если количество объектов не изменилось, выходим из цикла
         if found_elements_page == current_count:
             print(f"На странице всего {current_count} объектов.")
-            break
+            return current_count
 
         print(f"Шаг {count + 1}: найдено {current_count} объектов")
 
@@ -110,27 +125,74 @@ def scroll_page(driver: WebDriver) -> None:
 
         if current_count >= 100:
             print(f"Достигнуто необходимое количество объектов {max_elements_page}.")
-            break
+            return current_count
 
-        time.sleep(0.5)
+        time.sleep(SCROLL_PAUSE)
 
         found_elements_page = current_count
         count += 1
 
+    return found_elements_page
+
+
+def scroll_page_observed(driver: WebDriver) -> int:
+    """
+    Прокручивает страницу и ждёт карточки через MutationObserver/IntersectionObserver внутри браузера.
+
+    Один вызов execute_async_script завершается, как только карточек стало 100 или список
+    перестал расти в течение адаптивного окна. Возвращает количество объектов на странице.
+    """
+    driver.set_script_timeout(SCROLL_TIMEOUT + 5)
+    result = driver.execute_async_script(
+        SELENIUM_SCROLL_OBSERVER_SCRIPT,
+        scroll_options(100, timeout=SCROLL_TIMEOUT * 1000)
+    )
+    print(f"На странице {result['count']} объектов ({result['reason']}).")
+    return result['count']
+
+
+def scroll_results(driver: WebDriver, latency: ScrollLatency) -> None:
+    """
+    Прокручивает страницу способом SCROLL_MODE и записывает задержку прокрутки.
+    """
+    method = SCROLL_MODE
+    if method == "compare":
+        scrolled_pages = sum(len(samples) for samples in latency.samples.values())
+        method = "polling" if scrolled_pages % 2 == 0 else "observer"
+
+    stop = latency.measure(method)
+    if method == "observer":
+        stop(scroll_page_observed(driver))
+    else:
+        time.sleep(PAGE_LOAD_TIMEOUT)
+        stop(scroll_page(driver))
+
 
 def go_to_next_page(driver: WebDriver) -> bool:
     """
     Переходит на следующую страницу. Возвращает True, если получилось.
+
+    После клика ждёт, пока первая карточка прежней страницы не исчезнет из DOM (staleness_of):
+    во время перехода SPA старые карточки ещё на странице, и прокрутка через observer сразу
+    нашла бы их и извлекла прежнюю страницу повторно.
     """
+    first_cards = driver.find_elements(By.CSS_SELECTOR, "article.j-card-item")
     try:
         next_button = driver.find_element(By.PARTIAL_LINK_TEXT, 'Следующая страница')
         next_button.click()
-        print("Перешли на следующую страницу")
-        return True
     except Exception as e:
         print(f"Не удалось перейти на следующую страницу: {e}")
         return False
 
+    if first_cards:
+        try:
+            WebDriverWait(driver, NEXT_PAGE_TIMEOUT).until(EC.staleness_of(first_cards[0]))
+        except TimeoutException:
+            print("Карточки не обновились после перехода на следующую страницу")
+            return False
+    print("Перешли на следующую страницу")
+    return True
+
 
 def parse_product_card(item: WebElement) -> dict[str, object] | None:
     """
@@ -140,51 +202,77 @@ def parse_product_card(item: WebElement) -> dict[str, object] | None:
         # Получаем весь HTML элемента один раз
         html = item.get_attribute('outerHTML')
 
-        title = re.search(r'<span class="product-card__name-separator.*?"> / </span>(.*?)</span>', html)
-        price = re.search(r'<ins class="price__lower-price.*?">.*?(\d+[.,]?\d*).*?</ins>', html)
-        discounted_price = re.search(r'<del>.*?(\d+[.,]?\d*).*?</del>', html)
-        rating = re.search(r'<span class="address-rate-mini address-rate-mini--sm">(.*?)</span>', html)
-        reviews_count = re.search(r'<span class="product-card__count">.*?(\d+).*?</span>', html)
-
         # если надо получаем валюту
         # currency = item.find_element(
         #         #     By.XPATH,
         #         #     "/html/body/div[1]/header/div/div[1]/div/div[2]/span/span[2]"
         #         # ).text
 
-        currency = 'BYN'
-
-        return {
-            "title": title.group(1),
-            "price": parse_number_from_text(price.group(1)),
-            "discounted_price": parse_number_from_text(discounted_price.group(1)) if discounted_price else None,
-            "rating": parse_number_from_text(rating.group(1)) if rating else None,
-            "reviews_count": parse_number_from_text(reviews_count.group(1)) if reviews_count else 0,
-            "currency": currency,
-        }
+        return parse_product_card_html(html, currency='BYN')
 
     except Exception as e:
         print(f"Ошибка в карточке товара: {e}")
         return None
 
 
-def parse_number_from_text(text: str) -> int | float | None:
+def extract_page_cards(driver: WebDriver) -> list[dict]:
     """
-    Извлекает число из строки. Возвращает int, float или None.
+    Извлекает все карточки текущей страницы одним вызовом execute_script.
+
+    Возвращает записи в том же формате, что и Playwright-парсер: title, price, discounted_price,
+    rating, reviews_count, currency и article_id.
+    """
+    records = driver.execute_script(SELENIUM_EXTRACT_CARDS_SCRIPT)
+    return normalize_cards(records, currency='BYN')
+
+
+def extract_page_cards_by_one(driver: WebDriver) -> list[dict]:
     """
-    if not isinstance(text, str):
-        return 0
+    Извлекает карточки текущей страницы по одной (отдельный HTTP-запрос к WebDriver на каждую карточку).
+    """
+    products = []
+    for item in driver.find_elements(By.CSS_SELECTOR, "article.j-card-item"):
+        product_data = parse_product_card(item)
+        if product_data:
+            products.append(product_data)
+    return products
 
-    text = text.replace(" ", "")
-    match = re.search(r'(\d+[.,]?\d*)', text)
 
-    if match:
-        number_str = match.group(1).replace(',', '.')  # Заменяем запятую на точку
-        number = float(number_str)  # Преобразуем в float
-        number = int(number) if number.is_integer() else number
-        return number
+def extract_products(driver: WebDriver) -> list[dict]:
+    """
+    Извлекает карточки страницы способом EXTRACTION_MODE.
+    """
+    if EXTRACTION_MODE == "batch":
+        return extract_page_cards(driver)
+    return extract_page_cards_by_one(driver)
 
-    return None
+
+def benchmark_extraction(driver: WebDriver, repeat: int = 3) -> dict[str, float]:
+    """
+    Сравнивает скорость извлечения карточек текущей страницы по одной и одним execute_script.
+
+    Args:
+        driver (WebDriver): Драйвер с загруженной страницей результатов.
+        repeat (int): Количество повторов, берётся лучшее время.
+
+    Returns:
+        dict[str, float]: Скорость извлечения (карточек в секунду) для каждого способа.
+    """
+    results = {}
+    for name, extract in (("card", extract_page_cards_by_one), ("batch", extract_page_cards)):
+        best_time = None
+        cards = 0
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            cards = len(extract(driver))
+            elapsed = time.perf_counter() - start_time
+            best_time = elapsed if best_time is None else min(best_time, elapsed)
+        results[name] = cards / best_time if best_time else 0
+        print(f"Извлечение ({name}): {cards} карточек за {best_time:.4f} сек., {results[name]:.1f} карточек/сек")
+
+    if results["card"]:
+        print(f"Ускорение batch относительно card: x{results['batch'] / results['card']:.1f}")
+    return results
 
 
 @timeit
@@ -193,36 +281,45 @@ def parse_products() -> None:
     Запускает парсинг товаров: ищет, собирает данные и сохраняет в БД.
     """
     driver = setup_driver()
-    products_info = []
+    collected = 0
+    scroll_latency = ScrollLatency()
+    # Товары записываются в БД пачками по мере сбора, а не одной транзакцией в конце
+    writer = ItemBatchWriter(batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_INTERVAL)
 
     try:
         setup_and_search(driver)
 
         while True:
-            time.sleep(PAGE_LOAD_TIMEOUT)
-            scroll_page(driver)
-            items = driver.find_elements(By.CSS_SELECTOR, "article.j-card-item")
+            scroll_results(driver, scroll_latency)
+            if BENCHMARK_EXTRACTION and not collected:
+                benchmark_extraction(driver)
 
-            for item in items:
-                product_data = parse_product_card(item)
-                if product_data and product_data["title"] and product_data["price"]:
-                    products_info.append(product_data)
+            start_time = time.perf_counter()
+            products = extract_products(driver)
+            elapsed = time.perf_counter() - start_time
+            print(f"Извлечено {len(products)} карточек за {elapsed:.4f} сек. (режим {EXTRACTION_MODE})")
 
-            print(f"Товаров собрано: {len(products_info)}")
+            for product_data in products:
+                if collected >= items_to_parse:
+                    break
+                if product_data["title"] and product_data["price"]:
+                    writer.add(product_data)
+                    collected += 1
+
+            print(f"Товаров собрано: {collected}")
 
-            if len(products_info) >= items_to_parse or len(items) < 100:
+            if collected >= items_to_parse or len(products) < 100:
                 break
             else:
                 if not go_to_next_page(driver):
                     break
 
-        print(f"Всего товаров для сохранения в БД: {len(products_info[:items_to_parse])} (лимит: {items_to_parse})")
-
-        # Создаем список объектов Item и сохраняем их в БД за одну транзакцию
-        items_to_create = [Item(**product) for product in products_info[:items_to_parse]]
-        Item.objects.bulk_create(items_to_create)
+        scroll_latency.print_summary()
+        print(f"Всего товаров собрано: {collected} (лимит: {items_to_parse})")
 
     finally:
+        writer.close()
+        writer.print_summary()
         driver.quit()
 
 